@@ -0,0 +1,218 @@
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.SlugField,
+)
+
+
+class CompiledSerializer:
+    """
+    Flat projection of a read-only ``ModelSerializer``.
+
+    The serializer's fields are resolved once into ``.values()`` lookups and a
+    converter per field, so listing rows skips model instantiation and the
+    per-field ``to_representation`` machinery while producing the same JSON.
+    Only plain model fields, primary-key relations and nested (non-``many``)
+    model serializers are supported; anything else raises ``ImproperlyConfigured``
+    when the serializer is compiled.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.lookups = []
+        self._plan = self._compile(serializer_class(), prefix="")
+
+    def values(self, queryset, *extra):
+        """
+        Return ``queryset`` as a ``.values()`` queryset of the compiled lookups.
+
+        ``extra`` names annotations to carry along, e.g. for pagination.
+        """
+        return queryset.values(*self.lookups, *extra)
+
+    def to_representation(self, rows):
+        """
+        Build serializer output from rows of :meth:`values`.
+
+        Args:
+            rows (iterable): Dicts keyed by the compiled lookups.
+
+        Returns:
+            list: One dict per row, identical to the serializer's output.
+        """
+        plan = _bind(self._plan)
+        return [_build(plan, row) for row in rows]
+
+    def _compile(self, serializer, prefix):
+        model = serializer.Meta.model
+        plan = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            lookup = prefix + self._resolve_source(model, field)
+            # Nested serializers use the foreign key column to detect a null relation.
+            self.lookups.append(lookup)
+
+            if isinstance(field, serializers.ModelSerializer):
+                plan.append((name, lookup, self._compile(field, prefix=f"{lookup}__")))
+            else:
+                plan.append((name, lookup, self._converter_factory(field)))
+
+        return plan
+
+    def _resolve_source(self, model, field):
+        name = f"{type(field).__name__} '{field.field_name}' on {self.serializer_class.__name__}"
+
+        nested = isinstance(field, serializers.BaseSerializer)
+        if nested and not isinstance(field, serializers.ModelSerializer):
+            raise ImproperlyConfigured(f"{name} cannot be compiled to a flat projection.")
+        if field.source_attrs != [field.source]:
+            raise ImproperlyConfigured(f"{name} must use a plain attribute as its source.")
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f"{name} does not map to a model field.")
+
+        relation = nested or isinstance(field, serializers.RelatedField)
+        if not model_field.concrete or model_field.many_to_many:
+            raise ImproperlyConfigured(f"{name} must map to a column on {model.__name__}.")
+        if relation != model_field.is_relation:
+            raise ImproperlyConfigured(f"{name} does not match the type of the model field.")
+        if isinstance(field, serializers.RelatedField) and (
+            type(field) is not serializers.PrimaryKeyRelatedField or field.pk_field is not None
+        ):
+            raise ImproperlyConfigured(f"{name} must be a plain PrimaryKeyRelatedField.")
+
+        return field.source
+
+    def _converter_factory(self, field):
+        """
+        Return a zero-argument callable producing the field's converter.
+
+        Converters are bound per :meth:`to_representation` call so that
+        request-scoped state such as the active timezone is read once per list.
+        ``None`` stands for the identity converter.
+        """
+        field_type = type(field)
+
+        if field_type in IDENTITY_FIELDS or field_type is serializers.PrimaryKeyRelatedField:
+            return lambda: None
+        if field_type is serializers.DecimalField:
+            return _decimal_converter_factory(field)
+        if field_type is serializers.DateTimeField:
+            return _datetime_converter_factory(field)
+        return lambda: field.to_representation
+
+
+def _decimal_converter_factory(field):
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.localize or field.decimal_places is None:
+        return lambda: field.to_representation
+
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    rounding = field.rounding
+
+    def factory():
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+
+        if coerce_to_string:
+            return lambda value: "{:f}".format(
+                value.quantize(exponent, rounding=rounding, context=context)
+            )
+        return lambda value: value.quantize(exponent, rounding=rounding, context=context)
+
+    return factory
+
+
+def _datetime_converter_factory(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if (
+        output_format is None
+        or output_format.lower() != ISO_8601
+        or hasattr(field, "timezone")
+        or not settings.USE_TZ
+    ):
+        return lambda: field.to_representation
+
+    def factory():
+        tz = timezone.get_current_timezone()
+
+        def convert(value):
+            if timezone.is_naive(value):
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+            return value
+
+        return convert
+
+    return factory
+
+
+def _bind(plan):
+    bound = []
+    for key, lookup, converter in plan:
+        if isinstance(converter, list):
+            bound.append((key, lookup, True, _bind(converter)))
+        else:
+            bound.append((key, lookup, False, converter()))
+    return bound
+
+
+def _build(plan, row):
+    data = {}
+    for key, lookup, nested, converter in plan:
+        value = row[lookup]
+        if value is None:
+            data[key] = None
+        elif nested:
+            data[key] = _build(converter, row)
+        elif converter is None:
+            data[key] = value
+        else:
+            data[key] = converter(value)
+    return data
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    """Compile ``serializer_class`` once per process."""
+    return CompiledSerializer(serializer_class)
+
+
+class CompiledListModelMixin:
+    """
+    List a queryset through the compiled projection of the viewset's serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.compiled_list_response(queryset)
+
+    def compiled_list_response(self, queryset, *extra):
+        compiled = compile_serializer(self.get_serializer_class())
+        rows = compiled.values(queryset, *extra)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.to_representation(page))
+
+        return Response(compiled.to_representation(rows))
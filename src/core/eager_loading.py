@@ -0,0 +1,78 @@
+from rest_framework import serializers
+
+
+class EagerLoadingMixin:
+    """
+    Serializer mixin declaring the relations a serializer touches.
+
+    ``select_related_fields`` lists forward relations to join and
+    ``prefetch_related_fields`` lists reverse or many-to-many relations to
+    prefetch. Nested serializers that also use this mixin are picked up
+    automatically, with their lookups prefixed by the field's source, so nesting
+    one serializer inside another can't reintroduce an N+1 query.
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def get_eager_loading(cls, prefix=""):
+        """
+        Collect the lookups needed to serialize a queryset of this serializer.
+
+        Args:
+            prefix (str): Lookup path from the root model to this serializer's model.
+
+        Returns:
+            tuple: ``(select_related, prefetch_related)`` lists of lookups.
+        """
+        select_related = [prefix + field for field in cls.select_related_fields]
+        prefetch_related = [prefix + field for field in cls.prefetch_related_fields]
+
+        for name, field in cls._declared_fields.items():
+            many = isinstance(field, serializers.ListSerializer)
+            child = field.child if many else field
+            if not isinstance(child, EagerLoadingMixin):
+                continue
+
+            source = (field.source or name).replace(".", "__")
+            lookup = prefix + source
+            nested_select, nested_prefetch = child.get_eager_loading(prefix=f"{lookup}__")
+
+            if many:
+                # Everything below a prefetched relation is prefetched with it.
+                prefetch_related.append(lookup)
+                prefetch_related.extend(nested_select + nested_prefetch)
+            else:
+                select_related.append(lookup)
+                select_related.extend(nested_select)
+                prefetch_related.extend(nested_prefetch)
+
+        return _unique(select_related), _unique(prefetch_related)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Apply this serializer's ``select_related``/``prefetch_related`` to a queryset."""
+        select_related, prefetch_related = cls.get_eager_loading()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+
+class EagerLoadingViewSetMixin:
+    """
+    ViewSet mixin that eager loads whatever the active serializer declares.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, EagerLoadingMixin):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
+
+
+def _unique(lookups):
+    return list(dict.fromkeys(lookups))
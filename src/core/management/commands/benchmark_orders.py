@@ -0,0 +1,110 @@
+import statistics
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts.models import User
+from orders.serializers import OrderCreateSerializer
+from products.models import Category, Product
+from products.services import catalog_bulk_changed
+
+# Side effects the rollback can't undo, kept away from the shared services:
+# catalog cache versions are bumped in a private cache, and order numbers are
+# drawn at random instead of using up blocks of the shared sequence.
+ISOLATED_SETTINGS = {
+    "CACHES": {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "benchmark-orders",
+        }
+    },
+    "ORDER_NUMBER_GENERATOR": "orders.numbers.RandomOrderNumberGenerator",
+}
+
+
+class Command(BaseCommand):
+    """
+    Django management command to time order placement for baskets of different sizes.
+
+    Each basket is validated and placed through ``OrderCreateSerializer``, like
+    a checkout request without the HTTP layer. Everything runs in a transaction
+    that is rolled back at the end, so the benchmark leaves no data behind and
+    queues no confirmation SMS. It uses a private cache and random order
+    numbers, so it neither flushes the catalog caches of a running deployment
+    nor leaves gaps in its order numbers.
+    """
+
+    help = "Time order placement for baskets of 1, 10, 100 and 1000 lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="1,10,100,1000", help="Comma-separated basket sizes in lines"
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Orders placed per size")
+
+    def handle(self, *args, **options):
+        """Execute the command to benchmark order placement."""
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+        if min(sizes) < 1 or options["repeat"] < 1:
+            raise CommandError("Sizes and --repeat must be at least 1")
+
+        with override_settings(**ISOLATED_SETTINGS), transaction.atomic():
+            context = {"request": SimpleNamespace(user=self.create_customer())}
+            product_ids = self.create_products(max(sizes), stock=options["repeat"] * len(sizes))
+
+            self.stdout.write(f"{'lines':>6} {'median ms':>10} {'ms/line':>8} {'queries':>8}")
+            for size in sizes:
+                items = [
+                    {"product_id": product_id, "quantity": 1} for product_id in product_ids[:size]
+                ]
+                timings, queries = self.place_orders(items, context, options["repeat"])
+                median = statistics.median(timings) * 1000
+                self.stdout.write(f"{size:>6} {median:>10.2f} {median / size:>8.3f} {queries:>8}")
+
+            transaction.set_rollback(True)
+
+    def create_customer(self):
+        """Create a customer able to place orders."""
+        name = f"benchmark-{uuid.uuid4().hex[:8]}"
+        return User.objects.create_user(
+            username=name, email=f"{name}@example.com", password=None, phone="+254700000000"
+        )
+
+    def create_products(self, count, stock):
+        """Create ``count`` products with enough stock for every order, returning their IDs."""
+        category = Category.objects.create(
+            name="Benchmark", slug=f"benchmark-{uuid.uuid4().hex[:8]}"
+        )
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Benchmark product {i}",
+                slug=f"{category.slug}-{i}",
+                category=category,
+                price=Decimal("1.00"),
+                stock=stock,
+            )
+            for i in range(count)
+        )
+        catalog_bulk_changed([category.pk])
+        return [product.pk for product in products]
+
+    def place_orders(self, items, context, repeat):
+        """Place ``repeat`` orders for ``items``, returning their timings and query count."""
+        timings = []
+        for _ in range(repeat):
+            data = {"shipping_address": "1 Benchmark Road", "items": items}
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                serializer = OrderCreateSerializer(data=data, context=context)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                timings.append(time.perf_counter() - started)
+        return timings, len(queries)
@@ -0,0 +1,78 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.exporter import export_chunks, export_rows
+from products.importer import FORMATS, format_for_path
+from products.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Django management command to export the product catalog to a CSV or NDJSON file.
+
+    Rows are read through a server-side cursor and written as they arrive, so
+    catalogs of any size export in constant memory. The output can be loaded
+    back with ``import_products``.
+    """
+
+    help = "Export all products to a CSV or NDJSON file (gzipped if the name ends in .gz)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write, or - for standard output")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="File format; defaults to the file extension"
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Compress the output (implied by a .gz name)"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Rows fetched per round trip (default PRODUCTS_EXPORT_CHUNK_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command to export the products."""
+        path = options["path"]
+        format = options["format"] or format_for_path(path)
+        if format is None:
+            raise CommandError("Cannot tell the file format from its name; pass --format")
+        gzip = options["gzip"] or path.endswith(".gz")
+
+        self.exported = 0
+        started = time.perf_counter()
+        rows = self.count(export_rows(Product.objects.all(), options["chunk_size"]))
+        chunks = export_chunks(rows, format, gzip)
+
+        if path == "-":
+            self.write(sys.stdout.buffer, chunks)
+            out = self.stderr
+        else:
+            try:
+                with open(path, "wb") as stream:
+                    self.write(stream, chunks)
+            except OSError as exc:
+                raise CommandError(f"Cannot write {path}: {exc}")
+            out = self.stdout
+
+        elapsed = time.perf_counter() - started
+        rate = self.exported / elapsed if elapsed else 0
+        out.write(
+            self.style.SUCCESS(
+                f"Exported {self.exported} products in {elapsed:.2f}s ({rate:.0f} rows/s)"
+            )
+        )
+
+    def count(self, rows):
+        """Pass rows through, counting them."""
+        for row in rows:
+            self.exported += 1
+            yield row
+
+    def write(self, stream, chunks):
+        """Write the encoded chunks to a binary stream."""
+        for chunk in chunks:
+            stream.write(chunk)
+        stream.flush()
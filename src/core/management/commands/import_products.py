@@ -0,0 +1,83 @@
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import (
+    DEFAULT_BATCH_SIZE,
+    FORMATS,
+    format_for_path,
+    import_products,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    """
+    Django management command to import products from a CSV or NDJSON file.
+
+    Each row has ``name``, ``category`` (slug or slug path), ``price`` and
+    optionally ``slug``, ``description`` and ``stock``. Rows with a slug are
+    matched by it: existing products are updated, new ones created. Rows without
+    one always create a product, under a unique slug made from the name. The
+    file is streamed, so catalogs of any size load in constant memory.
+    """
+
+    help = "Import products from a CSV or NDJSON file (optionally gzipped), upserting by slug"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for standard input")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="File format; defaults to the file extension"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows per COPY and merge (default {DEFAULT_BATCH_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command to import the products."""
+        path = options["path"]
+        format = options["format"] or format_for_path(path)
+        if format is None:
+            raise CommandError("Cannot tell the file format from its name; pass --format")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        if path == "-":
+            report = self.run(sys.stdin, format, options)
+        else:
+            opener = gzip.open if path.endswith(".gz") else open
+            try:
+                with opener(path, "rt", encoding="utf-8", newline="") as stream:
+                    report = self.run(stream, format, options)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+
+        for line, messages in report.errors:
+            self.stderr.write(f"Line {line}: {'; '.join(messages)}")
+        if report.rejected > len(report.errors):
+            self.stderr.write(f"... and {report.rejected - len(report.errors)} more rejected rows")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report.read} rows in {report.elapsed:.2f}s "
+                f"({report.rows_per_second:.0f} rows/s): {report.inserted} created, "
+                f"{report.updated} updated, {report.skipped} unchanged, "
+                f"{report.rejected} rejected"
+            )
+        )
+
+    def run(self, stream, format, options):
+        """Import the rows of an open stream, reporting progress per batch."""
+        return import_products(
+            read_rows(stream, format),
+            batch_size=options["batch_size"],
+            on_batch=self.report_progress if options["verbosity"] > 1 else None,
+        )
+
+    def report_progress(self, report):
+        """Write the running totals after a batch."""
+        self.stdout.write(f"{report.read} rows read ({report.rows_per_second:.0f} rows/s)")
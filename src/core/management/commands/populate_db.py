@@ -6,6 +6,7 @@ from django.utils.text import slugify
 from accounts.models import User
 from orders.models import Order, OrderItem
 from products.models import Category, Product
+from products.tree import get_category_tree
 
 
 class Command(BaseCommand):
@@ -150,7 +151,7 @@ class Command(BaseCommand):
         """
         Product.objects.all().delete()
 
-        categories = Category.objects.filter(children__isnull=True)
+        categories = Category.objects.filter(id__in=get_category_tree().leaf_ids())
 
         products_data = []
         for category in categories:
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from products.stats import rebuild_category_stats
+
+
+class Command(BaseCommand):
+    """
+    Django management command to recompute the per-category price and stock statistics.
+
+    The statistics are normally kept current by the product signal handlers; run
+    this after writes that bypass them (raw SQL, fixtures, ``QuerySet.update``)
+    or to repair drift. Product writes wait for it while it holds the statistics
+    rows.
+    """
+
+    help = "Rebuild the per-category price and stock statistics from the product table"
+
+    def handle(self, *args, **kwargs):
+        """Execute the command to rebuild the category statistics."""
+        count = rebuild_category_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {count} categories"))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from orders.outbox import relay
+
+
+class Command(BaseCommand):
+    """
+    Django management command to publish queued outbox tasks to Celery.
+
+    Runs until interrupted, publishing batches back to back while there is a
+    backlog and polling every ``--interval`` seconds once it is drained. Any
+    number of relays can run at once; each message is published by one of them.
+    """
+
+    help = "Publish queued order notifications from the outbox to Celery"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Messages published per batch (default ORDERS_OUTBOX_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=1.0, help="Seconds to wait when the outbox is empty"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the outbox once and exit instead of polling"
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command to relay the outbox."""
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        published = 0
+        try:
+            while True:
+                count = relay(options["batch_size"])
+                published += count
+                if count:
+                    continue
+                if options["once"]:
+                    break
+                # Idle relays shouldn't hold on to a broken or expired connection.
+                close_old_connections()
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Published {published} messages"))
@@ -0,0 +1,105 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from products.importer import FORMATS, format_for_path, read_rows
+from products.serializers import ProductStockPriceRowSerializer
+from products.services import update_stock_and_prices
+
+# Unknown IDs and slugs listed in the output; the rest are only counted.
+MAX_LISTED_UNKNOWN = 20
+
+
+class Command(BaseCommand):
+    """
+    Django management command to update product stock and prices from a CSV or NDJSON file.
+
+    Each row has ``id`` or ``slug`` and ``stock``, ``price`` or both. Rows are
+    streamed from the file and applied in set-based batches; invalid rows are
+    reported by line and skipped.
+    """
+
+    help = "Update product stock and prices from a CSV or NDJSON file (optionally gzipped)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, or - for standard input")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="File format; defaults to the file extension"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Rows per UPDATE statement (default PRODUCTS_BULK_UPDATE_BATCH_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command to update the products."""
+        path = options["path"]
+        format = options["format"] or format_for_path(path)
+        if format is None:
+            raise CommandError("Cannot tell the file format from its name; pass --format")
+
+        self.read = self.rejected = 0
+        started = time.perf_counter()
+        if path == "-":
+            report = self.run(sys.stdin, format, options)
+        else:
+            opener = gzip.open if path.endswith(".gz") else open
+            try:
+                with opener(path, "rt", encoding="utf-8", newline="") as stream:
+                    report = self.run(stream, format, options)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+        elapsed = time.perf_counter() - started
+
+        for label, unknown in (("IDs", report.unknown_ids), ("slugs", report.unknown_slugs)):
+            if unknown:
+                listed = ", ".join(str(value) for value in unknown[:MAX_LISTED_UNKNOWN])
+                more = len(unknown) - MAX_LISTED_UNKNOWN
+                self.stderr.write(
+                    f"Unknown {label}: {listed}" + (f" and {more} more" if more > 0 else "")
+                )
+
+        rate = self.read / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {self.read} rows in {elapsed:.2f}s ({rate:.0f} rows/s): "
+                f"{len(report.updated)} updated, {report.unchanged} unchanged, "
+                f"{len(report.unknown_ids) + len(report.unknown_slugs)} unknown, "
+                f"{self.rejected} rejected"
+            )
+        )
+
+    def run(self, stream, format, options):
+        """Apply the valid rows of an open stream."""
+        return update_stock_and_prices(
+            self.validated(read_rows(stream, format)), batch_size=options["batch_size"]
+        )
+
+    def validated(self, rows):
+        """Yield the validated rows, reporting the invalid ones."""
+        row_serializer = ProductStockPriceRowSerializer()
+        for line, record in rows:
+            self.read += 1
+            if isinstance(record, dict):
+                # Blank CSV cells mean "leave as is", like an absent key.
+                record = {key: value for key, value in record.items() if value not in ("", None)}
+            try:
+                yield row_serializer.run_validation(record)
+            except serializers.ValidationError as exc:
+                self.rejected += 1
+                self.stderr.write(f"Line {line}: {'; '.join(self.messages(exc.detail))}")
+
+    def messages(self, detail):
+        """Flatten a validation error into ``field: message`` strings."""
+        if not isinstance(detail, dict):
+            return [str(message) for message in detail]
+        return [
+            str(message) if field == api_settings.NON_FIELD_ERRORS_KEY else f"{field}: {message}"
+            for field, messages in detail.items()
+            for message in messages
+        ]
@@ -0,0 +1,58 @@
+class LoadedValuesMixin:
+    """
+    Model mixin remembering the column values an instance was loaded with.
+
+    ``from_db`` is the only place Django hands over the values as read from the
+    database, so signal handlers can compare them with the instance being saved
+    or deleted without an extra query.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_values(self, *attnames):
+        """
+        Return the loaded values of ``attnames`` as a tuple.
+
+        Returns ``None`` when the instance wasn't loaded from the database (or
+        any of the fields was deferred), i.e. when the old state is unknown.
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None or any(attname not in loaded for attname in attnames):
+            return None
+        return tuple(loaded[attname] for attname in attnames)
+
+    def lock_loaded_values(self, *attnames):
+        """
+        Reread ``attnames`` from the stored row, locking it, as the loaded state.
+
+        Must be called inside a transaction: the row stays locked until it ends,
+        so the values can't change before the instance is saved or deleted, and
+        a stale instance is compared with what the database really holds. A
+        missing row leaves the values unknown.
+        """
+        row = (
+            type(self)
+            ._base_manager.select_for_update()
+            .filter(pk=self.pk)
+            .values_list(*attnames)
+            .first()
+        )
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            loaded = self._loaded_values = {}
+        for attname in attnames:
+            loaded.pop(attname, None)
+        if row is not None:
+            loaded.update(zip(attnames, row))
+
+    def reset_loaded_values(self, *attnames):
+        """Record the current values of ``attnames`` as the loaded state after a save."""
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            loaded = self._loaded_values = {}
+        for attname in attnames:
+            loaded[attname] = getattr(self, attname)
@@ -1,7 +1,7 @@
 from datetime import timedelta
 
 from django.contrib import admin
-from django.db.models import Avg, Count, Sum
+from django.db.models import Avg, Count, Q, Sum
 from django.db.models.functions import TruncDay
 from django.shortcuts import render
 from django.urls import path
@@ -11,6 +11,7 @@ from django.utils.translation import gettext_lazy as _
 from accounts.models import User
 from orders.models import Order, OrderItem
 from products.models import Product
+from products.tree import get_category_tree
 
 
 class GroceryAdminSite(admin.AdminSite):
@@ -36,20 +37,22 @@ class GroceryAdminSite(admin.AdminSite):
         """
         # Get basic statistics
         context = extra_context or {}
+        thirty_days_ago = timezone.now() - timedelta(days=30)
 
         # Product stats
-        total_products = Product.objects.count()
-        low_stock_products = Product.objects.filter(stock__lte=5).count()
-        out_of_stock_products = Product.objects.filter(stock=0).count()
+        product_stats = Product.objects.aggregate(
+            total=Count("id"),
+            low_stock=Count("id", filter=Q(stock__lte=5)),
+            out_of_stock=Count("id", filter=Q(stock=0)),
+        )
 
         # Order stats
-        recent_orders = Order.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count()
-        pending_orders = Order.objects.filter(status="pending").count()
+        order_stats = Order.objects.aggregate(
+            recent=Count("id", filter=Q(created_at__gte=thirty_days_ago)),
+            pending=Count("id", filter=Q(status="pending")),
+        )
 
         # Sales stats for the last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
         monthly_sales = Order.objects.filter(
             created_at__gte=thirty_days_ago, status__in=["processing", "shipped", "delivered"]
         ).aggregate(
@@ -59,19 +62,21 @@ class GroceryAdminSite(admin.AdminSite):
         )
 
         # User stats
-        total_users = User.objects.filter(is_staff=False).count()
-        new_users = User.objects.filter(created_at__gte=thirty_days_ago, is_staff=False).count()
+        user_stats = User.objects.filter(is_staff=False).aggregate(
+            total=Count("id"),
+            new=Count("id", filter=Q(created_at__gte=thirty_days_ago)),
+        )
 
         context.update(
             {
-                "total_products": total_products,
-                "low_stock_products": low_stock_products,
-                "out_of_stock_products": out_of_stock_products,
-                "recent_orders": recent_orders,
-                "pending_orders": pending_orders,
+                "total_products": product_stats["total"],
+                "low_stock_products": product_stats["low_stock"],
+                "out_of_stock_products": product_stats["out_of_stock"],
+                "recent_orders": order_stats["recent"],
+                "pending_orders": order_stats["pending"],
                 "monthly_sales": monthly_sales,
-                "total_users": total_users,
-                "new_users": new_users,
+                "total_users": user_stats["total"],
+                "new_users": user_stats["new"],
             }
         )
 
@@ -101,19 +106,21 @@ class GroceryAdminSite(admin.AdminSite):
             .order_by("-total_sold")[:10]
         )
 
-        # Top categories
-        top_categories = (
-            OrderItem.objects.values("product__category__name")
+        # Top categories, named from the category tree instead of a join
+        tree = get_category_tree()
+        top_categories = [
+            {"product__category__name": tree.name(row["product__category_id"]), **row}
+            for row in OrderItem.objects.values("product__category_id")
             .annotate(total_sold=Sum("quantity"), revenue=Sum("price"))
             .order_by("-total_sold")[:5]
-        )
+        ]
 
         # Inventory status
-        inventory_status = {
-            "in_stock": Product.objects.filter(stock__gt=5).count(),
-            "low_stock": Product.objects.filter(stock__gt=0, stock__lte=5).count(),
-            "out_of_stock": Product.objects.filter(stock=0).count(),
-        }
+        inventory_status = Product.objects.aggregate(
+            in_stock=Count("id", filter=Q(stock__gt=5)),
+            low_stock=Count("id", filter=Q(stock__gt=0, stock__lte=5)),
+            out_of_stock=Count("id", filter=Q(stock=0)),
+        )
 
         return render(
             request,
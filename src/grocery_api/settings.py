@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",  # Required for django-allauth
+    "django.contrib.postgres",  # Full-text and trigram search
     # Third-party apps
 ]
 
@@ -142,6 +143,17 @@ except ImportError:
     }
 
 
+# Cache
+# Catalog responses are cached in Redis; see products.cache for invalidation.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("CACHE_URL", "redis://localhost:6379/1"),
+    }
+}
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 60 * 15))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -266,6 +278,33 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Product catalog pagination
+# Page size used when the client does not pass ?page_size=, and the hard cap on it.
+PRODUCTS_PAGE_SIZE = int(os.environ.get("PRODUCTS_PAGE_SIZE", 50))
+PRODUCTS_MAX_PAGE_SIZE = int(os.environ.get("PRODUCTS_MAX_PAGE_SIZE", 200))
+# Upper bounds of the price facet buckets; the last bucket is open-ended
+PRODUCTS_PRICE_BUCKETS = os.environ.get("PRODUCTS_PRICE_BUCKETS", "5,10,20,50").split(",")
+# Rows per INSERT statement when products are created in bulk
+PRODUCTS_BULK_CREATE_BATCH_SIZE = int(os.environ.get("PRODUCTS_BULK_CREATE_BATCH_SIZE", 1000))
+# Rows per UPDATE statement when stock and prices are updated in bulk
+PRODUCTS_BULK_UPDATE_BATCH_SIZE = int(os.environ.get("PRODUCTS_BULK_UPDATE_BATCH_SIZE", 5000))
+# Rows fetched per round trip from the server-side cursor of a catalog export
+PRODUCTS_EXPORT_CHUNK_SIZE = int(os.environ.get("PRODUCTS_EXPORT_CHUNK_SIZE", 2000))
+# Whether a stale autocomplete index is rebuilt, or has product changes applied,
+# in a background thread while the old one keeps serving, rather than by the
+# request that finds it stale
+PRODUCTS_SUGGEST_BACKGROUND_REBUILD = (
+    os.environ.get("PRODUCTS_SUGGEST_BACKGROUND_REBUILD", "True").lower() == "true"
+)
+
+# Orders
+# Dotted path to the class that hands out order numbers
+ORDER_NUMBER_GENERATOR = os.environ.get(
+    "ORDER_NUMBER_GENERATOR", "orders.numbers.SequenceOrderNumberGenerator"
+)
+# Outbox messages published to Celery per relay batch
+ORDERS_OUTBOX_BATCH_SIZE = int(os.environ.get("ORDERS_OUTBOX_BATCH_SIZE", 500))
+
 # Simple JWT settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
@@ -338,6 +377,34 @@ AFRICAS_TALKING_USERNAME = os.environ.get("AFRICAS_TALKING_USERNAME", "sandbox")
 AFRICAS_TALKING_SENDER_ID = os.environ.get(
     "AFRICAS_TALKING_SENDER_ID", ""
 )  # Optional, for branded messages
+# Dotted path to the class that sends SMS; orders.sms.FakeSmsBackend sends nothing
+SMS_BACKEND = os.environ.get("SMS_BACKEND", "orders.sms.AfricasTalkingBackend")
+# Seconds to wait for a connection to the SMS provider, and for its response
+SMS_CONNECT_TIMEOUT = float(os.environ.get("SMS_CONNECT_TIMEOUT", 3))
+SMS_READ_TIMEOUT = float(os.environ.get("SMS_READ_TIMEOUT", 10))
+# Seconds the fake backend takes per request, to mimic the provider in load runs
+SMS_FAKE_LATENCY = float(os.environ.get("SMS_FAKE_LATENCY", 0))
+
+# SMS batching and retries
+# Seconds SMS sharing a text are collected before being sent together, and the first retry delay
+SMS_BATCH_WINDOW = float(os.environ.get("SMS_BATCH_WINDOW", 2))
+# Recipients per provider request for the same message text
+SMS_BATCH_MAX_RECIPIENTS = int(os.environ.get("SMS_BATCH_MAX_RECIPIENTS", 100))
+# Provider requests made for a delivery before a transient failure is final
+SMS_MAX_ATTEMPTS = int(os.environ.get("SMS_MAX_ATTEMPTS", 5))
+# Seconds an SMS may stay sending before it's taken to be abandoned and sent again
+SMS_SENDING_TIMEOUT = float(os.environ.get("SMS_SENDING_TIMEOUT", 900))
+# Seconds an order's status changes are held so only the latest is sent; 0 sends each
+SMS_COALESCE_WINDOW = float(os.environ.get("SMS_COALESCE_WINDOW", 10))
+
+# SMS provider protection, shared by every worker through Redis
+SMS_REDIS_URL = os.environ.get("SMS_REDIS_URL", CACHES["default"]["LOCATION"])
+# Provider requests per second, and how many may be made in a burst
+SMS_RATE_LIMIT = float(os.environ.get("SMS_RATE_LIMIT", 10))
+SMS_RATE_LIMIT_BURST = int(os.environ.get("SMS_RATE_LIMIT_BURST", 20))
+# Failed requests in a row that open the circuit, and seconds it stays open
+SMS_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("SMS_CIRCUIT_FAILURE_THRESHOLD", 5))
+SMS_CIRCUIT_RESET_TIMEOUT = float(os.environ.get("SMS_CIRCUIT_RESET_TIMEOUT", 30))
 
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")
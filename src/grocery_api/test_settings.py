@@ -24,3 +24,14 @@ TEST_DATABASE_PREFIX = "test_"
 
 TEST_DATABASE_CREATE = False
 TEST_DATABASE_NAME = os.environ.get("TEST_POSTGRES_DB", "grocery_api_test")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+SMS_BACKEND = "orders.sms.FakeSmsBackend"
+
+# Test data is only visible to the test's own connection.
+PRODUCTS_SUGGEST_BACKGROUND_REBUILD = False
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import Order, OrderItem
+from .models import Order, OrderItem, SmsDelivery
+from .transitions import transition_orders
 
 
 class OrderItemInline(admin.TabularInline):
@@ -15,6 +16,10 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ("price",)
     autocomplete_fields = ["product"]
 
+    def get_queryset(self, request):
+        # Each inline row is labelled with str(item), which reads item.product.
+        return super().get_queryset(request).select_related("product")
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
@@ -32,6 +37,7 @@ class OrderAdmin(admin.ModelAdmin):
         "shipping_address",
     )
     readonly_fields = ("order_number", "total_amount", "created_at", "updated_at")
+    list_select_related = ("user",)
     inlines = [OrderItemInline]
     list_per_page = 20
     date_hierarchy = "created_at"
@@ -69,17 +75,48 @@ class OrderAdmin(admin.ModelAdmin):
     status_colored.short_description = "Status"
     status_colored.admin_order_field = "status"
 
+    def transition(self, request, queryset, status):
+        """Move the selected orders to ``status`` and notify their customers."""
+        report = transition_orders(queryset.values_list("pk", flat=True), status)
+        self.message_user(
+            request,
+            f"{len(report.updated)} orders marked as {status}; "
+            f"{len(report.unchanged)} already were.",
+        )
+
     def mark_as_processing(self, request, queryset):
-        queryset.update(status="processing")
+        self.transition(request, queryset, "processing")
 
     mark_as_processing.short_description = "Mark selected orders as processing"
 
     def mark_as_shipped(self, request, queryset):
-        queryset.update(status="shipped")
+        self.transition(request, queryset, "shipped")
 
     mark_as_shipped.short_description = "Mark selected orders as shipped"
 
     def mark_as_delivered(self, request, queryset):
-        queryset.update(status="delivered")
+        self.transition(request, queryset, "delivered")
 
     mark_as_delivered.short_description = "Mark selected orders as delivered"
+
+
+@admin.register(SmsDelivery)
+class SmsDeliveryAdmin(admin.ModelAdmin):
+    """
+    Admin interface for SmsDelivery model.
+    """
+
+    list_display = (
+        "phone_number",
+        "status",
+        "provider_status",
+        "attempts",
+        "order",
+        "created_at",
+        "sent_at",
+    )
+    list_filter = ("status", "provider_status", "created_at")
+    search_fields = ("phone_number", "order__order_number", "provider_message_id")
+    raw_id_fields = ("order",)
+    list_per_page = 50
+    date_hierarchy = "created_at"
@@ -0,0 +1,105 @@
+import logging
+
+import redis
+from django.conf import settings
+
+from .resilience import KEY_PREFIX, get_redis
+
+logger = logging.getLogger("customer_orders")
+
+# Store each version unless the order already has a newer one. ARGV[1] is the
+# expiry, then one version per key.
+REGISTER_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    local version = tonumber(ARGV[i + 1])
+    local current = tonumber(redis.call('GET', key))
+    if not current or version > current then
+        redis.call('SET', key, ARGV[i + 1], 'EX', ARGV[1])
+    end
+end
+return #KEYS
+"""
+
+# Claim the payloads still the latest of their order and not sent yet: KEYS
+# are the version and sent keys of each order in turn, ARGV[1] the expiry,
+# then one version per order. Returns the positions of the claimed payloads.
+CLAIM_SCRIPT = """
+local claimed = {}
+for i = 1, #KEYS / 2 do
+    local version = tonumber(ARGV[i + 1])
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]))
+    local sent = tonumber(redis.call('GET', KEYS[2 * i]))
+    if (not current or version >= current) and (not sent or version > sent) then
+        redis.call('SET', KEYS[2 * i], ARGV[i + 1], 'EX', ARGV[1])
+        claimed[#claimed + 1] = i
+    end
+end
+return claimed
+"""
+
+
+def version_of(updated_at):
+    """Return the notification version for an order last updated at ``updated_at``."""
+    return int(updated_at.timestamp() * 1_000_000)
+
+
+def _key(order_id):
+    return f"{KEY_PREFIX}:coalesce:{order_id}"
+
+
+def _expiry():
+    # Outlives the window, so the delayed check still finds the version.
+    return int(settings.SMS_COALESCE_WINDOW * 2) + 60
+
+
+def register(payloads):
+    """
+    Record the payloads as the latest notifications of their orders.
+
+    A payload older than one already recorded for its order is ignored, so the
+    order tasks run in doesn't matter.
+
+    Args:
+        payloads (list): Notification payloads with a ``version``.
+
+    Returns:
+        bool: Whether they were recorded; if Redis is unavailable they
+        weren't, and should be sent straight away.
+    """
+    client = get_redis(settings.SMS_REDIS_URL)
+    try:
+        client.register_script(REGISTER_SCRIPT)(
+            keys=[_key(payload["order_id"]) for payload in payloads],
+            args=[_expiry()] + [payload["version"] for payload in payloads],
+        )
+    except redis.RedisError as e:
+        logger.warning("Not coalescing order notifications: %s", str(e))
+        return False
+    return True
+
+
+def claim(payloads):
+    """
+    Claim the payloads that are still the latest notification of their order.
+
+    A payload superseded by a newer one for the same order is dropped, and so
+    is one whose version was already claimed, so duplicate tasks send once.
+
+    Args:
+        payloads (list): Notification payloads with a ``version``.
+
+    Returns:
+        list: The payloads to send. If Redis is unavailable, all of them.
+    """
+    client = get_redis(settings.SMS_REDIS_URL)
+    keys = []
+    for payload in payloads:
+        keys += [_key(payload["order_id"]), f"{_key(payload['order_id'])}:sent"]
+    try:
+        claimed = client.register_script(CLAIM_SCRIPT)(
+            keys=keys, args=[_expiry()] + [payload["version"] for payload in payloads]
+        )
+    except redis.RedisError as e:
+        logger.warning("Not coalescing order notifications: %s", str(e))
+        return payloads
+    return [payloads[position - 1] for position in claimed]
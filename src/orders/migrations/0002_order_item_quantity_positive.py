@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="orderitem",
+            constraint=models.CheckConstraint(
+                check=models.Q(("quantity__gte", 1)), name="order_item_quantity_positive"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0002_order_item_quantity_positive"),
+    ]
+
+    operations = [
+        # Each value is the high part of a block of order numbers, see
+        # orders.numbers.SequenceOrderNumberGenerator.
+        migrations.RunSQL(
+            sql="CREATE SEQUENCE IF NOT EXISTS orders_order_number_seq;",
+            reverse_sql="DROP SEQUENCE IF EXISTS orders_order_number_seq;",
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0005_smsdelivery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="smsdelivery",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="smsdelivery",
+            name="retry_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
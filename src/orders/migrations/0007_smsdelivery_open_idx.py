@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0006_smsdelivery_attempts"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="smsdelivery",
+            name="sms_delivery_pending_idx",
+        ),
+        migrations.AddIndex(
+            model_name="smsdelivery",
+            index=models.Index(
+                condition=models.Q(("status__in", ["pending", "sending"])),
+                fields=["id"],
+                name="sms_delivery_open_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 from products.models import Product
 
@@ -42,7 +42,9 @@ class Order(models.Model):
         if self.id is None:
             # This is a new order
             self._original_status = self.status
-        super().save(*args, **kwargs)
+        # Notifications queued by post_save commit or roll back with the order.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
 
 class OrderItem(models.Model):
@@ -55,9 +57,84 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(quantity__gte=1), name="order_item_quantity_positive"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.quantity}x {self.product.name}"
 
     @property
     def subtotal(self):
         return self.price * self.quantity
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task waiting to be published by the outbox relay.
+
+    Rows are written in the same transaction as the change they announce, so a
+    task is queued exactly when that change commits, and the request never
+    waits on the broker. See ``orders.outbox``.
+    """
+
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.task}{tuple(self.args)}"
+
+
+class SmsDelivery(models.Model):
+    """
+    One SMS to one recipient, and what the provider said about it.
+
+    Recorded by ``orders.notifications`` for every message, whether it is
+    sent at once or queued for a batch.
+    """
+
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    )
+
+    order = models.ForeignKey(
+        Order, on_delete=models.SET_NULL, null=True, blank=True, related_name="sms_deliveries"
+    )
+    phone_number = models.CharField(max_length=20)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    # As reported by the provider for this recipient, e.g. "Success" or "InvalidPhoneNumber".
+    provider_status = models.CharField(max_length=50, blank=True)
+    provider_message_id = models.CharField(max_length=100, blank=True)
+    cost = models.CharField(max_length=30, blank=True)
+    error = models.TextField(blank=True)
+    # Provider requests made for it; ones that failed transiently are retried.
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When a pending delivery that failed transiently may be tried again, or
+    # when the claim on a sending one expires and it may be claimed again.
+    retry_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="sms_delivery_open_idx",
+                condition=models.Q(status__in=["pending", "sending"]),
+            ),
+        ]
+
+    def __str__(self):
+        return f"SMS to {self.phone_number} ({self.status})"
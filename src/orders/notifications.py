@@ -0,0 +1,406 @@
+import math
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .coalescing import version_of
+from .models import SmsDelivery
+from .resilience import SmsUnavailable
+from .services import send_bulk_sms
+from .sms import is_valid_phone_number
+
+FLUSH_SCHEDULED_KEY = "orders:sms-flush-scheduled"
+RECOVERY_SCHEDULED_KEY = "orders:sms-recovery-scheduled"
+
+# Deliveries claimed per flush; a flush that fills up schedules another.
+FLUSH_LIMIT = 5000
+
+# Longest wait, in seconds, before retrying a flush or a delivery.
+SMS_MAX_BACKOFF = 300
+
+# Recipient statuses Africa's Talking reports for an accepted message.
+ACCEPTED_STATUSES = {"Success", "Sent", "Queued"}
+
+# Order message templates, by the event they announce: "confirmed" for a new
+# order, otherwise the status the order moved to.
+MESSAGE_TEMPLATES = {
+    "confirmed": "Hi {name}, order #{order_number} confirmed. Thanks!",
+    "processing": "Hi {name}, order #{order_number} processing.",
+    "shipped": "Hi {name}, order #{order_number} shipped!",
+    "delivered": "Hi {name}, order #{order_number} delivered!",
+    "cancelled": "Hi {name}, order #{order_number} cancelled.",
+}
+DEFAULT_TEMPLATE = "Hi {name}, order #{order_number}: {status}."
+
+# Texts for status changes made in bulk. Nothing in them is personal, so every
+# customer of an order moving to a status gets the same text, and they are
+# batched into one request per SMS_BATCH_MAX_RECIPIENTS.
+SHARED_TEMPLATES = {
+    "processing": "Your order is being processed.",
+    "shipped": "Good news: your order has shipped!",
+    "delivered": "Your order has been delivered. Enjoy!",
+    "cancelled": "Your order has been cancelled.",
+}
+DEFAULT_SHARED_TEMPLATE = "Your order is now {status}."
+
+# Parsed once at import; rendering a message is then a single call.
+_RENDERERS = {event: template.format for event, template in MESSAGE_TEMPLATES.items()}
+_render_default = DEFAULT_TEMPLATE.format
+
+
+def build_payload(order_id, order_number, status, first_name, phone, updated_at):
+    """
+    Build an order notification payload from the order's and customer's values.
+
+    Args:
+        order_id (int): The order's ID.
+        order_number (str): The order's number.
+        status (str): The order's status.
+        first_name (str): The customer's first name, possibly empty.
+        phone (str): The customer's phone number, possibly empty.
+        updated_at (datetime): When the order was last saved.
+
+    Returns:
+        dict: A JSON-serializable task payload.
+    """
+    return {
+        "order_id": order_id,
+        "order_number": order_number,
+        "status": status,
+        "name": first_name or "Customer",
+        "phone": phone,
+        "version": version_of(updated_at),
+    }
+
+
+def order_payload(order, user):
+    """
+    Capture what an order notification needs, so the task can skip the database.
+
+    Args:
+        order (Order): The order the notification is about.
+        user (User): The customer who placed it.
+
+    Returns:
+        dict: A JSON-serializable task payload.
+    """
+    return build_payload(
+        order.id, order.order_number, order.status, user.first_name, user.phone, order.updated_at
+    )
+
+
+def render_message(event, payload):
+    """
+    Render the message announcing ``event`` from a notification payload.
+
+    Args:
+        event (str): "confirmed" or the status the order moved to.
+        payload (dict): A payload from :func:`order_payload`.
+
+    Returns:
+        str: The message text.
+    """
+    return _RENDERERS.get(event, _render_default)(**payload)
+
+
+def render_shared_message(status):
+    """Return the text every customer of an order moved to ``status`` in bulk gets."""
+    return SHARED_TEMPLATES.get(status) or DEFAULT_SHARED_TEMPLATE.format(status=status)
+
+
+def queue_sms(phone_number, message, order_id=None):
+    """
+    Queue an SMS for the next batch instead of sending it right away.
+
+    Messages queued within ``SMS_BATCH_WINDOW`` seconds of each other are sent
+    together, with one provider request per distinct text. Only worth it for
+    texts many recipients get; send personalized ones with :func:`send_sms_now`.
+
+    Args:
+        phone_number (str): The recipient's phone number.
+        message (str): The message content to be sent.
+        order_id (int): The ID of the order the message is about, if any.
+
+    Returns:
+        SmsDelivery: The queued delivery.
+    """
+    delivery = SmsDelivery.objects.create(
+        phone_number=phone_number, message=message, order_id=order_id
+    )
+    transaction.on_commit(schedule_flush)
+    return delivery
+
+
+def queue_sms_many(messages):
+    """
+    Queue many SMS for the next batch with a single insert.
+
+    Args:
+        messages (list): ``(phone_number, message, order_id)`` tuples.
+
+    Returns:
+        list: The queued deliveries.
+    """
+    deliveries = SmsDelivery.objects.bulk_create(
+        SmsDelivery(phone_number=phone_number, message=message, order_id=order_id)
+        for phone_number, message, order_id in messages
+    )
+    if deliveries:
+        transaction.on_commit(schedule_flush)
+    return deliveries
+
+
+def schedule_flush():
+    """Schedule a flush at the end of the window, unless one is already scheduled."""
+    from .tasks import flush_sms_batch
+
+    window = settings.SMS_BATCH_WINDOW
+    if cache.add(FLUSH_SCHEDULED_KEY, 1, timeout=math.ceil(window)):
+        flush_sms_batch.apply_async(countdown=window)
+
+
+def schedule_recovery():
+    """
+    Schedule a flush for when deliveries being sent now may be reclaimed.
+
+    A delivery stays sending only if its worker died; the flush then sends it
+    again. At most one such flush is scheduled at a time, and the flush
+    schedules the next one while deliveries are still sending.
+    """
+    from .tasks import flush_sms_batch
+
+    timeout = settings.SMS_SENDING_TIMEOUT
+    # The key expires just before the flush runs, so that flush can schedule the next.
+    if cache.add(RECOVERY_SCHEDULED_KEY, 1, timeout=max(1, math.floor(timeout) - 1)):
+        flush_sms_batch.apply_async(countdown=timeout)
+
+
+def claim_expiry(now):
+    """Return when deliveries claimed for sending at ``now`` may be reclaimed."""
+    return now + timedelta(seconds=settings.SMS_SENDING_TIMEOUT)
+
+
+def postpone_flush(countdown):
+    """Mark a flush as scheduled for the next ``countdown`` seconds, by a retry."""
+    cache.set(FLUSH_SCHEDULED_KEY, 1, timeout=math.ceil(countdown))
+
+
+def retry_delay(attempts):
+    """Return the seconds to wait after ``attempts`` failed tries, doubling each time."""
+    return min(SMS_MAX_BACKOFF, settings.SMS_BATCH_WINDOW * 2**attempts)
+
+
+def schedule_retry(deliveries):
+    """Schedule a flush for when the first of the deliveries put back for a retry is due."""
+    from .tasks import flush_sms_batch
+
+    retries = [delivery.retry_at for delivery in deliveries if delivery.status == "pending"]
+    if retries:
+        countdown = max(0.0, (min(retries) - timezone.now()).total_seconds())
+        transaction.on_commit(lambda: flush_sms_batch.apply_async(countdown=countdown))
+
+
+def send_sms_now(messages):
+    """
+    Send SMS right away instead of holding them for the next batch.
+
+    For personalized texts, like order notifications: no other recipient gets
+    the same text, so each is a request of its own and waiting for a batch
+    would only delay it. A delivery is still recorded for each message, with
+    its result. Messages that fail transiently, or that the provider can't
+    take now, are pending and sent by a later flush, like messages left
+    sending by a worker that died.
+
+    Args:
+        messages (list): ``(phone_number, message, order_id)`` tuples.
+
+    Returns:
+        list: The deliveries, each sent, failed or pending.
+    """
+    expiry = claim_expiry(timezone.now())
+    deliveries = SmsDelivery.objects.bulk_create(
+        SmsDelivery(
+            phone_number=phone_number,
+            message=message,
+            order_id=order_id,
+            status="sending",
+            retry_at=expiry,
+        )
+        for phone_number, message, order_id in messages
+    )
+    if deliveries:
+        transaction.on_commit(schedule_recovery)
+    try:
+        send_deliveries(deliveries)
+    except SmsUnavailable:
+        transaction.on_commit(schedule_flush)
+    return deliveries
+
+
+def flush_pending_sms(limit=FLUSH_LIMIT):
+    """
+    Send every pending SMS, grouping recipients of identical texts.
+
+    Deliveries are claimed with ``FOR UPDATE SKIP LOCKED`` and marked as
+    sending before any request is made, so concurrent flushes never send a
+    message twice. The claim lasts ``SMS_SENDING_TIMEOUT`` seconds: deliveries
+    still sending after that were left by a worker that died, and are claimed
+    again.
+
+    Args:
+        limit (int): The most deliveries to claim.
+
+    Returns:
+        dict: Counts of deliveries ``sent``, ``failed`` and ``retried``, and
+        of ``requests`` made.
+
+    Raises:
+        SmsUnavailable: If the provider can't be called now; the deliveries
+            not sent yet are pending again.
+    """
+    # Messages queued from now on need a flush of their own.
+    cache.delete(FLUSH_SCHEDULED_KEY)
+
+    now = timezone.now()
+    due = Q(status="pending") & (Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+    abandoned = Q(status="sending", retry_at__lte=now)
+    expiry = claim_expiry(now)
+    with transaction.atomic():
+        claimed = list(
+            SmsDelivery.objects.select_for_update(skip_locked=True)
+            .filter(due | abandoned)
+            .order_by("id")[:limit]
+        )
+        SmsDelivery.objects.filter(id__in=[delivery.id for delivery in claimed]).update(
+            status="sending", retry_at=expiry
+        )
+    for delivery in claimed:
+        delivery.status, delivery.retry_at = "sending", expiry
+
+    counts = send_deliveries(claimed)
+    if len(claimed) == limit:
+        schedule_flush()
+    if SmsDelivery.objects.filter(status="sending").exists():
+        schedule_recovery()
+    return counts
+
+
+def send_deliveries(deliveries):
+    """
+    Send deliveries marked as sending and record each result.
+
+    Each group of up to ``SMS_BATCH_MAX_RECIPIENTS`` recipients of an identical
+    text is one provider request. Deliveries whose request failed transiently
+    are pending again, and retried with backoff until ``SMS_MAX_ATTEMPTS``
+    requests were made.
+
+    Args:
+        deliveries (list): The deliveries to send.
+
+    Returns:
+        dict: Counts of deliveries ``sent``, ``failed`` and ``retried``, and
+        of ``requests`` made.
+
+    Raises:
+        SmsUnavailable: If the provider can't be called now; the deliveries
+            not sent yet are pending again.
+    """
+    counts = {"sent": 0, "failed": 0, "retried": 0, "requests": 0}
+    deliveries = sorted(deliveries, key=lambda delivery: (delivery.message, delivery.id))
+    try:
+        for message, group in groupby(deliveries, key=lambda delivery: delivery.message):
+            group = list(group)
+            size = settings.SMS_BATCH_MAX_RECIPIENTS
+            for start in range(0, len(group), size):
+                send_batch(message, group[start : start + size], counts)
+    except SmsUnavailable:
+        schedule_retry(deliveries)
+        # Put back what wasn't sent for the retry to pick up.
+        unsent = [delivery for delivery in deliveries if delivery.status == "sending"]
+        SmsDelivery.objects.filter(id__in=[delivery.id for delivery in unsent]).update(
+            status="pending", retry_at=None
+        )
+        for delivery in unsent:
+            delivery.status, delivery.retry_at = "pending", None
+        raise
+
+    schedule_retry(deliveries)
+    return counts
+
+
+def send_batch(message, deliveries, counts):
+    """
+    Send one message to a batch of deliveries and record each result.
+
+    Invalid phone numbers fail on their own, before the request is made, so
+    they can't fail the rest of the batch.
+    """
+    now = timezone.now()
+    valid = []
+    for delivery in deliveries:
+        if is_valid_phone_number(delivery.phone_number):
+            valid.append(delivery)
+        else:
+            delivery.status, delivery.retry_at = "failed", None
+            delivery.error = f"Invalid phone number: {delivery.phone_number}"
+            counts["failed"] += 1
+
+    try:
+        if valid:
+            # A customer with two identical messages pending is only texted once.
+            phone_numbers = list(dict.fromkeys(delivery.phone_number for delivery in valid))
+            result = send_bulk_sms(message, phone_numbers)
+            counts["requests"] += 1
+            for delivery in valid:
+                record_result(delivery, result, now)
+                counts["retried" if delivery.status == "pending" else delivery.status] += 1
+    finally:
+        SmsDelivery.objects.bulk_update(
+            deliveries,
+            [
+                "status",
+                "provider_status",
+                "provider_message_id",
+                "cost",
+                "error",
+                "attempts",
+                "retry_at",
+                "sent_at",
+            ],
+        )
+
+
+def record_result(delivery, result, now):
+    """Record what a send request returned for one of its deliveries."""
+    delivery.attempts += 1
+    # The claim ends with a result; a retry sets its own time.
+    delivery.retry_at = None
+    if result["status"] != "success":
+        record_error(delivery, result["message"], result.get("transient", False), now)
+        return
+
+    recipient = result["recipients"].get(delivery.phone_number)
+    if recipient is None:
+        delivery.status, delivery.error = "failed", "Not in the provider response"
+        return
+    accepted = recipient.get("status") in ACCEPTED_STATUSES
+    delivery.status = "sent" if accepted else "failed"
+    delivery.provider_status = recipient.get("status", "")
+    delivery.provider_message_id = recipient.get("messageId", "")
+    delivery.cost = recipient.get("cost", "")
+    delivery.sent_at = now if accepted else None
+
+
+def record_error(delivery, error, transient, now):
+    """Fail a delivery, or put it back for a later try if the error may pass."""
+    delivery.error = error
+    if transient and delivery.attempts < settings.SMS_MAX_ATTEMPTS:
+        delivery.status = "pending"
+        delivery.retry_at = now + timedelta(seconds=retry_delay(delivery.attempts))
+    else:
+        delivery.status = "failed"
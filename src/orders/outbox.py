@@ -0,0 +1,65 @@
+import logging
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+
+from .models import OutboxMessage
+
+logger = logging.getLogger("customer_orders")
+
+
+def enqueue(task, *args):
+    """
+    Queue a Celery task once the current transaction commits.
+
+    The task is written to the outbox table instead of the broker, so it is
+    only published if the surrounding transaction commits, and a slow or
+    unavailable broker can't delay or fail the request.
+
+    Args:
+        task: The Celery task to run.
+        *args: JSON-serializable positional arguments for the task.
+
+    Returns:
+        OutboxMessage: The queued message.
+    """
+    return OutboxMessage.objects.create(task=task.name, args=list(args))
+
+
+def relay(batch_size=None):
+    """
+    Publish one batch of outbox messages to the broker and delete them.
+
+    Messages are claimed with ``FOR UPDATE SKIP LOCKED``, so several relays can
+    run side by side without publishing a message twice, and are sent over a
+    single broker connection. If the broker fails part way, the messages
+    published so far are deleted and the rest stay queued for the next run.
+
+    Args:
+        batch_size (int): Messages per batch; defaults to ``ORDERS_OUTBOX_BATCH_SIZE``.
+
+    Returns:
+        int: The number of messages published.
+    """
+    batch_size = batch_size or settings.ORDERS_OUTBOX_BATCH_SIZE
+
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).order_by("id")[:batch_size]
+        )
+        if not messages:
+            return 0
+
+        published = []
+        try:
+            with current_app.producer_or_acquire() as producer:
+                for message in messages:
+                    current_app.send_task(message.task, args=message.args, producer=producer)
+                    published.append(message.id)
+        except Exception as e:
+            logger.error("Outbox relay stopped after %d messages: %s", len(published), str(e))
+
+        OutboxMessage.objects.filter(id__in=published).delete()
+
+    return len(published)
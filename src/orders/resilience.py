@@ -0,0 +1,271 @@
+import logging
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+KEY_PREFIX = "sms"
+
+logger = logging.getLogger("customer_orders")
+
+# Longest a sender sleeps for a rate limit token before giving up and
+# rescheduling instead, so a worker slot is never held for long.
+MAX_RATE_LIMIT_WAIT = 1.0
+
+# Refill the bucket for the time since its last use, then take the tokens if
+# there are enough. Returns how many seconds to wait, 0 if they were taken.
+# Redis' clock is used so workers on different hosts agree on the time.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+# Closed: allow. Open: refuse until the reset timeout has passed. Half open:
+# let a single probe through. Returns how many seconds to wait, 0 to go ahead.
+CIRCUIT_ALLOW_SCRIPT = """
+local reset_timeout = tonumber(ARGV[1])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local opened_until = tonumber(redis.call('HGET', KEYS[1], 'opened_until'))
+if not opened_until then
+    return '0'
+end
+if now < opened_until then
+    return tostring(opened_until - now)
+end
+if redis.call('SET', KEYS[2], '1', 'NX', 'EX', math.ceil(reset_timeout)) then
+    return '0'
+end
+return tostring(reset_timeout)
+"""
+
+# Count the failure and open the circuit once there are enough in a row, or
+# straight away if the failure was the half-open probe.
+CIRCUIT_FAILURE_SCRIPT = """
+local threshold = tonumber(ARGV[1])
+local reset_timeout = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local opened_until = redis.call('HGET', KEYS[1], 'opened_until')
+if failures >= threshold or opened_until then
+    redis.call('HSET', KEYS[1], 'opened_until', tostring(now + reset_timeout))
+    redis.call('DEL', KEYS[2])
+end
+return failures
+"""
+
+
+class SmsUnavailable(Exception):
+    """Raised instead of calling the SMS provider when it must not be called now."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@lru_cache(maxsize=None)
+def get_redis(url):
+    """Return a client for the Redis server at ``url``, shared by the process."""
+    return redis.Redis.from_url(url)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter shared through Redis by every worker.
+
+    The bucket holds up to ``capacity`` tokens and refills at ``rate`` tokens a
+    second; each request takes one. The refill and take happen in one Lua
+    script, so concurrent workers can't take the same token. While Redis is
+    unavailable, requests aren't limited.
+    """
+
+    def __init__(self, name, rate, capacity, client):
+        self.key = f"{KEY_PREFIX}:bucket:{name}"
+        self.rate = rate
+        self.capacity = capacity
+        self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.client = client
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens if they are available.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds until they will be.
+        """
+        try:
+            return float(self.script(keys=[self.key], args=[self.rate, self.capacity, tokens]))
+        except redis.RedisError as e:
+            logger.warning("SMS rate limiter unavailable, not limiting: %s", str(e))
+            return 0.0
+
+    def wait(self, max_wait=MAX_RATE_LIMIT_WAIT):
+        """
+        Take a token, sleeping for it if it comes within ``max_wait`` seconds.
+
+        Raises:
+            SmsUnavailable: If the wait would be longer.
+        """
+        waited = 0.0
+        while True:
+            delay = self.acquire()
+            if not delay:
+                return
+            if waited + delay > max_wait:
+                raise SmsUnavailable("SMS rate limit reached", delay)
+            time.sleep(delay)
+            waited += delay
+
+    def reset(self):
+        """Refill the bucket."""
+        self.client.delete(self.key)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared through Redis by every worker.
+
+    After ``failure_threshold`` failed calls in a row the circuit opens and
+    calls fail fast for ``reset_timeout`` seconds. Then a single probe call is
+    let through: success closes the circuit, failure opens it again. While
+    Redis is unavailable, calls are allowed and their results not counted.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout, client):
+        self.key = f"{KEY_PREFIX}:circuit:{name}"
+        self.probe_key = f"{self.key}:probe"
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.allow_script = client.register_script(CIRCUIT_ALLOW_SCRIPT)
+        self.failure_script = client.register_script(CIRCUIT_FAILURE_SCRIPT)
+        self.client = client
+
+    def allow(self):
+        """
+        Check whether a call may go ahead.
+
+        Returns:
+            float: 0 if it may, otherwise the seconds until it should be retried.
+        """
+        try:
+            return float(
+                self.allow_script(keys=[self.key, self.probe_key], args=[self.reset_timeout])
+            )
+        except redis.RedisError as e:
+            logger.warning("SMS circuit breaker unavailable, allowing call: %s", str(e))
+            return 0.0
+
+    def record_success(self):
+        """Close the circuit."""
+        try:
+            self.reset()
+        except redis.RedisError as e:
+            logger.warning("SMS circuit breaker unavailable, success not recorded: %s", str(e))
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit if there have been too many."""
+        try:
+            self.failure_script(
+                keys=[self.key, self.probe_key], args=[self.failure_threshold, self.reset_timeout]
+            )
+        except redis.RedisError as e:
+            logger.warning("SMS circuit breaker unavailable, failure not recorded: %s", str(e))
+
+    def reset(self):
+        """Close the circuit and forget past failures."""
+        self.client.delete(self.key, self.probe_key)
+
+    def state(self):
+        """
+        Describe the circuit.
+
+        Returns:
+            dict: ``state`` (closed, open or half_open), the ``failures`` in a
+            row and, while open, the seconds until it half opens (``retry_in``).
+        """
+        failures, opened_until = self.client.hmget(self.key, "failures", "opened_until")
+        seconds, microseconds = self.client.time()
+        now = seconds + microseconds / 1_000_000
+
+        state, retry_in = "closed", 0.0
+        if opened_until is not None:
+            retry_in = max(0.0, float(opened_until) - now)
+            state = "open" if retry_in else "half_open"
+        return {
+            "state": state,
+            "failures": int(failures or 0),
+            "failure_threshold": self.failure_threshold,
+            "retry_in": round(retry_in, 3),
+        }
+
+
+def sms_rate_limiter():
+    """Return the rate limiter for SMS provider requests, from the settings."""
+    return TokenBucket(
+        "provider",
+        settings.SMS_RATE_LIMIT,
+        settings.SMS_RATE_LIMIT_BURST,
+        get_redis(settings.SMS_REDIS_URL),
+    )
+
+
+def sms_circuit_breaker():
+    """Return the circuit breaker for the SMS provider, from the settings."""
+    return CircuitBreaker(
+        "provider",
+        settings.SMS_CIRCUIT_FAILURE_THRESHOLD,
+        settings.SMS_CIRCUIT_RESET_TIMEOUT,
+        get_redis(settings.SMS_REDIS_URL),
+    )
+
+
+@contextmanager
+def guarded_sms_call():
+    """
+    Guard a call to the SMS provider with the circuit breaker and rate limiter.
+
+    The body of the ``with`` block is the call. An exception raised by it
+    counts as a provider failure, except ``ValueError``, which the client
+    raises for invalid phone numbers before making any request.
+
+    Raises:
+        SmsUnavailable: If the circuit is open or the rate limit reached;
+            the call is not made.
+    """
+    breaker = sms_circuit_breaker()
+    retry_after = breaker.allow()
+    if retry_after:
+        raise SmsUnavailable("SMS provider circuit is open", retry_after)
+    sms_rate_limiter().wait()
+
+    try:
+        yield
+    except ValueError:
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
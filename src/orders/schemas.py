@@ -93,14 +93,14 @@ list_orders_schema = {
             data=[
                 {
                     "id": 1,
-                    "order_number": "ORD-AB12CD",
+                    "order_number": "ORD-00015GG",
                     "total_amount": "42.99",
                     "shipping_address": "123 Nairobi, Kenya",
                     "created_at": "2025-06-01T10:30:00Z",
                 },
                 {
                     "id": 2,
-                    "order_number": "ORD-EF34GH",
+                    "order_number": "ORD-00015HH",
                     "total_amount": "29.45",
                     "shipping_address": "456 kasarani, Kenya",
                     "created_at": "2025-06-03T14:15:00Z",
@@ -123,7 +123,7 @@ retrieve_order_schema = {
             "Order Details Success",
             data={
                 "id": 1,
-                "order_number": "ORD-AB12CD",
+                "order_number": "ORD-00015GG",
                 "total_amount": "42.99",
                 "shipping_address": "123 Westlands, Nairobi, Kenya",
                 "created_at": "2025-06-01T10:30:00Z",
@@ -148,7 +148,7 @@ create_order_schema = {
             "Order Created Success",
             data={
                 "id": 3,
-                "order_number": "ORD-IJ56KL",
+                "order_number": "ORD-00015JJ",
                 "total_amount": "55.97",
                 "shipping_address": "789 Moi Avenue, Nairobi, Kenya",
                 "created_at": "2025-06-04T09:45:00Z",
@@ -185,3 +185,72 @@ create_order_schema = {
         ),
     ],
 }
+
+
+# Schema for the SMS delivery status
+sms_status_schema = {
+    "summary": "SMS Delivery Status",
+    "description": """
+    Show how order notifications are being delivered (staff only).
+
+    `circuit` is the circuit breaker shared by all workers: `closed` while the
+    SMS provider is healthy, `open` after repeated failures (nothing is sent
+    for `retry_in` seconds) and `half_open` while a single request tests the
+    provider again. `rate_limit` is the configured request rate and burst, and
+    `deliveries` counts the queued and sent messages by status.
+    """,
+    "responses": {
+        status.HTTP_200_OK: {
+            "schema": {
+                "type": "object",
+                "example": {
+                    "circuit": {
+                        "state": "open",
+                        "failures": 5,
+                        "failure_threshold": 5,
+                        "retry_in": 12.5,
+                    },
+                    "rate_limit": {"rate": 10.0, "burst": 20},
+                    "deliveries": {"pending": 42, "sending": 0, "sent": 1200, "failed": 3},
+                },
+            },
+        },
+        **get_standard_responses(include=[401, 403]),
+    },
+}
+
+
+# Schema for moving many orders to a new status
+bulk_order_status_schema = {
+    "summary": "Bulk Update Order Status",
+    "description": """
+    Move many orders to a new status in one request (staff only), e.g. every
+    order in a dispatched delivery run to `shipped`.
+
+    The orders are updated with a single statement and each customer whose
+    order actually changed gets the usual status SMS. The response lists the
+    orders that changed, those already in the status and the IDs that match
+    no order.
+    """,
+    "responses": {
+        status.HTTP_200_OK: {
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "updated": {"type": "array", "items": {"type": "integer"}, "example": [12, 13]},
+                    "unchanged": {"type": "array", "items": {"type": "integer"}, "example": [14]},
+                    "unknown_ids": {"type": "array", "items": {"type": "integer"}, "example": []},
+                },
+            },
+        },
+        **get_standard_responses(include=[400, 401, 403]),
+    },
+    "examples": [
+        OpenApiExample(
+            "Ship Orders",
+            summary="Mark orders as shipped",
+            value={"order_ids": [12, 13, 14], "status": "shipped"},
+            request_only=True,
+        ),
+    ],
+}
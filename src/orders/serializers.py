@@ -1,28 +1,102 @@
-import uuid
-
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework import serializers
 
+from core.eager_loading import EagerLoadingMixin
 from products.models import Product
+from products.services import decrement_stock
 
 from .models import Order, OrderItem
+from .notifications import order_payload
+from .numbers import next_order_number
+from .outbox import enqueue
 from .tasks import send_order_confirmation_sms
 
 
+class ProductPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Product primary key field that can resolve IDs from a preloaded batch.
+
+    ``OrderItemListSerializer`` loads the products of all items with one query
+    and hands them over in ``batch``; on its own the field queries as usual.
+    Both paths fail with the same error messages.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batch = None
+
+    def to_internal_value(self, data):
+        if self.batch is None:
+            return super().to_internal_value(data)
+
+        try:
+            if isinstance(data, bool):
+                raise DjangoValidationError("")
+            pk = Product._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in self.batch:
+            self.fail("does_not_exist", pk_value=data)
+        return self.batch[pk]
+
+
+class OrderItemListSerializer(serializers.ListSerializer):
+    """
+    Validates the items of an order with a single product query.
+
+    Lines for the same product are merged into one, adding up their quantities,
+    so the stock check sees the total ordered.
+    """
+
+    def to_internal_value(self, data):
+        field = self.child.fields["product_id"]
+        field.batch = Product.objects.in_bulk(self.product_ids(data))
+        try:
+            items = super().to_internal_value(data)
+        finally:
+            field.batch = None
+
+        merged = {}
+        for item in items:
+            product = item["product"]
+            if product.pk in merged:
+                merged[product.pk]["quantity"] += item["quantity"]
+            else:
+                merged[product.pk] = item
+        return list(merged.values())
+
+    def product_ids(self, data):
+        """Return the valid product IDs mentioned in the raw items."""
+        ids = set()
+        if not isinstance(data, list):
+            return ids
+        for item in data:
+            if not isinstance(item, dict) or isinstance(item.get("product_id"), bool):
+                continue
+            try:
+                ids.add(Product._meta.pk.to_python(item.get("product_id")))
+            except DjangoValidationError:
+                continue
+        ids.discard(None)
+        return ids
+
+
 class OrderItemCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating order items.
     """
 
-    product_id = serializers.PrimaryKeyRelatedField(
-        queryset=Product.objects.all(), source="product"
-    )
+    product_id = ProductPrimaryKeyField(queryset=Product.objects.all(), source="product")
 
     class Meta:
         model = OrderItem
         fields = ["product_id", "quantity"]
+        extra_kwargs = {"quantity": {"min_value": 1}}
+        list_serializer_class = OrderItemListSerializer
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Serializer for viewing orders.
     """
@@ -54,44 +128,82 @@ class OrderCreateSerializer(serializers.Serializer):
         if not value:
             raise serializers.ValidationError("An order must contain at least one item.")
 
+        # An early, friendly check; create() enforces stock atomically.
         for item in value:
             product = item["product"]
             quantity = item["quantity"]
 
             if product.stock < quantity:
-                raise serializers.ValidationError(
-                    f"Not enough stock for {product.name}. Available: {product.stock}"
-                )
+                raise serializers.ValidationError(self.stock_error(product.name, product.stock))
 
         return value
 
+    def stock_error(self, name, available):
+        return f"Not enough stock for {name}. Available: {available}"
+
     def create(self, validated_data):
+        """
+        Place the order and take its items out of stock in one transaction.
+
+        Stock is decremented with one conditional statement for all items, so
+        concurrent orders can't oversell a product; if any item is short, the
+        whole order is rolled back and a validation error raised. The number of
+        statements doesn't depend on the number of items, and the confirmation
+        SMS goes through the outbox, so it is only sent once the order commits.
+        """
         items_data = validated_data.pop("items")
         user = self.context["request"].user
 
-        order_number = f"ORD-{uuid.uuid4().hex[:6].upper()}"
+        # Items are unique per product, see OrderItemListSerializer.
+        quantities = {item_data["product"].pk: item_data["quantity"] for item_data in items_data}
 
-        total_amount = sum(
-            item_data["product"].price * item_data["quantity"] for item_data in items_data
-        )
+        with transaction.atomic():
+            prices = decrement_stock(quantities)
+            if len(prices) < len(quantities):
+                raise serializers.ValidationError({"items": self.shortages(items_data, prices)})
 
-        order = Order.objects.create(
-            user=user,
-            order_number=order_number,
-            total_amount=total_amount,
-            shipping_address=validated_data["shipping_address"],
-        )
+            total_amount = sum(
+                prices[item_data["product"].pk] * item_data["quantity"] for item_data in items_data
+            )
 
-        for item_data in items_data:
-            product = item_data["product"]
-            quantity = item_data["quantity"]
+            order = Order.objects.create(
+                user=user,
+                order_number=next_order_number(),
+                total_amount=total_amount,
+                shipping_address=validated_data["shipping_address"],
+            )
 
-            OrderItem.objects.create(
-                order=order, product=product, quantity=quantity, price=product.price
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order=order,
+                    product=item_data["product"],
+                    quantity=item_data["quantity"],
+                    price=prices[item_data["product"].pk],
+                )
+                for item_data in items_data
             )
-            product.stock -= quantity
-            product.save()
 
-        send_order_confirmation_sms.delay(order.id)
+            enqueue(send_order_confirmation_sms, order_payload(order, user))
 
         return order
+
+    def shortages(self, items_data, prices):
+        """Return an error per product that ran out of stock, with what is left now."""
+        names = {item_data["product"].pk: item_data["product"].name for item_data in items_data}
+        short = [product_id for product_id in names if product_id not in prices]
+        available = dict(Product.objects.filter(pk__in=short).values_list("pk", "stock"))
+        return [
+            self.stock_error(names[product_id], available.get(product_id, 0))
+            for product_id in short
+        ]
+
+
+class BulkOrderStatusSerializer(serializers.Serializer):
+    """
+    Serializer for moving many orders to a new status at once.
+    """
+
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
@@ -1,33 +1,79 @@
 import logging
 
-import africastalking
-from django.conf import settings
+from .resilience import SmsUnavailable, guarded_sms_call
+from .sms import get_sms_backend, is_transient
 
-username = settings.AFRICAS_TALKING_USERNAME
-api_key = settings.AFRICAS_TALKING_API_KEY
-africastalking.initialize(username, api_key)
+logger = logging.getLogger("customer_orders")
 
-sms_service = africastalking.SMS
 
-logger = logging.getLogger("customer_orders")
+class SmsService:
+    """
+    Stand-in for the SMS backend of the current process.
+
+    Every attribute is looked up on :func:`get_sms_backend` when used, so the
+    backend is only built once SMS are sent, and a forked worker gets its own
+    instead of the one its parent may have built.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_sms_backend(), name)
+
+
+sms_service = SmsService()
 
 
 def send_sms(phone_number, message):
     """
-    Sends an SMS using Africa's Talking API.
+    Sends an SMS through the configured SMS backend.
 
     Args:
         phone_number (str): The recipient's phone number.
         message (str): The message content to be sent.
 
     Returns:
-        dict: A dictionary containing the status and response from Africa's Talking.
+        dict: A dictionary containing the status and response from the SMS provider.
     """
     try:
-        response = sms_service.send(message, [phone_number])
+        with guarded_sms_call():
+            response = sms_service.send(message, [phone_number])
         logger.info("SMS sent successfully to %s: %s", phone_number, message)
         return {"status": "success", "response": response}
 
     except Exception as e:
         logger.error("Failed to send SMS to %s: %s", phone_number, str(e))
         return {"status": "error", "message": str(e)}
+
+
+def send_bulk_sms(message, phone_numbers):
+    """
+    Sends one message to several recipients in a single SMS backend request.
+
+    Args:
+        message (str): The message content to be sent.
+        phone_numbers (list): The recipients' phone numbers.
+
+    Returns:
+        dict: The status and, on success, the result reported for each recipient
+        keyed by phone number. On error, whether it is ``transient`` and the
+        batch worth retrying.
+
+    Raises:
+        SmsUnavailable: If the provider's circuit is open or the rate limit
+            reached; nothing was sent and the batch should be retried later.
+    """
+    try:
+        with guarded_sms_call():
+            response = sms_service.send(message, phone_numbers)
+        recipients = response["SMSMessageData"]["Recipients"]
+        logger.info("SMS sent to %d recipients: %s", len(phone_numbers), message)
+        return {
+            "status": "success",
+            "recipients": {recipient["number"]: recipient for recipient in recipients},
+        }
+
+    except SmsUnavailable:
+        raise
+
+    except Exception as e:
+        logger.error("Failed to send SMS to %d recipients: %s", len(phone_numbers), str(e))
+        return {"status": "error", "message": str(e), "transient": is_transient(e)}
@@ -2,13 +2,15 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from .models import Order
+from .notifications import order_payload
+from .outbox import enqueue
 from .tasks import send_order_status_update_sms
 
 
 @receiver(post_save, sender=Order)
 def order_status_change_handler(sender, instance, created, **kwargs):
     """
-    Signal handler to track order status changes and send SMS notifications.
+    Signal handler to track order status changes and queue SMS notifications.
 
     Args:
         sender: The model class (Order)
@@ -18,4 +20,4 @@ def order_status_change_handler(sender, instance, created, **kwargs):
     """
     if not created and hasattr(instance, "_original_status"):
         if instance._original_status != instance.status:
-            send_order_status_update_sms.delay(instance.id, instance.status)
+            enqueue(send_order_status_update_sms, order_payload(instance, instance.user))
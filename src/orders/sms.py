@@ -0,0 +1,167 @@
+import itertools
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+PRODUCTION_URL = "https://api.africastalking.com/version1/messaging"
+SANDBOX_URL = "https://api.sandbox.africastalking.com/version1/messaging"
+
+# Connections kept alive to the provider per process; one per worker thread
+# is enough.
+POOL_SIZE = 10
+
+PHONE_NUMBER = re.compile(r"^\+\d{1,3}\d{3,}$")
+
+# Responses that may succeed when the request is repeated later.
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_valid_phone_number(phone_number):
+    """Check that a phone number is international, like the provider requires."""
+    return bool(PHONE_NUMBER.match(phone_number))
+
+
+def validate_recipients(recipients):
+    """
+    Check that every recipient is an international phone number.
+
+    Raises:
+        ValueError: For the first invalid number.
+    """
+    for phone_number in recipients:
+        if not is_valid_phone_number(phone_number):
+            raise ValueError(f"Invalid phone number: {phone_number}")
+
+
+def is_transient(exc):
+    """
+    Check whether a failed send may succeed if retried.
+
+    Timeouts, connection errors and responses the provider gives while
+    overloaded or unavailable are transient; anything else, like a rejected
+    API key, will fail again.
+    """
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(exc, "response", None)
+    return (
+        isinstance(exc, requests.HTTPError)
+        and response is not None
+        and response.status_code in TRANSIENT_STATUS_CODES
+    )
+
+
+class AfricasTalkingBackend:
+    """
+    Send SMS through the Africa's Talking messaging API.
+
+    Requests share one session, so connections to the provider are kept alive
+    and reused, and each request has a connect and a read timeout instead of
+    blocking a worker for as long as the provider takes.
+    """
+
+    def __init__(self):
+        self.username = settings.AFRICAS_TALKING_USERNAME
+        # Like the Africa's Talking SDK, the sandbox is used for its own username.
+        self.url = SANDBOX_URL if self.username == "sandbox" else PRODUCTION_URL
+        self.sender_id = settings.AFRICAS_TALKING_SENDER_ID
+        self.timeout = (settings.SMS_CONNECT_TIMEOUT, settings.SMS_READ_TIMEOUT)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {"Accept": "application/json", "apiKey": settings.AFRICAS_TALKING_API_KEY}
+        )
+
+    def send(self, message, recipients):
+        """
+        Send one message to one or more recipients in a single request.
+
+        Args:
+            message (str): The message content to be sent.
+            recipients (list): The recipients' phone numbers.
+
+        Returns:
+            dict: The provider's response, with a result per recipient under
+            ``SMSMessageData.Recipients``.
+
+        Raises:
+            ValueError: If a phone number is invalid; no request is made.
+            requests.RequestException: If the request fails or times out.
+        """
+        validate_recipients(recipients)
+        data = {
+            "username": self.username,
+            "to": ",".join(recipients),
+            "message": message,
+            "bulkSMSMode": 1,
+        }
+        if self.sender_id:
+            data["from"] = self.sender_id
+
+        response = self.session.post(self.url, data=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class FakeSmsBackend:
+    """
+    Accept every message without sending it, for tests and load runs.
+
+    Sent messages are kept in ``sent`` as ``(message, recipients)`` pairs, and
+    ``SMS_FAKE_LATENCY`` seconds are slept per request to stand in for the
+    provider's response time.
+    """
+
+    def __init__(self):
+        self.latency = settings.SMS_FAKE_LATENCY
+        self.sent = []
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def send(self, message, recipients):
+        """Record the message and report every recipient as sent."""
+        validate_recipients(recipients)
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.sent.append((message, list(recipients)))
+            ids = [next(self.ids) for _ in recipients]
+        return {
+            "SMSMessageData": {
+                "Message": f"Sent to {len(recipients)}/{len(recipients)}",
+                "Recipients": [
+                    {
+                        "number": number,
+                        "status": "Success",
+                        "statusCode": 101,
+                        "messageId": f"fake-{message_id}",
+                        "cost": "KES 0.0000",
+                    }
+                    for number, message_id in zip(recipients, ids)
+                ],
+            }
+        }
+
+
+@lru_cache(maxsize=None)
+def _backend(path, pid):
+    return import_string(path)()
+
+
+def get_sms_backend():
+    """
+    Return the ``SMS_BACKEND`` for this process, creating it on first use.
+
+    Processes that never send SMS, like web workers, never build a client. A
+    forked worker gets its own, so connections are never shared across processes.
+    """
+    return _backend(settings.SMS_BACKEND, os.getpid())
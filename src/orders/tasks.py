@@ -1,69 +1,171 @@
 from celery import shared_task
+from django.conf import settings
 
+from .coalescing import claim, register
 from .models import Order
-from .services import send_sms
+from .notifications import (
+    flush_pending_sms,
+    order_payload,
+    postpone_flush,
+    queue_sms_many,
+    render_message,
+    render_shared_message,
+    retry_delay,
+    send_sms_now,
+)
+from .resilience import SmsUnavailable
+
+
+def load_payload(order_id):
+    """
+    Build the payload for an order from the database.
+
+    Only needed for tasks queued with just an order ID, before payloads were
+    rendered at enqueue time.
+    """
+    order = Order.objects.select_related("user").get(id=order_id)
+    return order_payload(order, order.user)
 
 
-@shared_task
-def send_order_confirmation_sms(order_id):
+def hold(task, payloads, args):
     """
-    Celery task to send SMS notification for a new order.
+    Start the coalescing window for order status notifications.
 
-    Args:
-        order_id (int): The ID of the newly created order
+    Records the payloads as the latest of their orders and reschedules
+    ``task`` with ``args`` for the end of the window.
+
+    Returns:
+        bool: Whether the task was rescheduled. It isn't with coalescing
+        turned off, for payloads queued before they had a version or when
+        Redis is unavailable; the notifications are then sent right away.
     """
-    try:
-        order = Order.objects.get(id=order_id)
-        name = order.user.first_name or "Customer"
-        num = order.order_number
+    window = settings.SMS_COALESCE_WINDOW
+    if not window or any("version" not in payload for payload in payloads):
+        return False
+    if not register(payloads):
+        return False
+    task.apply_async(args=[args], kwargs={"coalesced": True}, countdown=window)
+    return True
+
+
+def send_order_message(event, payload):
+    """Send the message announcing ``event`` to the customer of the payload."""
+    if not payload["phone"]:
+        return {"status": "error", "message": "No phone number available for customer"}
 
-        message = f"Hi {name}, order #{num} confirmed. Thanks!"
+    message = render_message(event, payload)
+    (delivery,) = send_sms_now([(payload["phone"], message, payload["order_id"])])
+    return {"status": delivery.status, "delivery_id": delivery.id}
 
-        phone_number = order.user.phone
-        if phone_number:
-            return send_sms(phone_number, message)
 
-        return {"status": "error", "message": "No phone number available for customer"}
+@shared_task
+def send_order_confirmation_sms(order):
+    """
+    Celery task to send the SMS notification for a new order.
+
+    Args:
+        order (dict or int): The order's notification payload, or its ID for
+            tasks queued before payloads were used
+    """
+    try:
+        payload = order if isinstance(order, dict) else load_payload(order)
+        return send_order_message("confirmed", payload)
 
     except Order.DoesNotExist:
-        return {"status": "error", "message": f"Order {order_id} not found"}
+        return {"status": "error", "message": f"Order {order} not found"}
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
 @shared_task
-def send_order_status_update_sms(order_id, status):
+def send_order_status_update_sms(order, status=None, coalesced=False):
     """
-    Celery task to send SMS notification when order status changes.
+    Celery task to send the SMS notification when order status changes.
+
+    Status changes of an order within ``SMS_COALESCE_WINDOW`` seconds are
+    coalesced: the task records its payload as the order's latest and
+    reschedules itself for the end of the window, where only the latest
+    status is sent, once, and superseded or duplicate tasks are dropped
+    before any other work.
+    Tasks queued with just an ID are sent straight away.
 
     Args:
-        order_id (int): The ID of the order
-        status (str): The new status of the order
+        order (dict or int): The order's notification payload, or its ID for
+            tasks queued before payloads were used
+        status (str): The new status of the order; only passed with an ID
+        coalesced (bool): Whether this is the run at the end of the window
     """
     try:
-        order = Order.objects.get(id=order_id)
+        payload = order if isinstance(order, dict) else {**load_payload(order), "status": status}
+        if (
+            isinstance(order, dict)
+            and not coalesced
+            and hold(send_order_status_update_sms, [payload], payload)
+        ):
+            return {"status": "held"}
+        if coalesced and not claim([payload]):
+            return {"status": "dropped", "message": "Superseded or already sent"}
+        return send_order_message(payload["status"], payload)
 
-        name = order.user.first_name or "Customer"
-        num = order.order_number
+    except Order.DoesNotExist:
+        return {"status": "error", "message": f"Order {order} not found"}
 
-        msgs = {
-            "processing": f"Hi {name}, order #{num} processing.",
-            "shipped": f"Hi {name}, order #{num} shipped!",
-            "delivered": f"Hi {name}, order #{num} delivered!",
-            "cancelled": f"Hi {name}, order #{num} cancelled.",
-        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
-        message = msgs.get(status, f"Hi {name}, order #{num}: {status}.")
 
-        phone_number = order.user.phone
-        if phone_number:
-            return send_sms(phone_number, message)
+@shared_task
+def send_order_status_update_sms_many(payloads, coalesced=False):
+    """
+    Celery task to send the status update SMS for many orders at once.
 
-        return {"status": "error", "message": "No phone number available for customer"}
+    Coalesced with other status changes of the same orders, like
+    :func:`send_order_status_update_sms`. Every customer gets the same text
+    for a status, so the messages are queued for the next batch, where they
+    share one provider request per ``SMS_BATCH_MAX_RECIPIENTS`` customers.
 
-    except Order.DoesNotExist:
-        return {"status": "error", "message": f"Order {order_id} not found"}
+    Args:
+        payloads (list): Notification payloads, each with the order's new status
+        coalesced (bool): Whether this is the run at the end of the window
 
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+    Returns:
+        dict: How many messages were queued, how many customers had no phone
+        number and how many messages a newer status superseded.
+    """
+    if not coalesced and hold(send_order_status_update_sms_many, payloads, payloads):
+        return {"status": "held", "held": len(payloads)}
+    current = claim(payloads) if coalesced else payloads
+
+    messages = [
+        (payload["phone"], render_shared_message(payload["status"]), payload["order_id"])
+        for payload in current
+        if payload["phone"]
+    ]
+    queue_sms_many(messages)
+    return {
+        "status": "queued",
+        "queued": len(messages),
+        "skipped": len(current) - len(messages),
+        "dropped": len(payloads) - len(current),
+    }
+
+
+@shared_task(bind=True, max_retries=None)
+def flush_sms_batch(self):
+    """
+    Celery task to send the SMS notifications queued during the last window.
+
+    While the provider's circuit is open or the rate limit reached, the task
+    is retried with exponential backoff, and messages queued meanwhile wait
+    for the retry instead of scheduling flushes of their own.
+
+    Returns:
+        dict: Counts of messages sent and failed, and of provider requests made.
+    """
+    try:
+        return flush_pending_sms()
+    except SmsUnavailable as exc:
+        countdown = max(exc.retry_after, retry_delay(self.request.retries))
+        postpone_flush(countdown)
+        raise self.retry(exc=exc, countdown=countdown)
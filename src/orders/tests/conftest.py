@@ -4,7 +4,9 @@ import pytest
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 
-from orders.models import Order, OrderItem
+from orders.coalescing import version_of
+from orders.models import Order, OrderItem, OutboxMessage
+from orders.resilience import sms_circuit_breaker, sms_rate_limiter
 from products.models import Category, Product
 
 User = get_user_model()
@@ -138,3 +140,41 @@ def orders(user, products):
     orders.append(order2)
 
     return orders
+
+
+@pytest.fixture
+def sms_limits():
+    """Start from a closed SMS circuit and a full rate limit bucket."""
+    breaker, limiter = sms_circuit_breaker(), sms_rate_limiter()
+    breaker.reset()
+    limiter.reset()
+    yield breaker, limiter
+    breaker.reset()
+    limiter.reset()
+
+
+@pytest.fixture
+def expected_payload():
+    """Return a function building the notification payload expected for an order in a status."""
+
+    def build(order, status):
+        return {
+            "order_id": order.id,
+            "order_number": order.order_number,
+            "status": status,
+            "name": order.user.first_name,
+            "phone": order.user.phone,
+            "version": version_of(order.updated_at),
+        }
+
+    return build
+
+
+@pytest.fixture
+def queued_tasks(db):
+    """Return a function listing the tasks waiting in the outbox as (name, args) pairs."""
+
+    def queued():
+        return list(OutboxMessage.objects.values_list("task", "args"))
+
+    return queued
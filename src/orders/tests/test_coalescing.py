@@ -0,0 +1,180 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+
+from orders.coalescing import _key, claim, register
+from orders.models import SmsDelivery
+from orders.resilience import get_redis
+from orders.tasks import send_order_status_update_sms, send_order_status_update_sms_many
+
+ORDER_IDS = [900001, 900002]
+
+
+def payload(order_id, status, version):
+    """Return a status notification payload for an order."""
+    return {
+        "order_id": order_id,
+        "order_number": f"ORD-{order_id}",
+        "status": status,
+        "name": "Test",
+        "phone": "+254722000000",
+        "version": version,
+    }
+
+
+@pytest.fixture(autouse=True)
+def versions(settings):
+    """Forget the notification versions of the test orders."""
+    client = get_redis(settings.SMS_REDIS_URL)
+    keys = [key for order_id in ORDER_IDS for key in (_key(order_id), f"{_key(order_id)}:sent")]
+    client.delete(*keys)
+    yield
+    client.delete(*keys)
+
+
+@pytest.fixture
+def redis_down():
+    """Make every Redis command fail."""
+    client = MagicMock()
+    client.mget.side_effect = redis.ConnectionError("down")
+    client.register_script.return_value.side_effect = redis.ConnectionError("down")
+    with patch("orders.coalescing.get_redis", return_value=client):
+        yield
+
+
+class TestRegisterAndLatest:
+    """Test cases for tracking the latest notification of each order."""
+
+    def test_newer_version_supersedes(self):
+        """Test that only the newest registered payload is still the latest."""
+        old, new = payload(900001, "processing", 1), payload(900001, "shipped", 2)
+
+        assert register([old]) and register([new])
+
+        assert claim([old, new]) == [new]
+
+    def test_order_of_registration_does_not_matter(self):
+        """Test that an older payload registered last doesn't take over."""
+        old, new = payload(900001, "processing", 1), payload(900001, "shipped", 2)
+
+        register([new])
+        register([old])
+
+        assert claim([old]) == []
+        assert claim([new]) == [new]
+
+    def test_orders_are_independent(self):
+        """Test that versions are kept per order."""
+        first, second = payload(900001, "shipped", 5), payload(900002, "shipped", 1)
+
+        register([first, second])
+
+        assert claim([first, second]) == [first, second]
+
+    def test_each_version_claimed_once(self):
+        """Test that a duplicate of a claimed payload is dropped, but a newer one isn't."""
+        update = payload(900001, "shipped", 1)
+        register([update])
+
+        assert claim([update]) == [update]
+        assert claim([update]) == []
+        assert claim([payload(900001, "delivered", 2)]) == [payload(900001, "delivered", 2)]
+
+    def test_unregistered_payload_is_latest(self):
+        """Test that a payload is sent if its version has expired or was never stored."""
+        assert claim([payload(900001, "shipped", 1)]) == [payload(900001, "shipped", 1)]
+
+    def test_fails_open_without_redis(self, redis_down):
+        """Test that nothing is held or dropped when Redis is unavailable."""
+        payloads = [payload(900001, "shipped", 1)]
+
+        assert register(payloads) is False
+        assert claim(payloads) == payloads
+
+
+class TestCoalescedStatusTasks:
+    """Test cases for coalescing the order status notification tasks."""
+
+    @patch("orders.tasks.send_order_status_update_sms.apply_async")
+    def test_holds_until_end_of_window(self, apply_async, settings):
+        """Test that a new status is held and the task rescheduled for the window's end."""
+        settings.SMS_COALESCE_WINDOW = 10
+        update = payload(900001, "shipped", 1)
+
+        result = send_order_status_update_sms(update)
+
+        assert result == {"status": "held"}
+        apply_async.assert_called_once_with(args=[update], kwargs={"coalesced": True}, countdown=10)
+
+    @patch("orders.tasks.send_sms_now")
+    def test_superseded_status_dropped_without_queries(
+        self, mock_send, db, django_assert_num_queries
+    ):
+        """Test that only the latest status is sent and earlier ones do no work."""
+        mock_send.return_value = [SmsDelivery(id=7, status="sent")]
+        old, new = payload(900001, "processing", 1), payload(900001, "shipped", 2)
+        register([old])
+        register([new])
+
+        with django_assert_num_queries(0):
+            dropped = send_order_status_update_sms(old, coalesced=True)
+        sent = send_order_status_update_sms(new, coalesced=True)
+
+        assert dropped["status"] == "dropped"
+        assert sent == {"status": "sent", "delivery_id": 7}
+        mock_send.assert_called_once()
+        assert mock_send.call_args[0][0][0][1].endswith("shipped!")
+
+    @patch("orders.tasks.send_sms_now")
+    @patch("orders.tasks.send_order_status_update_sms.apply_async")
+    def test_duplicate_tasks_send_once(self, apply_async, mock_send, db):
+        """Test that two copies of a task, e.g. published twice, send one SMS."""
+        mock_send.return_value = [SmsDelivery(id=7, status="sent")]
+        update = payload(900001, "shipped", 1)
+
+        send_order_status_update_sms(update)
+        send_order_status_update_sms(update)
+        results = [send_order_status_update_sms(update, coalesced=True) for _ in range(2)]
+
+        assert apply_async.call_count == 2
+        assert [result["status"] for result in results] == ["sent", "dropped"]
+        mock_send.assert_called_once()
+
+    @patch("orders.tasks.send_sms_now")
+    def test_sent_at_once_without_window(self, mock_send, settings):
+        """Test that coalescing can be turned off."""
+        settings.SMS_COALESCE_WINDOW = 0
+        mock_send.return_value = [SmsDelivery(id=7, status="sent")]
+
+        result = send_order_status_update_sms(payload(900001, "shipped", 1))
+
+        assert result == {"status": "sent", "delivery_id": 7}
+
+    @patch("orders.tasks.send_sms_now")
+    def test_sent_at_once_without_redis(self, mock_send, redis_down):
+        """Test that notifications aren't held when Redis is unavailable."""
+        mock_send.return_value = [SmsDelivery(id=7, status="sent")]
+
+        result = send_order_status_update_sms(payload(900001, "shipped", 1))
+
+        assert result == {"status": "sent", "delivery_id": 7}
+
+    @patch("orders.tasks.queue_sms_many")
+    @patch("orders.tasks.send_sms_now")
+    @patch("orders.tasks.send_order_status_update_sms.apply_async")
+    @patch("orders.tasks.send_order_status_update_sms_many.apply_async")
+    def test_many_holds_then_sends_latest(self, apply_async, _, mock_send, mock_queue):
+        """Test that the bulk task drops the orders a later change superseded."""
+        first, second = payload(900001, "processing", 1), payload(900002, "processing", 1)
+        mock_send.return_value = [SmsDelivery(id=7, status="sent")]
+
+        assert send_order_status_update_sms_many([first, second])["status"] == "held"
+        send_order_status_update_sms(payload(900001, "shipped", 2))
+        result = send_order_status_update_sms_many([first, second], coalesced=True)
+
+        apply_async.assert_called_once()
+        assert result == {"status": "queued", "queued": 1, "skipped": 0, "dropped": 1}
+        mock_queue.assert_called_once_with(
+            [("+254722000000", "Your order is being processed.", 900002)]
+        )
@@ -1,5 +1,4 @@
 import json
-from unittest.mock import patch
 
 import pytest
 from django.urls import reverse
@@ -7,13 +6,16 @@ from rest_framework import status
 
 from orders.models import Order
 
+STATUS_TASK = "orders.tasks.send_order_status_update_sms"
+
 
 @pytest.mark.django_db
 class TestOrderingProcess:
     """Integration tests for the entire ordering process."""
 
-    @patch("orders.serializers.send_order_confirmation_sms")
-    def test_complete_order_process(self, mock_sms_task, authenticated_client, products, user):
+    def test_complete_order_process(
+        self, authenticated_client, products, user, queued_tasks, expected_payload
+    ):
         """Test the complete order process from creation to confirmation."""
         initial_stocks = {p.id: p.stock for p in products}
 
@@ -57,7 +59,9 @@ class TestOrderingProcess:
         assert products[0].stock == initial_stocks[products[0].id] - 2
         assert products[1].stock == initial_stocks[products[1].id] - 3
 
-        mock_sms_task.delay.assert_called_once_with(order.id)
+        assert queued_tasks() == [
+            ("orders.tasks.send_order_confirmation_sms", [expected_payload(order, "pending")])
+        ]
 
         detail_url = reverse("order-detail", args=[order.id])
         detail_response = authenticated_client.get(detail_url)
@@ -71,30 +75,26 @@ class TestOrderingProcess:
         order_ids = [order["id"] for order in list_response.data]
         assert order.id in order_ids
 
-    @patch("orders.signals.send_order_status_update_sms")
-    def test_order_status_update_flow(self, mock_status_task, db, order):
+    def test_order_status_update_flow(self, db, order, queued_tasks, expected_payload):
         """Test the order status update flow from pending to delivered."""
         assert order.status == "pending"
 
         order.status = "processing"
         order.save()
 
-        mock_status_task.delay.assert_called_once_with(order.id, "processing")
-        mock_status_task.delay.reset_mock()
+        assert queued_tasks()[-1] == (STATUS_TASK, [expected_payload(order, "processing")])
 
         order.status = "shipped"
         order.save()
 
-        mock_status_task.delay.assert_called_once_with(order.id, "shipped")
-        mock_status_task.delay.reset_mock()
+        assert queued_tasks()[-1] == (STATUS_TASK, [expected_payload(order, "shipped")])
 
         order.status = "delivered"
         order.save()
 
-        mock_status_task.delay.assert_called_once_with(order.id, "delivered")
+        assert queued_tasks()[-1] == (STATUS_TASK, [expected_payload(order, "delivered")])
 
-    @patch("orders.serializers.send_order_confirmation_sms")
-    def test_insufficient_stock_handling(self, mock_sms_task, authenticated_client, products):
+    def test_insufficient_stock_handling(self, authenticated_client, products, queued_tasks):
         """Test that the system properly handles orders with insufficient stock."""
         products[0].stock = 1
         products[0].save()
@@ -117,4 +117,4 @@ class TestOrderingProcess:
         products[0].refresh_from_db()
         assert products[0].stock == 1
 
-        mock_sms_task.delay.assert_not_called()
+        assert queued_tasks() == []
@@ -0,0 +1,334 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+import requests
+from django.core.cache import cache
+from django.utils import timezone
+
+from orders.models import SmsDelivery
+from orders.notifications import (
+    FLUSH_SCHEDULED_KEY,
+    RECOVERY_SCHEDULED_KEY,
+    flush_pending_sms,
+    queue_sms,
+    queue_sms_many,
+    send_sms_now,
+)
+from orders.resilience import SmsUnavailable
+from orders.services import send_bulk_sms
+
+
+def accepted(*phone_numbers):
+    """Return a successful bulk send result for the given recipients."""
+    return {
+        "status": "success",
+        "recipients": {
+            number: {
+                "number": number,
+                "status": "Success",
+                "statusCode": 101,
+                "messageId": f"ATXid_{number}",
+                "cost": "KES 0.8000",
+            }
+            for number in phone_numbers
+        },
+    }
+
+
+@pytest.fixture
+def flush_task():
+    """Replace the flush task so nothing is sent to the broker."""
+    cache.delete_many([FLUSH_SCHEDULED_KEY, RECOVERY_SCHEDULED_KEY])
+    with patch("orders.tasks.flush_sms_batch") as task:
+        yield task
+
+
+class TestQueueSms:
+    """Test cases for queueing SMS notifications."""
+
+    def test_schedules_one_flush_per_window(
+        self, db, order, flush_task, django_capture_on_commit_callbacks, settings
+    ):
+        """Test that only the first message of a window schedules a flush."""
+        settings.SMS_BATCH_WINDOW = 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first = queue_sms("+254700000001", "Hello", order_id=order.id)
+            queue_sms("+254700000002", "Hello")
+
+        assert first.status == "pending"
+        assert first.order_id == order.id
+        flush_task.apply_async.assert_called_once_with(countdown=2)
+
+    def test_many_in_one_insert(
+        self, db, order, flush_task, django_capture_on_commit_callbacks, django_assert_num_queries
+    ):
+        """Test that many messages are queued with one insert and one scheduled flush."""
+        messages = [
+            ("+254700000001", "Your order has shipped", order.id),
+            ("+254700000002", "Your order has shipped", None),
+        ]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with django_assert_num_queries(1):
+                deliveries = queue_sms_many(messages)
+
+        assert [delivery.status for delivery in deliveries] == ["pending", "pending"]
+        assert SmsDelivery.objects.filter(status="pending").count() == 2
+        flush_task.apply_async.assert_called_once()
+
+    def test_many_without_messages(self, db, flush_task, django_capture_on_commit_callbacks):
+        """Test that queueing no messages schedules nothing."""
+        with django_capture_on_commit_callbacks(execute=True):
+            assert queue_sms_many([]) == []
+
+        flush_task.apply_async.assert_not_called()
+
+    def test_nothing_scheduled_before_commit(self, db, flush_task):
+        """Test that a message is only scheduled once its transaction commits."""
+        queue_sms("+254700000001", "Hello")
+
+        flush_task.apply_async.assert_not_called()
+
+
+class TestFlushPendingSms:
+    """Test cases for sending queued SMS notifications in batches."""
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_groups_identical_texts(self, mock_send, db, flush_task, settings):
+        """Test that recipients of the same text share a request, up to the limit."""
+        settings.SMS_BATCH_MAX_RECIPIENTS = 2
+        numbers = [f"+25470000000{i}" for i in range(3)]
+        for number in numbers:
+            queue_sms(number, "Flash sale!")
+        queue_sms("+254711111111", "Your order shipped")
+        mock_send.side_effect = lambda message, phone_numbers: accepted(*phone_numbers)
+
+        counts = flush_pending_sms()
+
+        assert counts == {"sent": 4, "failed": 0, "retried": 0, "requests": 3}
+        assert [call.args for call in mock_send.call_args_list] == [
+            ("Flash sale!", numbers[:2]),
+            ("Flash sale!", numbers[2:]),
+            ("Your order shipped", ["+254711111111"]),
+        ]
+        delivery = SmsDelivery.objects.get(phone_number=numbers[0])
+        assert delivery.status == "sent"
+        assert delivery.provider_message_id == f"ATXid_{numbers[0]}"
+        assert delivery.cost == "KES 0.8000"
+        assert delivery.sent_at is not None
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_records_each_recipient(self, mock_send, db, flush_task):
+        """Test that a rejected recipient fails without failing the rest."""
+        queue_sms("+254700000001", "Hello")
+        queue_sms("+254700000002", "Hello")
+        result = accepted("+254700000001", "+254700000002")
+        result["recipients"]["+254700000002"].update(status="InvalidPhoneNumber", statusCode=403)
+        mock_send.return_value = result
+
+        counts = flush_pending_sms()
+
+        assert counts == {"sent": 1, "failed": 1, "retried": 0, "requests": 1}
+        rejected = SmsDelivery.objects.get(phone_number="+254700000002")
+        assert rejected.status == "failed"
+        assert rejected.provider_status == "InvalidPhoneNumber"
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_request_failure_fails_the_batch(self, mock_send, db, flush_task):
+        """Test that a failed request is recorded on every delivery in it."""
+        queue_sms("+254700000001", "Hello")
+        mock_send.return_value = {"status": "error", "message": "API Error"}
+
+        flush_pending_sms()
+
+        delivery = SmsDelivery.objects.get()
+        assert delivery.status == "failed"
+        assert delivery.error == "API Error"
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_invalid_number_fails_alone(self, mock_send, db, flush_task):
+        """Test that a malformed number is failed without failing its batch."""
+        queue_sms("+254700000001", "Hello")
+        queue_sms("0700000002", "Hello")
+        mock_send.side_effect = lambda message, phone_numbers: accepted(*phone_numbers)
+
+        counts = flush_pending_sms()
+
+        mock_send.assert_called_once_with("Hello", ["+254700000001"])
+        assert counts == {"sent": 1, "failed": 1, "retried": 0, "requests": 1}
+        invalid = SmsDelivery.objects.get(phone_number="0700000002")
+        assert invalid.status == "failed"
+        assert invalid.error == "Invalid phone number: 0700000002"
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_transient_failure_is_retried_with_backoff(
+        self, mock_send, db, flush_task, settings, django_capture_on_commit_callbacks
+    ):
+        """Test that a delivery whose request timed out is pending again, for later."""
+        settings.SMS_BATCH_WINDOW = 2
+        queue_sms("+254700000001", "Hello")
+        mock_send.return_value = {"status": "error", "message": "Timeout", "transient": True}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            counts = flush_pending_sms()
+
+        delivery = SmsDelivery.objects.get()
+        assert counts["retried"] == 1
+        assert delivery.status == "pending"
+        assert delivery.attempts == 1
+        assert 3 < (delivery.retry_at - timezone.now()).total_seconds() <= 4
+        countdown = flush_task.apply_async.call_args.kwargs["countdown"]
+        assert 3 < countdown <= 4
+        # Not due yet, so not claimed again.
+        assert flush_pending_sms()["requests"] == 0
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_transient_failure_fails_after_max_attempts(self, mock_send, db, flush_task, settings):
+        """Test that retries stop once SMS_MAX_ATTEMPTS requests were made."""
+        settings.SMS_MAX_ATTEMPTS = 2
+        queue_sms("+254700000001", "Hello")
+        mock_send.return_value = {"status": "error", "message": "Timeout", "transient": True}
+
+        flush_pending_sms()
+        SmsDelivery.objects.update(retry_at=timezone.now())
+        flush_pending_sms()
+
+        delivery = SmsDelivery.objects.get()
+        assert mock_send.call_count == 2
+        assert delivery.status == "failed"
+        assert delivery.attempts == 2
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_claims_each_delivery_once(self, mock_send, db, flush_task):
+        """Test that delivered messages aren't sent again and a full flush reschedules."""
+        for i in range(3):
+            queue_sms(f"+25470000000{i}", "Hello")
+        mock_send.side_effect = lambda message, phone_numbers: accepted(*phone_numbers)
+
+        flush_pending_sms(limit=2)
+        flush_pending_sms(limit=2)
+        flush_pending_sms(limit=2)
+
+        sent = [number for call in mock_send.call_args_list for number in call.args[1]]
+        assert sorted(sent) == [f"+25470000000{i}" for i in range(3)]
+        flush_task.apply_async.assert_called_once()
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_reclaims_abandoned_sending(self, mock_send, db, flush_task, settings):
+        """Test that a delivery left sending past its claim is sent again."""
+        settings.SMS_SENDING_TIMEOUT = 60
+        now = timezone.now()
+        SmsDelivery.objects.create(
+            phone_number="+254700000001",
+            message="Hello",
+            status="sending",
+            retry_at=now - timedelta(seconds=1),
+        )
+        SmsDelivery.objects.create(
+            phone_number="+254700000002",
+            message="Hello",
+            status="sending",
+            retry_at=now + timedelta(seconds=30),
+        )
+        mock_send.side_effect = lambda message, phone_numbers: accepted(*phone_numbers)
+
+        counts = flush_pending_sms()
+
+        mock_send.assert_called_once_with("Hello", ["+254700000001"])
+        assert counts == {"sent": 1, "failed": 0, "retried": 0, "requests": 1}
+        reclaimed = SmsDelivery.objects.get(phone_number="+254700000001")
+        assert reclaimed.status == "sent"
+        assert reclaimed.retry_at is None
+        # The other is still within its claim, so a recovery flush is scheduled.
+        flush_task.apply_async.assert_called_once_with(countdown=60)
+
+
+class TestSendSmsNow:
+    """Test cases for sending personalized SMS without waiting for a batch."""
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_sends_each_message_at_once(self, mock_send, db, flush_task):
+        """Test that messages are sent and recorded without scheduling a flush."""
+        mock_send.side_effect = lambda message, phone_numbers: accepted(*phone_numbers)
+
+        deliveries = send_sms_now(
+            [("+254700000001", "Hi Ann", None), ("+254700000002", "Hi Bob", None)]
+        )
+
+        assert mock_send.call_count == 2
+        assert [delivery.status for delivery in deliveries] == ["sent", "sent"]
+        assert set(SmsDelivery.objects.values_list("status", "retry_at")) == {("sent", None)}
+        flush_task.apply_async.assert_not_called()
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_claim_expires_if_the_worker_dies(
+        self, mock_send, db, flush_task, settings, django_capture_on_commit_callbacks
+    ):
+        """Test that messages are claimed for SMS_SENDING_TIMEOUT, with a flush to reclaim them."""
+        settings.SMS_SENDING_TIMEOUT = 60
+        mock_send.side_effect = SystemExit
+
+        with pytest.raises(SystemExit):
+            with django_capture_on_commit_callbacks(execute=True):
+                send_sms_now([("+254700000001", "Hi Ann", None)])
+
+        delivery = SmsDelivery.objects.get()
+        assert delivery.status == "sending"
+        assert 59 < (delivery.retry_at - timezone.now()).total_seconds() <= 60
+        flush_task.apply_async.assert_called_once_with(countdown=60)
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_unavailable_provider_leaves_pending(
+        self, mock_send, db, flush_task, settings, django_capture_on_commit_callbacks
+    ):
+        """Test that messages the provider can't take now wait for a flush."""
+        mock_send.side_effect = SmsUnavailable("SMS provider circuit is open", 5)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            (delivery,) = send_sms_now([("+254700000001", "Hi Ann", None)])
+
+        assert delivery.status == "pending"
+        assert SmsDelivery.objects.get().status == "pending"
+        flush_task.apply_async.assert_any_call(countdown=settings.SMS_BATCH_WINDOW)
+
+
+@pytest.mark.usefixtures("sms_limits")
+class TestSendBulkSms:
+    """Test cases for the multi-recipient SMS service."""
+
+    @patch("orders.services.sms_service")
+    def test_results_keyed_by_number(self, mock_sms_service):
+        """Test that one request is made and each recipient's result returned."""
+        mock_sms_service.send.return_value = {
+            "SMSMessageData": {
+                "Recipients": [
+                    {"number": "+254700000001", "status": "Success"},
+                    {"number": "+254700000002", "status": "InvalidPhoneNumber"},
+                ]
+            }
+        }
+
+        result = send_bulk_sms("Hello", ["+254700000001", "+254700000002"])
+
+        mock_sms_service.send.assert_called_once_with("Hello", ["+254700000001", "+254700000002"])
+        assert result["recipients"]["+254700000002"]["status"] == "InvalidPhoneNumber"
+
+    @patch("orders.services.sms_service")
+    def test_failure(self, mock_sms_service):
+        """Test that a failed request is reported as an error."""
+        mock_sms_service.send.side_effect = Exception("API Error")
+
+        assert send_bulk_sms("Hello", ["+254700000001"]) == {
+            "status": "error",
+            "message": "API Error",
+            "transient": False,
+        }
+
+    @patch("orders.services.sms_service")
+    def test_timeout_is_transient(self, mock_sms_service):
+        """Test that a timed out request is reported as worth retrying."""
+        mock_sms_service.send.side_effect = requests.Timeout("Read timed out")
+
+        assert send_bulk_sms("Hello", ["+254700000001"])["transient"] is True
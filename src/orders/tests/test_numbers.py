@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+import pytest
+
+from orders.numbers import (
+    BLOCK_SIZE,
+    RandomOrderNumberGenerator,
+    SequenceOrderNumberGenerator,
+    decode,
+    encode,
+    next_order_number,
+)
+
+
+class TestOrderNumberEncoding:
+    """Test cases for encoding and decoding order numbers."""
+
+    @pytest.mark.parametrize("number", [0, 1, 31, 32, 36, 37, 123456789, 2**60 - 1])
+    def test_round_trip(self, number):
+        """Test that encoded numbers decode back to themselves."""
+        assert decode(encode(number)) == number
+
+    def test_format(self):
+        """Test that numbers are prefixed, zero-padded and end in a check symbol."""
+        assert encode(37) == "ORD-0000150"
+        assert len(encode(2**60 - 1)) <= 20
+
+    def test_forgives_typing(self):
+        """Test that case, hyphens and look-alike letters are accepted."""
+        order_number = encode(1024)
+
+        assert decode(order_number.lower()) == 1024
+        assert decode(order_number.replace("0", "O").replace("ORD-", "")) == 1024
+
+    def test_rejects_typos(self):
+        """Test that a changed or swapped symbol fails the check."""
+        order_number = encode(123456789)
+        changed = order_number[:-2] + ("X" if order_number[-2] != "X" else "Y") + order_number[-1]
+        swapped = order_number[:-3] + order_number[-2] + order_number[-3] + order_number[-1]
+
+        for typo in (changed, swapped, "ORD-", "ORD-U1"):
+            with pytest.raises(ValueError):
+                decode(typo)
+
+
+@pytest.mark.django_db
+class TestSequenceOrderNumberGenerator:
+    """Test cases for the hi/lo sequence generator."""
+
+    def test_one_round_trip_per_block(self, django_assert_num_queries):
+        """Test that a block of numbers costs a single query."""
+        generator = SequenceOrderNumberGenerator()
+
+        with django_assert_num_queries(1):
+            numbers = [decode(generator()) for _ in range(BLOCK_SIZE)]
+        with django_assert_num_queries(1):
+            numbers.append(decode(generator()))
+
+        assert numbers[:BLOCK_SIZE] == list(range(numbers[0], numbers[0] + BLOCK_SIZE))
+        assert numbers[0] % BLOCK_SIZE == 0
+        assert numbers[-1] >= numbers[0] + BLOCK_SIZE
+
+    def test_generators_never_overlap(self):
+        """Test that workers with their own blocks hand out distinct numbers."""
+        workers = [SequenceOrderNumberGenerator() for _ in range(3)]
+
+        numbers = [worker() for _ in range(BLOCK_SIZE + 1) for worker in workers]
+
+        assert len(set(numbers)) == len(numbers)
+
+    def test_forked_worker_reserves_its_own_block(self):
+        """Test that a child process doesn't reuse the block of its parent."""
+        generator = SequenceOrderNumberGenerator()
+        parent = decode(generator())
+
+        with patch("orders.numbers.os.getpid", return_value=-1):
+            child = decode(generator())
+
+        assert child // BLOCK_SIZE != parent // BLOCK_SIZE
+
+
+class TestNextOrderNumber:
+    """Test cases for the configured order number generator."""
+
+    def test_uses_setting(self, settings):
+        """Test that ORDER_NUMBER_GENERATOR picks the generator class."""
+        settings.ORDER_NUMBER_GENERATOR = "orders.numbers.RandomOrderNumberGenerator"
+
+        numbers = {next_order_number() for _ in range(100)}
+
+        assert len(numbers) == 100
+        assert all(decode(number) < 2**60 for number in numbers)
+
+    def test_random_generator(self):
+        """Test that random numbers are valid order numbers."""
+        assert decode(RandomOrderNumberGenerator()()) >= 0
@@ -0,0 +1,70 @@
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from orders.models import OutboxMessage
+from orders.outbox import enqueue, relay
+from orders.tasks import send_order_confirmation_sms
+
+
+@pytest.fixture
+def celery_app():
+    """Replace the Celery app the relay publishes through."""
+    with patch("orders.outbox.current_app") as app:
+        yield app
+
+
+def published(app):
+    """Return the (task, args) pairs sent through the mocked app."""
+    return [(call.args[0], call.kwargs["args"]) for call in app.send_task.call_args_list]
+
+
+class TestOutbox:
+    """Test cases for queueing and relaying outbox messages."""
+
+    def test_enqueue_writes_a_row(self, db, celery_app):
+        """Test that enqueueing stores the task instead of publishing it."""
+        enqueue(send_order_confirmation_sms, 42)
+
+        message = OutboxMessage.objects.get()
+        assert message.task == "orders.tasks.send_order_confirmation_sms"
+        assert message.args == [42]
+        celery_app.send_task.assert_not_called()
+
+    def test_relay_publishes_in_order_and_deletes(self, db, celery_app):
+        """Test that a batch is published oldest first over one producer."""
+        for order_id in range(3):
+            enqueue(send_order_confirmation_sms, order_id)
+
+        assert relay(batch_size=2) == 2
+        assert relay(batch_size=2) == 1
+        assert relay(batch_size=2) == 0
+
+        assert published(celery_app) == [
+            ("orders.tasks.send_order_confirmation_sms", [order_id]) for order_id in range(3)
+        ]
+        assert celery_app.producer_or_acquire.call_count == 2
+        assert not OutboxMessage.objects.exists()
+
+    def test_broker_failure_keeps_unsent_messages(self, db, celery_app):
+        """Test that messages after a publishing error stay queued."""
+        for order_id in range(3):
+            enqueue(send_order_confirmation_sms, order_id)
+        celery_app.send_task.side_effect = [None, ConnectionError("broker down")]
+
+        assert relay() == 1
+
+        assert list(OutboxMessage.objects.values_list("args", flat=True)) == [[1], [2]]
+
+    def test_relay_command_drains_outbox(self, db, celery_app):
+        """Test that --once publishes every batch and exits."""
+        for order_id in range(5):
+            enqueue(send_order_confirmation_sms, order_id)
+        stdout = StringIO()
+
+        call_command("relay_outbox", once=True, batch_size=2, stdout=stdout)
+
+        assert "Published 5 messages" in stdout.getvalue()
+        assert not OutboxMessage.objects.exists()
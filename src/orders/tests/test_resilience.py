@@ -0,0 +1,256 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+from django.urls import reverse
+from rest_framework import status
+
+from orders.models import SmsDelivery
+from orders.notifications import queue_sms
+from orders.resilience import (
+    CircuitBreaker,
+    SmsUnavailable,
+    TokenBucket,
+    get_redis,
+    guarded_sms_call,
+)
+from orders.services import send_bulk_sms
+from orders.tasks import flush_sms_batch
+
+
+@pytest.fixture
+def client_redis(settings):
+    """Return the Redis client the SMS protections use."""
+    return get_redis(settings.SMS_REDIS_URL)
+
+
+@pytest.fixture
+def bucket(client_redis):
+    """Return an empty-on-exit token bucket of 3 tokens refilling at 10 a second."""
+    bucket = TokenBucket("test", rate=10, capacity=3, client=client_redis)
+    bucket.reset()
+    yield bucket
+    bucket.reset()
+
+
+@pytest.fixture
+def breaker(client_redis):
+    """Return a circuit breaker opening after 2 failures, for 0.2 seconds."""
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.2, client=client_redis)
+    breaker.reset()
+    yield breaker
+    breaker.reset()
+
+
+class TestTokenBucket:
+    """Test cases for the Redis token bucket."""
+
+    def test_allows_a_burst_then_limits(self, bucket):
+        """Test that the capacity is available at once and the rest is rate limited."""
+        assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+
+        delay = bucket.acquire()
+
+        assert 0 < delay <= 0.1
+
+    def test_refills_over_time(self, bucket):
+        """Test that tokens come back at the configured rate."""
+        for _ in range(3):
+            bucket.acquire()
+
+        time.sleep(0.15)
+
+        assert bucket.acquire() == 0
+
+    def test_wait_sleeps_for_short_delays(self, bucket):
+        """Test that a token due soon is waited for."""
+        for _ in range(3):
+            bucket.acquire()
+
+        bucket.wait(max_wait=0.5)
+
+    def test_wait_gives_up_on_long_delays(self, client_redis):
+        """Test that a token due later raises instead of blocking the worker."""
+        bucket = TokenBucket("slow", rate=0.1, capacity=1, client=client_redis)
+        bucket.reset()
+        bucket.acquire()
+
+        with pytest.raises(SmsUnavailable) as excinfo:
+            bucket.wait(max_wait=0.5)
+
+        assert excinfo.value.retry_after > 9
+        bucket.reset()
+
+
+class TestCircuitBreaker:
+    """Test cases for the Redis circuit breaker."""
+
+    def test_opens_after_failures_in_a_row(self, breaker):
+        """Test that the circuit opens at the threshold and refuses calls."""
+        breaker.record_failure()
+        assert breaker.allow() == 0
+        assert breaker.state()["state"] == "closed"
+
+        breaker.record_failure()
+
+        assert 0 < breaker.allow() <= 0.2
+        assert breaker.state()["state"] == "open"
+        assert breaker.state()["failures"] == 2
+
+    def test_success_resets_failures(self, breaker):
+        """Test that failures must be consecutive to open the circuit."""
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state()["state"] == "closed"
+
+    def test_half_open_lets_one_probe_through(self, breaker):
+        """Test that after the timeout a single call is allowed to test the provider."""
+        breaker.record_failure()
+        breaker.record_failure()
+        time.sleep(0.25)
+
+        assert breaker.state()["state"] == "half_open"
+        assert breaker.allow() == 0
+        assert breaker.allow() > 0
+
+    def test_failed_probe_reopens(self, breaker):
+        """Test that a failing probe opens the circuit again."""
+        breaker.record_failure()
+        breaker.record_failure()
+        time.sleep(0.25)
+        breaker.allow()
+
+        breaker.record_failure()
+
+        assert breaker.state()["state"] == "open"
+
+    def test_successful_probe_closes(self, breaker):
+        """Test that a succeeding probe closes the circuit."""
+        breaker.record_failure()
+        breaker.record_failure()
+        time.sleep(0.25)
+        breaker.allow()
+
+        breaker.record_success()
+
+        assert breaker.state() == {
+            "state": "closed",
+            "failures": 0,
+            "failure_threshold": 2,
+            "retry_in": 0.0,
+        }
+
+
+@pytest.mark.usefixtures("sms_limits")
+class TestGuardedSmsCall:
+    """Test cases for guarding provider calls."""
+
+    def test_failures_open_the_circuit(self, sms_limits, settings):
+        """Test that failed calls are counted and an open circuit stops calls."""
+        breaker, _ = sms_limits
+        for _ in range(settings.SMS_CIRCUIT_FAILURE_THRESHOLD):
+            with pytest.raises(ConnectionError):
+                with guarded_sms_call():
+                    raise ConnectionError("timeout")
+
+        with pytest.raises(SmsUnavailable):
+            with guarded_sms_call():
+                pytest.fail("The provider was called with the circuit open")
+
+        assert breaker.state()["state"] == "open"
+
+    def test_invalid_numbers_are_not_failures(self, sms_limits):
+        """Test that the client's phone number validation doesn't count."""
+        breaker, _ = sms_limits
+
+        with pytest.raises(ValueError):
+            with guarded_sms_call():
+                raise ValueError("Invalid phone number: 123")
+
+        assert breaker.state()["failures"] == 0
+
+    @patch("orders.services.sms_service")
+    def test_bulk_send_raises_when_unavailable(self, mock_sms_service, sms_limits, settings):
+        """Test that a batch is not sent, nor reported failed, while the circuit is open."""
+        breaker, _ = sms_limits
+        for _ in range(settings.SMS_CIRCUIT_FAILURE_THRESHOLD):
+            breaker.record_failure()
+
+        with pytest.raises(SmsUnavailable):
+            send_bulk_sms("Hello", ["+254700000001"])
+
+        mock_sms_service.send.assert_not_called()
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_flush_backs_off(self, mock_send, db, settings):
+        """Test that a refused flush leaves its messages pending and retries later."""
+        queue_sms("+254700000001", "Hello")
+        mock_send.side_effect = SmsUnavailable("SMS provider circuit is open", 12.5)
+
+        with patch("orders.tasks.postpone_flush") as postpone:
+            with pytest.raises(SmsUnavailable):
+                flush_sms_batch()
+
+        assert SmsDelivery.objects.get().status == "pending"
+        postpone.assert_called_once_with(max(12.5, settings.SMS_BATCH_WINDOW))
+
+
+class TestRedisUnavailable:
+    """Test cases for sending while the shared Redis is down."""
+
+    @pytest.fixture
+    def broken_redis(self):
+        """Return a Redis client whose every command fails."""
+        client = MagicMock()
+        client.register_script.return_value.side_effect = redis.ConnectionError("down")
+        client.delete.side_effect = redis.ConnectionError("down")
+        return client
+
+    def test_limiter_and_breaker_fail_open(self, broken_redis):
+        """Test that calls are allowed, and their results ignored, without Redis."""
+        bucket = TokenBucket("test", rate=1, capacity=1, client=broken_redis)
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=1, client=broken_redis)
+
+        assert bucket.acquire() == 0
+        assert breaker.allow() == 0
+        breaker.record_failure()
+        breaker.record_success()
+
+    @patch("orders.services.sms_service")
+    def test_bulk_send_goes_ahead(self, mock_sms_service, broken_redis):
+        """Test that a Redis blip doesn't stop or fail a batch."""
+        mock_sms_service.send.return_value = {
+            "SMSMessageData": {"Recipients": [{"number": "+254700000001", "status": "Success"}]}
+        }
+
+        with patch("orders.resilience.get_redis", return_value=broken_redis):
+            result = send_bulk_sms("Hello", ["+254700000001"])
+
+        assert result["status"] == "success"
+
+
+class TestSmsStatusEndpoint:
+    """Test cases for the staff SMS status endpoint."""
+
+    def test_reports_circuit_and_deliveries(self, db, api_client, user, sms_limits):
+        """Test that staff see the breaker state and delivery counts."""
+        user.is_staff = True
+        user.save()
+        api_client.force_authenticate(user=user)
+        queue_sms("+254700000001", "Hello")
+
+        response = api_client.get(reverse("order-sms-status"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["circuit"]["state"] == "closed"
+        assert response.data["deliveries"]["pending"] == 1
+        assert response.data["deliveries"]["sent"] == 0
+
+    def test_requires_staff(self, db, authenticated_client):
+        """Test that customers can't see the SMS status."""
+        response = authenticated_client.get(reverse("order-sms-status"))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
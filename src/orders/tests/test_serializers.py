@@ -1,9 +1,17 @@
 from decimal import Decimal
 
+import pytest
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
 
+from core.compiled import CompiledSerializer
 from orders.models import Order
+from orders.numbers import decode
 from orders.serializers import OrderCreateSerializer, OrderItemCreateSerializer, OrderSerializer
+from products.models import CategoryStats, Product
 
 User = get_user_model()
 
@@ -25,6 +33,12 @@ class TestOrderItemCreateSerializer:
         assert not serializer.is_valid()
         assert "product_id" in serializer.errors
 
+    def test_serializer_rejects_zero_quantity(self, db, product):
+        """Test that an item must order at least one unit."""
+        serializer = OrderItemCreateSerializer(data={"product_id": product.id, "quantity": 0})
+        assert not serializer.is_valid()
+        assert "quantity" in serializer.errors
+
 
 class TestOrderSerializer:
     """Test cases for the OrderSerializer."""
@@ -50,6 +64,16 @@ class TestOrderSerializer:
         assert data["shipping_address"] == "123 Test Street, Nairobi, Kenya"
         assert "created_at" in data
 
+    def test_compiled_output_matches_serializer(self, db, orders):
+        """Test that the compiled list projection renders the same JSON."""
+        queryset = Order.objects.all()
+        compiled = CompiledSerializer(OrderSerializer)
+
+        expected = JSONRenderer().render(OrderSerializer(queryset, many=True).data)
+        actual = JSONRenderer().render(compiled.to_representation(compiled.values(queryset)))
+
+        assert actual == expected
+
 
 class TestOrderCreateSerializer:
     """Test cases for the OrderCreateSerializer."""
@@ -128,6 +152,7 @@ class TestOrderCreateSerializer:
         assert order.user == user
         assert order.shipping_address == "456 Test Avenue, Nairobi, Kenya"
         assert order.items.count() == 2
+        assert decode(order.order_number) >= 0
 
         # Expected total amount
         expected_total = (products[0].price * 3) + (products[1].price * 2)
@@ -138,3 +163,138 @@ class TestOrderCreateSerializer:
         products[1].refresh_from_db()
         assert products[0].stock == initial_stock_0 - 3
         assert products[1].stock == initial_stock_1 - 2
+
+    def test_create_order_cannot_oversell(self, db, user, products):
+        """Test that stock taken after validation makes the whole order fail cleanly."""
+        data = {
+            "shipping_address": "456 Test Avenue, Nairobi, Kenya",
+            "items": [
+                {"product_id": products[0].id, "quantity": 3},
+                {"product_id": products[1].id, "quantity": 2},
+            ],
+        }
+        context = {"request": type("obj", (object,), {"user": user})}
+        serializer = OrderCreateSerializer(data=data, context=context)
+        assert serializer.is_valid(), serializer.errors
+
+        # Another checkout takes most of the bananas in the meantime.
+        Product.objects.filter(pk=products[1].pk).update(stock=1)
+
+        with pytest.raises(serializers.ValidationError) as excinfo:
+            serializer.save()
+
+        assert excinfo.value.detail["items"] == ["Not enough stock for Banana. Available: 1"]
+        assert not Order.objects.exists()
+        assert Product.objects.get(pk=products[0].pk).stock == products[0].stock
+
+    def test_repeated_products_are_merged(self, db, user, product):
+        """Test that lines for the same product become one item with the total quantity."""
+        data = {
+            "shipping_address": "456 Test Avenue, Nairobi, Kenya",
+            "items": [
+                {"product_id": product.id, "quantity": 2},
+                {"product_id": product.id, "quantity": 3},
+            ],
+        }
+        context = {"request": type("obj", (object,), {"user": user})}
+        serializer = OrderCreateSerializer(data=data, context=context)
+        assert serializer.is_valid(), serializer.errors
+
+        order = serializer.save()
+
+        assert [(item.product_id, item.quantity) for item in order.items.all()] == [(product.id, 5)]
+
+    def test_repeated_products_are_checked_together(self, db, product):
+        """Test that the stock check applies to the total of repeated lines."""
+        data = {
+            "shipping_address": "456 Test Avenue, Nairobi, Kenya",
+            "items": [
+                {"product_id": product.id, "quantity": 60},
+                {"product_id": product.id, "quantity": 60},
+            ],
+        }
+        serializer = OrderCreateSerializer(data=data)
+
+        assert not serializer.is_valid()
+        assert serializer.errors["items"][0] == "Not enough stock for Apple. Available: 100"
+
+    def test_items_resolved_with_one_query(self, db, user, products):
+        """Test that validating the items costs one query however many there are."""
+
+        def validation_queries(items):
+            data = {"shipping_address": "456 Test Avenue, Nairobi, Kenya", "items": items}
+            context = {"request": type("obj", (object,), {"user": user})}
+            serializer = OrderCreateSerializer(data=data, context=context)
+            with CaptureQueriesContext(connection) as queries:
+                assert serializer.is_valid(), serializer.errors
+            return len(queries)
+
+        one = validation_queries([{"product_id": products[0].id, "quantity": 1}])
+        many = validation_queries(
+            [{"product_id": product.id, "quantity": 1} for product in products * 10]
+        )
+
+        assert one == many == 1
+
+    def test_invalid_product_ids_reported_per_item(self, db, product):
+        """Test that unknown and malformed product IDs are reported at their position."""
+        data = {
+            "shipping_address": "456 Test Avenue, Nairobi, Kenya",
+            "items": [
+                {"product_id": product.id, "quantity": 1},
+                {"product_id": 999, "quantity": 1},
+                {"product_id": "abc", "quantity": 1},
+            ],
+        }
+        serializer = OrderCreateSerializer(data=data)
+
+        assert not serializer.is_valid()
+        errors = serializer.errors["items"]
+        assert errors[0] == {}
+        assert str(errors[1]["product_id"][0]) == 'Invalid pk "999" - object does not exist.'
+        assert "Incorrect type" in str(errors[2]["product_id"][0])
+
+    def test_create_order_updates_category_stats(self, db, user, category, products):
+        """Test that the category stock totals follow the decrement."""
+        data = {
+            "shipping_address": "456 Test Avenue, Nairobi, Kenya",
+            "items": [
+                {"product_id": products[0].id, "quantity": 3},
+                {"product_id": products[2].id, "quantity": 4},
+            ],
+        }
+        context = {"request": type("obj", (object,), {"user": user})}
+        serializer = OrderCreateSerializer(data=data, context=context)
+        assert serializer.is_valid(), serializer.errors
+
+        serializer.save()
+
+        stats = CategoryStats.objects.get(category=category)
+        assert stats.stock_total == sum(product.stock for product in products) - 7
+        assert stats.subtree_stock_total == stats.stock_total
+
+    def test_stock_updates_do_not_grow_with_items(self, db, user, products):
+        """Test that stock is decremented by the same statements for one item or many."""
+
+        def product_updates(items):
+            data = {"shipping_address": "456 Test Avenue, Nairobi, Kenya", "items": items}
+            context = {"request": type("obj", (object,), {"user": user})}
+            serializer = OrderCreateSerializer(data=data, context=context)
+            assert serializer.is_valid(), serializer.errors
+            with CaptureQueriesContext(connection) as queries:
+                serializer.save()
+            return [
+                query["sql"]
+                for query in queries.captured_queries
+                if 'products_product"' in query["sql"] or "products_product " in query["sql"]
+            ]
+
+        one = product_updates([{"product_id": products[0].id, "quantity": 1}])
+        many = product_updates([{"product_id": product.id, "quantity": 1} for product in products])
+
+        assert len(one) == len(many) == 2
+
+    def test_stock_cannot_go_negative(self, db, product):
+        """Test that the database refuses negative stock."""
+        with pytest.raises(IntegrityError):
+            Product.objects.filter(pk=product.pk).update(stock=-1)
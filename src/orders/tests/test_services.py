@@ -1,7 +1,11 @@
 from unittest.mock import patch
 
+import pytest
+
 from orders.services import send_sms
 
+pytestmark = pytest.mark.usefixtures("sms_limits")
+
 
 class TestSmsService:
     """Test cases for the SMS service."""
@@ -1,30 +1,30 @@
-from unittest.mock import patch
+import pytest
+from django.db import transaction
 
 from orders.models import Order
 
+STATUS_TASK = "orders.tasks.send_order_status_update_sms"
+
 
 class TestOrderSignals:
     """Test cases for the Order model signals."""
 
-    @patch("orders.signals.send_order_status_update_sms")
-    def test_status_change_signal(self, mock_task, db, order):
-        """Test that changing an order's status triggers the signal."""
+    def test_status_change_signal(self, db, order, queued_tasks, expected_payload):
+        """Test that changing an order's status queues a notification."""
         order.status = "shipped"
         order.save()
 
-        mock_task.delay.assert_called_once_with(order.id, "shipped")
+        assert queued_tasks() == [(STATUS_TASK, [expected_payload(order, "shipped")])]
 
-    @patch("orders.signals.send_order_status_update_sms")
-    def test_no_status_change_no_signal(self, mock_task, db, order):
-        """Test that signal is not triggered when status doesn't change."""
+    def test_no_status_change_no_signal(self, db, order, queued_tasks):
+        """Test that nothing is queued when the status doesn't change."""
         order.shipping_address = "Updated address"
         order.save()
 
-        mock_task.delay.assert_not_called()
+        assert queued_tasks() == []
 
-    @patch("orders.signals.send_order_status_update_sms")
-    def test_signal_with_new_order(self, mock_task, db, user):
-        """Test that signal is not triggered for new orders."""
+    def test_signal_with_new_order(self, db, user, queued_tasks):
+        """Test that nothing is queued for new orders."""
         Order.objects.create(
             user=user,
             order_number="ORD-TEST123",
@@ -33,17 +33,28 @@ class TestOrderSignals:
             shipping_address="Test Address",
         )
 
-        mock_task.delay.assert_not_called()
+        assert queued_tasks() == []
 
-    @patch("orders.signals.send_order_status_update_sms")
-    def test_multiple_status_changes(self, mock_task, db, order):
-        """Test multiple status changes trigger the signal each time."""
+    def test_multiple_status_changes(self, db, order, queued_tasks, expected_payload):
+        """Test multiple status changes queue a notification each time."""
         statuses = ["processing", "shipped", "delivered"]
 
+        expected = []
         for status in statuses:
-            mock_task.delay.reset_mock()
-
             order.status = status
             order.save()
+            expected.append((STATUS_TASK, [expected_payload(order, status)]))
+
+        assert queued_tasks() == expected
+        versions = [args[0]["version"] for _, args in expected]
+        assert versions == sorted(versions)
+
+    def test_rolled_back_change_queues_nothing(self, db, order, queued_tasks):
+        """Test that a status change that is rolled back leaves no notification."""
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                order.status = "cancelled"
+                order.save()
+                raise RuntimeError
 
-            mock_task.delay.assert_called_once_with(order.id, status)
+        assert queued_tasks() == []
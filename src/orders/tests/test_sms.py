@@ -0,0 +1,168 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from orders.models import SmsDelivery
+from orders.notifications import flush_pending_sms, queue_sms
+from orders.services import sms_service
+from orders.sms import (
+    PRODUCTION_URL,
+    SANDBOX_URL,
+    AfricasTalkingBackend,
+    FakeSmsBackend,
+    get_sms_backend,
+    is_transient,
+)
+
+
+@pytest.fixture
+def backend(settings):
+    """Return an Africa's Talking backend whose requests are intercepted."""
+    settings.AFRICAS_TALKING_USERNAME = "grocery"
+    settings.AFRICAS_TALKING_SENDER_ID = "GROCERY"
+    settings.SMS_CONNECT_TIMEOUT = 2
+    settings.SMS_READ_TIMEOUT = 5
+    backend = AfricasTalkingBackend()
+    with patch.object(backend.session, "post") as post:
+        post.return_value.json.return_value = {"SMSMessageData": {"Recipients": []}}
+        yield backend
+
+
+class TestAfricasTalkingBackend:
+    """Test cases for the Africa's Talking SMS backend."""
+
+    def test_posts_with_timeouts(self, backend):
+        """Test that one request is made for all recipients, with both timeouts."""
+        backend.send("Hello", ["+254700000001", "+254700000002"])
+
+        backend.session.post.assert_called_once_with(
+            PRODUCTION_URL,
+            data={
+                "username": backend.username,
+                "to": "+254700000001,+254700000002",
+                "message": "Hello",
+                "bulkSMSMode": 1,
+                "from": "GROCERY",
+            },
+            timeout=(2, 5),
+        )
+
+    def test_reuses_one_session(self, backend):
+        """Test that requests share a session and send the API key."""
+        backend.send("Hello", ["+254700000001"])
+        backend.send("Hello", ["+254700000002"])
+
+        assert backend.session.post.call_count == 2
+        assert "apiKey" in backend.session.headers
+
+    def test_sandbox_url(self, settings):
+        """Test that the sandbox username uses the sandbox API."""
+        settings.AFRICAS_TALKING_USERNAME = "sandbox"
+
+        assert AfricasTalkingBackend().url == SANDBOX_URL
+
+    def test_live_username_uses_production(self, settings):
+        """Test that a live account posts to the production API, whatever the environment."""
+        settings.AFRICAS_TALKING_USERNAME = "grocery"
+        settings.AFRICAS_TALKING_ENVIRONMENT = "sandbox"
+
+        assert AfricasTalkingBackend().url == PRODUCTION_URL
+
+    def test_invalid_number_makes_no_request(self, backend):
+        """Test that an invalid phone number is rejected before sending."""
+        with pytest.raises(ValueError):
+            backend.send("Hello", ["0700000001"])
+
+        backend.session.post.assert_not_called()
+
+    def test_http_errors_raise(self, backend):
+        """Test that an error response is raised, so it counts as a failure."""
+        backend.session.post.return_value.raise_for_status.side_effect = requests.HTTPError()
+
+        with pytest.raises(requests.HTTPError):
+            backend.send("Hello", ["+254700000001"])
+
+
+def http_error(status_code):
+    """Return the error raised for a response with ``status_code``."""
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(response=response)
+
+
+class TestIsTransient:
+    """Test cases for telling retryable send failures apart."""
+
+    @pytest.mark.parametrize(
+        "exc",
+        [requests.Timeout(), requests.ConnectionError(), http_error(503), http_error(429)],
+    )
+    def test_transient(self, exc):
+        """Test that timeouts, connection errors and overload responses are retried."""
+        assert is_transient(exc)
+
+    @pytest.mark.parametrize("exc", [http_error(401), ValueError("Invalid"), KeyError("x")])
+    def test_permanent(self, exc):
+        """Test that rejected requests and bad responses aren't retried."""
+        assert not is_transient(exc)
+
+
+class TestGetSmsBackend:
+    """Test cases for choosing and building the SMS backend."""
+
+    def test_one_backend_per_process(self):
+        """Test that the backend is built once and rebuilt in a forked process."""
+        backend = get_sms_backend()
+
+        assert isinstance(backend, FakeSmsBackend)
+        assert get_sms_backend() is backend
+        with patch("orders.sms.os.getpid", return_value=-1):
+            assert get_sms_backend() is not backend
+
+    def test_service_follows_forks(self):
+        """Test that the service uses the backend of the process it is used in."""
+        sms_service.send("Hello", ["+254700000001"])
+        parent = get_sms_backend()
+
+        with patch("orders.sms.os.getpid", return_value=-1):
+            sms_service.send("Hello", ["+254700000002"])
+            child = get_sms_backend()
+
+        assert child is not parent
+        assert child.sent == [("Hello", ["+254700000002"])]
+
+    def test_not_built_on_import(self, settings):
+        """Test that importing the order views builds no SMS client."""
+        code = (
+            "import django; django.setup(); "
+            "import orders.views, orders.tasks; "
+            "from orders.sms import _backend; "
+            "print(_backend.cache_info().currsize, 'africastalking' in __import__('sys').modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "grocery_api.test_settings"},
+            check=True,
+        )
+
+        assert result.stdout.split() == ["0", "False"]
+
+    @pytest.mark.usefixtures("sms_limits")
+    def test_flush_through_fake_backend(self, db):
+        """Test that queued messages are sent through the configured backend."""
+        backend = get_sms_backend()
+        backend.sent.clear()
+        queue_sms("+254700000001", "Hello")
+        queue_sms("+254700000002", "Hello")
+
+        flush_pending_sms()
+
+        assert backend.sent == [("Hello", ["+254700000001", "+254700000002"])]
+        assert set(SmsDelivery.objects.values_list("status", flat=True)) == {"sent"}
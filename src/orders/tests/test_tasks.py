@@ -1,50 +1,52 @@
 from unittest.mock import patch
 
+from orders.models import SmsDelivery
+from orders.notifications import order_payload
 from orders.tasks import send_order_confirmation_sms, send_order_status_update_sms
 
 
 class TestOrderTasks:
     """Test cases for Celery tasks in the orders app."""
 
-    @patch("orders.tasks.send_sms")
-    def test_send_order_confirmation_sms(self, mock_send_sms, db, order):
-        """Test the order confirmation SMS task."""
-        mock_send_sms.return_value = {"status": "success", "response": "test_response"}
+    @patch("orders.tasks.send_sms_now")
+    def test_send_order_confirmation_sms(self, mock_send, db, order):
+        """Test that the order confirmation SMS is sent straight away."""
+        mock_send.return_value = [SmsDelivery(id=7, status="sent")]
 
         result = send_order_confirmation_sms(order.id)
 
-        assert mock_send_sms.called
-        call_args = mock_send_sms.call_args[0]
+        assert mock_send.called
+        call_args = mock_send.call_args[0][0][0]
         assert call_args[0] == order.user.phone
         assert order.order_number in call_args[1]
         assert order.user.first_name in call_args[1]
 
-        assert result["status"] == "success"
+        assert result == {"status": "sent", "delivery_id": 7}
 
-    @patch("orders.tasks.send_sms")
-    def test_send_order_confirmation_sms_no_phone(self, mock_send_sms, db, order):
+    @patch("orders.tasks.send_sms_now")
+    def test_send_order_confirmation_sms_no_phone(self, mock_send, db, order):
         """Test the order confirmation SMS task when user has no phone number."""
         order.user.phone = ""
         order.user.save()
 
         result = send_order_confirmation_sms(order.id)
 
-        assert not mock_send_sms.called
+        assert not mock_send.called
         assert result["status"] == "error"
         assert "No phone number" in result["message"]
 
-    @patch("orders.tasks.send_sms")
-    def test_send_order_confirmation_sms_nonexistent_order(self, mock_send_sms, db):
+    @patch("orders.tasks.send_sms_now")
+    def test_send_order_confirmation_sms_nonexistent_order(self, mock_send, db):
         """Test the order confirmation SMS task with a nonexistent order ID."""
         result = send_order_confirmation_sms(999)
 
-        assert not mock_send_sms.called
+        assert not mock_send.called
         assert result["status"] == "error"
         assert "Order" in result["message"] and "not found" in result["message"]
 
-    @patch("orders.tasks.Order.objects.get")
-    @patch("orders.tasks.send_sms")
-    def test_send_order_confirmation_sms_exception(self, mock_send_sms, mock_get):
+    @patch("orders.tasks.load_payload")
+    @patch("orders.tasks.send_sms_now")
+    def test_send_order_confirmation_sms_exception(self, mock_send, mock_get):
         """Test the order confirmation SMS task when an exception occurs."""
         mock_get.side_effect = Exception("Test exception")
 
@@ -53,55 +55,104 @@ class TestOrderTasks:
         assert result["status"] == "error"
         assert "Test exception" in result["message"]
 
-    @patch("orders.tasks.send_sms")
-    def test_send_order_status_update_sms(self, mock_send_sms, db, order):
-        """Test the order status update SMS task."""
-        mock_send_sms.return_value = {"status": "success", "response": "test_response"}
+    @patch("orders.tasks.send_sms_now")
+    def test_send_order_status_update_sms(self, mock_send, db, order):
+        """Test that the order status update SMS is sent straight away."""
+        mock_send.return_value = [SmsDelivery(id=7, status="sent")]
 
         result = send_order_status_update_sms(order.id, "shipped")
 
-        assert mock_send_sms.called
-        call_args = mock_send_sms.call_args[0]
+        assert mock_send.called
+        call_args = mock_send.call_args[0][0][0]
         assert call_args[0] == order.user.phone
         assert order.order_number in call_args[1]
         assert "shipped" in call_args[1].lower()
 
-        assert result["status"] == "success"
+        assert result == {"status": "sent", "delivery_id": 7}
 
-    @patch("orders.tasks.send_sms")
-    def test_send_order_status_update_sms_all_statuses(self, mock_send_sms, db, order):
+    @patch("orders.tasks.send_sms_now")
+    def test_send_order_status_update_sms_all_statuses(self, mock_send, db, order):
         """Test the order status update SMS task with all possible statuses."""
         statuses = ["processing", "shipped", "delivered", "cancelled"]
 
         for status in statuses:
-            mock_send_sms.reset_mock()
-            mock_send_sms.return_value = {"status": "success", "response": "test_response"}
+            mock_send.reset_mock()
+            mock_send.return_value = [SmsDelivery(id=7, status="sent")]
 
             result = send_order_status_update_sms(order.id, status)
 
-            assert mock_send_sms.called
-            message = mock_send_sms.call_args[0][1]
+            assert mock_send.called
+            message = mock_send.call_args[0][0][0][1]
             assert order.order_number in message
 
-            assert result["status"] == "success"
+            assert result == {"status": "sent", "delivery_id": 7}
 
-    @patch("orders.tasks.send_sms")
-    def test_send_order_status_update_sms_no_phone(self, mock_send_sms, db, order):
+    @patch("orders.tasks.send_sms_now")
+    def test_send_order_status_update_sms_no_phone(self, mock_send, db, order):
         """Test the order status update SMS task when user has no phone number."""
         order.user.phone = ""
         order.user.save()
 
         result = send_order_status_update_sms(order.id, "shipped")
 
-        assert not mock_send_sms.called
+        assert not mock_send.called
         assert result["status"] == "error"
         assert "No phone number" in result["message"]
 
-    @patch("orders.tasks.send_sms")
-    def test_send_order_status_update_sms_nonexistent_order(self, mock_send_sms, db):
+    @patch("orders.tasks.send_sms_now")
+    def test_send_order_status_update_sms_nonexistent_order(self, mock_send, db):
         """Test the order status update SMS task with a nonexistent order ID."""
         result = send_order_status_update_sms(999, "shipped")
 
-        assert not mock_send_sms.called
+        assert not mock_send.called
         assert result["status"] == "error"
         assert "Order" in result["message"] and "not found" in result["message"]
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_confirmation_from_payload_skips_order_queries(
+        self, mock_send, db, order, sms_limits, django_assert_num_queries
+    ):
+        """Test that a payload task only records its delivery: one insert, one update."""
+        mock_send.side_effect = lambda message, phone_numbers: {
+            "status": "success",
+            "recipients": {number: {"status": "Success"} for number in phone_numbers},
+        }
+        payload = order_payload(order, order.user)
+
+        with django_assert_num_queries(2) as captured:
+            result = send_order_confirmation_sms(payload)
+
+        assert [query["sql"].split()[0] for query in captured.captured_queries] == [
+            "INSERT",
+            "UPDATE",
+        ]
+        assert all("orders_smsdelivery" in query["sql"] for query in captured.captured_queries)
+        mock_send.assert_called_once_with(
+            f"Hi {order.user.first_name}, order #{order.order_number} confirmed. Thanks!",
+            [order.user.phone],
+        )
+        delivery = SmsDelivery.objects.get()
+        assert result == {"status": "sent", "delivery_id": delivery.id}
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_status_update_from_payload_skips_order_queries(
+        self, mock_send, db, order, settings, sms_limits, django_assert_num_queries
+    ):
+        """Test that the status comes from the payload; only the delivery is written."""
+        settings.SMS_COALESCE_WINDOW = 0
+        mock_send.return_value = {"status": "success", "recipients": {}}
+        order.status = "shipped"
+        payload = order_payload(order, order.user)
+
+        with django_assert_num_queries(2):
+            send_order_status_update_sms(payload)
+
+        assert mock_send.call_args[0][0].endswith(f"order #{order.order_number} shipped!")
+
+    @patch("orders.tasks.send_sms_now")
+    def test_id_only_task_loads_order_once(self, mock_send, db, order, django_assert_num_queries):
+        """Test that tasks queued with an ID still work, with one query."""
+        with django_assert_num_queries(1):
+            send_order_status_update_sms(order.id, "delivered")
+
+        assert mock_send.call_args[0][0][0][1].endswith("delivered!")
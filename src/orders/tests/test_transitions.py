@@ -0,0 +1,181 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.contrib.admin.sites import site
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from orders.models import Order, OutboxMessage
+from orders.notifications import flush_pending_sms, order_payload
+from orders.tasks import send_order_status_update_sms_many
+from orders.transitions import transition_orders
+
+MANY_TASK = "orders.tasks.send_order_status_update_sms_many"
+
+
+@pytest.fixture
+def pending_orders(user):
+    """Create three pending orders for the test user."""
+    return [
+        Order.objects.create(
+            user=user,
+            order_number=f"ORD-BULK{i}",
+            total_amount=Decimal("10.00"),
+            shipping_address="123 Test Street",
+        )
+        for i in range(3)
+    ]
+
+
+class TestTransitionOrders:
+    """Test cases for the bulk order status transition."""
+
+    def test_one_update_statement(self, db, pending_orders):
+        """Test that the whole selection is moved by a single UPDATE."""
+        ids = [order.id for order in pending_orders]
+
+        with CaptureQueriesContext(connection) as queries:
+            report = transition_orders(ids, "shipped")
+
+        updates = [q["sql"] for q in queries.captured_queries if "UPDATE orders_order" in q["sql"]]
+        assert len(updates) == 1
+        assert sorted(report.updated) == sorted(ids)
+        assert set(Order.objects.values_list("status", flat=True)) == {"shipped"}
+
+    def test_reports_unchanged_and_unknown(self, db, pending_orders):
+        """Test that orders already in the status and missing IDs are reported."""
+        first, second = pending_orders[0], pending_orders[1]
+        loaded_at = first.updated_at
+        Order.objects.filter(pk=second.pk).update(status="shipped")
+
+        report = transition_orders([first.id, second.id, 999999], "shipped")
+
+        assert report.as_dict() == {
+            "updated": [first.id],
+            "unchanged": [second.id],
+            "unknown_ids": [999999],
+        }
+        first.refresh_from_db()
+        assert first.updated_at > loaded_at
+
+    def test_queues_chunked_notifications(self, db, pending_orders, user, monkeypatch):
+        """Test that changed orders are notified in chunks through the outbox."""
+        monkeypatch.setattr("orders.transitions.NOTIFICATION_CHUNK_SIZE", 2)
+
+        transition_orders([order.id for order in pending_orders], "delivered")
+
+        messages = list(OutboxMessage.objects.values_list("task", "args"))
+        assert [task for task, _ in messages] == [MANY_TASK, MANY_TASK]
+        payloads = [payload for _, args in messages for payload in args[0]]
+        assert sorted(payload["order_id"] for payload in payloads) == sorted(
+            order.id for order in pending_orders
+        )
+        assert payloads[0]["status"] == "delivered"
+        assert payloads[0]["phone"] == user.phone
+        # The same payload the post_save handler would have built.
+        order = Order.objects.get(pk=payloads[0]["order_id"])
+        assert payloads[0] == order_payload(order, user)
+
+    def test_nothing_queued_without_changes(self, db, pending_orders):
+        """Test that orders already in the status aren't notified again."""
+        transition_orders([pending_orders[0].id], "pending")
+
+        assert not OutboxMessage.objects.exists()
+
+
+class TestSendOrderStatusUpdateSmsMany:
+    """Test cases for the chunked status notification task."""
+
+    @patch("orders.notifications.send_bulk_sms")
+    def test_batches_one_text_per_status(self, mock_send, db, settings, pending_orders):
+        """Test that customers with a phone are queued for one batch and the rest skipped."""
+        settings.SMS_COALESCE_WINDOW = 0
+        mock_send.side_effect = lambda message, phone_numbers: {
+            "status": "success",
+            "recipients": {number: {"status": "Success"} for number in phone_numbers},
+        }
+        payloads = [
+            {
+                "order_id": order.id,
+                "order_number": order.order_number,
+                "status": "shipped",
+                "name": "Test",
+                "phone": f"+25472200000{i}" if i else "",
+            }
+            for i, order in enumerate(pending_orders)
+        ]
+
+        with patch("orders.tasks.flush_sms_batch"):
+            result = send_order_status_update_sms_many(payloads)
+            counts = flush_pending_sms()
+
+        assert result == {"status": "queued", "queued": 2, "skipped": 1, "dropped": 0}
+        assert counts == {"sent": 2, "failed": 0, "retried": 0, "requests": 1}
+        mock_send.assert_called_once_with(
+            "Good news: your order has shipped!", ["+254722000001", "+254722000002"]
+        )
+
+
+class TestBulkStatusEndpoint:
+    """Test cases for the staff bulk status endpoint."""
+
+    def test_moves_orders(self, db, api_client, user, pending_orders):
+        """Test that staff can move orders and get the report back."""
+        user.is_staff = True
+        user.save()
+        api_client.force_authenticate(user=user)
+        data = {"order_ids": [order.id for order in pending_orders], "status": "processing"}
+
+        response = api_client.post(
+            reverse("order-bulk-status"), data=json.dumps(data), content_type="application/json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(response.data["updated"]) == sorted(data["order_ids"])
+
+    def test_rejects_unknown_status(self, db, api_client, user, pending_orders):
+        """Test that only valid statuses are accepted."""
+        user.is_staff = True
+        user.save()
+        api_client.force_authenticate(user=user)
+        data = {"order_ids": [pending_orders[0].id], "status": "lost"}
+
+        response = api_client.post(
+            reverse("order-bulk-status"), data=json.dumps(data), content_type="application/json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_staff(self, db, authenticated_client, pending_orders):
+        """Test that customers can't change order statuses."""
+        data = {"order_ids": [pending_orders[0].id], "status": "cancelled"}
+
+        response = authenticated_client.post(
+            reverse("order-bulk-status"), data=json.dumps(data), content_type="application/json"
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert Order.objects.get(pk=pending_orders[0].id).status == "pending"
+
+
+class TestOrderAdminActions:
+    """Test cases for the order admin status actions."""
+
+    def test_mark_as_shipped_notifies(self, db, user, pending_orders):
+        """Test that the admin action moves the orders and queues their SMS."""
+        request = RequestFactory().post("/admin/orders/order/")
+        request.user = user
+        request.session = {}
+        request._messages = FallbackStorage(request)
+
+        site._registry[Order].mark_as_shipped(request, Order.objects.all())
+
+        assert set(Order.objects.values_list("status", flat=True)) == {"shipped"}
+        assert OutboxMessage.objects.get().task == MANY_TASK
+        assert "3 orders marked as shipped" in str(list(request._messages)[0])
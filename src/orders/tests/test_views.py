@@ -1,10 +1,18 @@
+import io
 import json
 from decimal import Decimal
 
+import pytest
+from django.core.management import call_command
+from django.db import connection
 from django.urls import reverse
 from rest_framework import status
 
 from orders.models import Order
+from products import cache as catalog_cache
+from products.models import Product
+from products.services import catalog_bulk_changed
+from products.tree import get_category_tree
 
 
 class TestOrderViewSet:
@@ -22,6 +30,17 @@ class TestOrderViewSet:
         assert "ORD-123ABC" in order_numbers
         assert "ORD-456DEF" in order_numbers
 
+    def test_list_orders_query_count(
+        self, db, authenticated_client, orders, django_assert_num_queries
+    ):
+        """Test that listing orders runs a single query regardless of order count."""
+        url = reverse("order-list")
+
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(url)
+
+        assert len(response.data) == 2
+
     def test_list_orders_unauthenticated(self, db, api_client, orders):
         """Test that unauthenticated users cannot list orders."""
         url = reverse("order-list")
@@ -174,3 +193,66 @@ class TestOrderViewSet:
 
         products[0].refresh_from_db()
         assert products[0].stock == 2
+
+    @pytest.mark.parametrize("lines", [1, 100])
+    def test_create_order_query_budget(
+        self, db, authenticated_client, category, lines, django_assert_num_queries, settings
+    ):
+        """Test that placing an order runs the same statements however many lines it has."""
+        # Sequence numbers cost a query once per block, see test_numbers.
+        settings.ORDER_NUMBER_GENERATOR = "orders.numbers.RandomOrderNumberGenerator"
+        Product.objects.bulk_create(
+            Product(name=f"p{i}", slug=f"p{i}", category=category, price=Decimal("1.00"), stock=5)
+            for i in range(lines)
+        )
+        catalog_bulk_changed()
+        get_category_tree()  # Warm the tree snapshot, as in a running process.
+        data = {
+            "shipping_address": "789 Test Road, Nairobi, Kenya",
+            "items": [
+                {"product_id": product_id, "quantity": 1}
+                for product_id in Product.objects.values_list("id", flat=True)
+            ],
+        }
+
+        # Resolve products, lock them, decrement stock, lock and update the
+        # category stats, insert the order, its items and the outbox message;
+        # plus the savepoint.
+        with django_assert_num_queries(10):
+            response = authenticated_client.post(
+                reverse("order-list"), data=json.dumps(data), content_type="application/json"
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Order.objects.get().items.count() == lines
+
+
+class TestBenchmarkOrdersCommand:
+    """Test cases for the benchmark_orders management command."""
+
+    def test_reports_constant_query_count(self, db):
+        """Test that every basket size is timed with the same queries and rolled back."""
+        stdout = io.StringIO()
+
+        call_command("benchmark_orders", sizes="1,5", repeat=2, stdout=stdout)
+
+        rows = [line.split() for line in stdout.getvalue().splitlines()[1:]]
+        assert [row[0] for row in rows] == ["1", "5"]
+        assert rows[0][3] == rows[1][3]
+        assert not Order.objects.exists()
+        assert not Product.objects.exists()
+
+    def test_leaves_shared_state_alone(self, db, settings):
+        """Test that the catalog cache versions and order number sequence are untouched."""
+        settings.ORDER_NUMBER_GENERATOR = "orders.numbers.SequenceOrderNumberGenerator"
+        namespaces = [catalog_cache.PRODUCT_LIST, catalog_cache.PRODUCT_DETAIL]
+        versions = catalog_cache.get_versions(namespaces)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT last_value, is_called FROM orders_order_number_seq")
+            sequence = cursor.fetchone()
+
+            call_command("benchmark_orders", sizes="1", repeat=2, stdout=io.StringIO())
+
+            cursor.execute("SELECT last_value, is_called FROM orders_order_number_seq")
+            assert cursor.fetchone() == sequence
+        assert catalog_cache.get_versions(namespaces) == versions
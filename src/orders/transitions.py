@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Order
+from .notifications import build_payload
+from .outbox import enqueue
+from .tasks import send_order_status_update_sms_many
+
+# Orders notified per task, so each broker message stays small.
+NOTIFICATION_CHUNK_SIZE = 500
+
+
+class StatusTransitionReport:
+    """Outcome of :func:`transition_orders`."""
+
+    def __init__(self):
+        self.updated = []
+        self.unchanged = []
+        self.unknown_ids = []
+
+    def as_dict(self):
+        return {
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "unknown_ids": self.unknown_ids,
+        }
+
+
+def transition_orders(order_ids, status):
+    """
+    Move many orders to a new status with one statement and notify their customers.
+
+    The ``UPDATE`` only touches orders that aren't in ``status`` yet, stamping
+    their ``updated_at``, and returns what their notifications need, so no
+    order is read back. The notifications go through the outbox in the same
+    transaction, a task per ``NOTIFICATION_CHUNK_SIZE`` orders. Saving each
+    order instead would run the ``post_save`` handler once per order.
+
+    Args:
+        order_ids (iterable): IDs of the orders to move.
+        status (str): One of ``Order.STATUS_CHOICES``.
+
+    Returns:
+        StatusTransitionReport: The IDs of the orders that changed, of those
+        already in ``status`` and of those that don't exist.
+    """
+    User = get_user_model()
+    order_ids = list(dict.fromkeys(order_ids))
+    report = StatusTransitionReport()
+    if not order_ids:
+        return report
+
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH input (id) AS (SELECT unnest(%s::bigint[])),
+            changed AS (
+                UPDATE {Order._meta.db_table} AS o SET status = %s, updated_at = %s
+                FROM {User._meta.db_table} AS u
+                WHERE o.id IN (SELECT id FROM input) AND u.id = o.user_id AND o.status <> %s
+                RETURNING o.id, o.order_number, u.first_name, u.phone
+            )
+            SELECT input.id, o.id IS NOT NULL, changed.order_number,
+                changed.first_name, changed.phone, changed.id IS NOT NULL
+            FROM input
+            LEFT JOIN {Order._meta.db_table} AS o ON o.id = input.id
+            LEFT JOIN changed ON changed.id = input.id
+            """,
+            [order_ids, status, now, status],
+        )
+
+        payloads = []
+        for order_id, exists, order_number, first_name, phone, changed in cursor.fetchall():
+            if not exists:
+                report.unknown_ids.append(order_id)
+            elif not changed:
+                report.unchanged.append(order_id)
+            else:
+                report.updated.append(order_id)
+                payloads.append(
+                    build_payload(order_id, order_number, status, first_name, phone, now)
+                )
+
+        for start in range(0, len(payloads), NOTIFICATION_CHUNK_SIZE):
+            enqueue(
+                send_order_status_update_sms_many, payloads[start : start + NOTIFICATION_CHUNK_SIZE]
+            )
+
+    return report
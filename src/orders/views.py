@@ -1,14 +1,29 @@
+from django.conf import settings
+from django.db.models import Count
 from drf_spectacular.utils import extend_schema
 from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import Order
-from .schemas import create_order_schema, list_orders_schema, retrieve_order_schema
-from .serializers import OrderCreateSerializer, OrderSerializer
+from core.compiled import CompiledListModelMixin
+from core.eager_loading import EagerLoadingViewSetMixin
+
+from .models import Order, SmsDelivery
+from .resilience import sms_circuit_breaker
+from .schemas import (
+    bulk_order_status_schema,
+    create_order_schema,
+    list_orders_schema,
+    retrieve_order_schema,
+    sms_status_schema,
+)
+from .serializers import BulkOrderStatusSerializer, OrderCreateSerializer, OrderSerializer
+from .transitions import transition_orders
 
 
 class OrderViewSet(
-    mixins.ListModelMixin,
+    EagerLoadingViewSetMixin,
+    CompiledListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
@@ -18,14 +33,17 @@ class OrderViewSet(
     - List user's orders
     - Get order details
     - Create new orders
+    - Move many orders to a new status (staff only)
+    - Check SMS delivery (staff only)
     """
 
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
-        return Order.objects.filter(user=user)
+        return super().get_queryset().filter(user=user)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -51,3 +69,52 @@ class OrderViewSet(
 
         response_serializer = OrderSerializer(order)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(request=BulkOrderStatusSerializer, **bulk_order_status_schema)
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-status",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def bulk_status(self, request):
+        """
+        Move many orders to a new status and notify their customers (staff only).
+        """
+        serializer = BulkOrderStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = transition_orders(
+            serializer.validated_data["order_ids"], serializer.validated_data["status"]
+        )
+
+        return Response(report.as_dict())
+
+    @extend_schema(**sms_status_schema)
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="sms-status",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def sms_status(self, request):
+        """
+        Show the SMS circuit breaker, rate limit and delivery counts (staff only).
+        """
+        counts = dict(
+            SmsDelivery.objects.order_by()
+            .values("status")
+            .annotate(count=Count("id"))
+            .values_list("status", "count")
+        )
+        return Response(
+            {
+                "circuit": sms_circuit_breaker().state(),
+                "rate_limit": {
+                    "rate": settings.SMS_RATE_LIMIT,
+                    "burst": settings.SMS_RATE_LIMIT_BURST,
+                },
+                "deliveries": {
+                    value: counts.get(value, 0) for value, _ in SmsDelivery.STATUS_CHOICES
+                },
+            }
+        )
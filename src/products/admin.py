@@ -14,6 +14,7 @@ class CategoryAdmin(MPTTModelAdmin):
     search_fields = ("name",)
     prepopulated_fields = {"slug": ("name",)}
     list_filter = ("parent",)
+    list_select_related = ("parent",)
     mptt_level_indent = 20
     list_per_page = 20
 
@@ -27,6 +28,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ("name", "category", "price", "stock", "stock_status", "created_at")
     list_filter = ("category", "created_at")
     list_editable = ("price", "stock")
+    list_select_related = ("category",)
     search_fields = ("name", "description")
     prepopulated_fields = {"slug": ("name",)}
     autocomplete_fields = ["category"]
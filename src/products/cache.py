@@ -0,0 +1,140 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = "catalog"
+
+# Cache namespaces. Every cached response is keyed on the current version of
+# each namespace it depends on, so bumping a version orphans exactly the
+# responses built from the data that changed.
+PRODUCT_LIST = "product-list"
+PRODUCT_DETAIL = "product-detail"
+CATEGORY_LIST = "category-list"
+CATEGORY_PRICES = "category-prices"
+# Not a response namespace: versions the in-process category tree snapshot.
+CATEGORY_TREE = "category-tree"
+
+# Each product namespace is a cache round trip to bump; past this many products
+# it's cheaper to drop every cached product detail at once.
+MAX_PRODUCT_NAMESPACES = 10
+
+
+def product_namespace(product_id):
+    """Namespace for the responses of a single product."""
+    return f"product:{product_id}"
+
+
+def _version_key(namespace):
+    return f"{KEY_PREFIX}:version:{namespace}"
+
+
+def _initial_version():
+    # A version key that was evicted must not restart at a number that older,
+    # still cached responses were built under.
+    return time.time_ns()
+
+
+def get_versions(namespaces):
+    """
+    Return the current version of each namespace, creating missing ones.
+
+    Args:
+        namespaces (list): Namespace names.
+
+    Returns:
+        list: Versions in the same order as ``namespaces``.
+    """
+    keys = [_version_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump_versions(*namespaces):
+    """Move each namespace to a new version, orphaning its cached responses."""
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+
+
+def invalidate(*namespaces):
+    """
+    Invalidate namespaces now and again once the current transaction commits.
+
+    The second bump drops anything a concurrent request cached from the
+    pre-commit state between the first bump and the commit.
+    """
+    bump_versions(*namespaces)
+    transaction.on_commit(lambda: bump_versions(*namespaces))
+
+
+def invalidate_products(product_ids):
+    """Invalidate the product lists and the details of the given products."""
+    if len(product_ids) > MAX_PRODUCT_NAMESPACES:
+        invalidate(PRODUCT_LIST, PRODUCT_DETAIL)
+    else:
+        invalidate(PRODUCT_LIST, *(product_namespace(product_id) for product_id in product_ids))
+
+
+def build_cache_key(view_name, namespaces, request):
+    """
+    Build a response cache key from the namespace versions and the request.
+
+    Query parameters are sorted so that equivalent URLs share an entry.
+    """
+    versions = get_versions(namespaces)
+    scope = ":".join(f"{ns}.{version}" for ns, version in zip(namespaces, versions))
+
+    params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+    fingerprint = hashlib.sha1(f"{request.path}?{params}".encode("utf-8")).hexdigest()
+
+    return f"{KEY_PREFIX}:response:{view_name}:{scope}:{fingerprint}"
+
+
+def cache_response(*namespaces):
+    """
+    Cache successful responses of a viewset method in the given namespaces.
+
+    Each namespace is either a name or a callable ``(view, request, kwargs)``
+    returning one, for namespaces that depend on the URL (e.g. a product ID).
+    Only the response data is cached; rendering and content negotiation still
+    happen per request.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            resolved = [
+                namespace(self, request, kwargs) if callable(namespace) else namespace
+                for namespace in namespaces
+            ]
+            view_name = f"{type(self).__name__}.{view_method.__name__}"
+            key = build_cache_key(view_name, resolved, request)
+
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
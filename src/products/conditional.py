@@ -0,0 +1,111 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+
+from .cache import KEY_PREFIX, get_versions
+
+
+def _deleted_key(model):
+    return f"{KEY_PREFIX}:deleted:{model._meta.label_lower}"
+
+
+def record_deletion(model):
+    """
+    Remember when a row of ``model`` was last deleted.
+
+    Deleting a row can't raise ``max(updated_at)``, so without this a client
+    sending only ``If-Modified-Since`` would keep getting 304 for a list that
+    lost a row.
+    """
+    cache.set(_deleted_key(model), timezone.now(), timeout=None)
+
+
+def get_table_state(model, namespace):
+    """
+    Return ``(last_modified, count)`` for a model's table.
+
+    The aggregate is cached under the namespace's current version, so it is
+    recomputed at most once after each change instead of on every poll. Like
+    the cached responses, it expires, so states left behind by old versions
+    don't pile up.
+
+    Args:
+        model: Model class with an ``updated_at`` field.
+        namespace (str): Cache namespace invalidated whenever the table changes.
+
+    Returns:
+        tuple: The latest modification time (or ``None`` for an empty table)
+        and the row count.
+    """
+    (version,) = get_versions([namespace])
+    key = f"{KEY_PREFIX}:state:{model._meta.label_lower}:{namespace}.{version}"
+
+    state = cache.get(key)
+    if state is None:
+        aggregate = model.objects.aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+        last_modified = aggregate["last_modified"]
+        deleted_at = cache.get(_deleted_key(model))
+        if deleted_at is not None and (last_modified is None or deleted_at > last_modified):
+            last_modified = deleted_at
+        state = (last_modified, aggregate["count"])
+        cache.set(key, state, settings.CATALOG_CACHE_TIMEOUT)
+
+    return state
+
+
+def conditional_response(models, namespace):
+    """
+    Add a strong ``ETag`` and ``Last-Modified`` to a list endpoint and answer
+    ``If-None-Match``/``If-Modified-Since`` with 304 before the body is built.
+
+    The validators come from ``max(updated_at)`` and the row count of every
+    table the representation is built from, which change whenever any row is
+    added, edited or removed. The ETag also covers the query parameters and the
+    negotiated format, since those select a different representation of the
+    same table state.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            states = [get_table_state(model, namespace) for model in models]
+            timestamps = [modified for modified, _ in states if modified is not None]
+            last_modified = max(timestamps) if timestamps else None
+
+            params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+            renderer = getattr(request, "accepted_renderer", None)
+            fingerprint = "|".join(
+                [
+                    *(
+                        f"{model._meta.label_lower}:{modified.isoformat() if modified else ''}"
+                        f":{count}"
+                        for model, (modified, count) in zip(models, states)
+                    ),
+                    request.path,
+                    str(params),
+                    getattr(renderer, "format", ""),
+                ]
+            )
+            etag = quote_etag(hashlib.sha1(fingerprint.encode("utf-8")).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+
+            if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+                response["ETag"] = etag
+                if timestamp is not None:
+                    response["Last-Modified"] = http_date(timestamp)
+            return response
+
+        return wrapper
+
+    return decorator
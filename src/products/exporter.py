@@ -0,0 +1,152 @@
+import csv
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import serializers
+
+from .importer import CSV, FORMATS, NDJSON
+from .tree import get_category_tree
+
+# Exported columns. ``category`` is the slug path that import_products accepts,
+# so an export can be imported elsewhere as is.
+EXPORT_FIELDS = ("id", "name", "slug", "category", "description", "price", "stock", "updated_at")
+
+CONTENT_TYPES = {CSV: "text/csv; charset=utf-8", NDJSON: "application/x-ndjson"}
+GZIP_CONTENT_TYPE = "application/gzip"
+
+# Encoded rows are sent in chunks of about this many bytes.
+CHUNK_BYTES = 64 * 1024
+
+
+class ProductExportSerializer(serializers.Serializer):
+    """
+    Validates the export query parameters.
+
+    ``export_format`` avoids ``format``, which DRF reserves for choosing a renderer.
+    """
+
+    export_format = serializers.ChoiceField(choices=FORMATS, default=NDJSON)
+    gzip = serializers.BooleanField(required=False, default=False)
+
+
+def parse_export_params(request):
+    """Return the validated export parameters of a request, raising a 400 if they're invalid."""
+    serializer = ProductExportSerializer(data=request.query_params.dict())
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def export_rows(queryset, chunk_size=None):
+    """
+    Yield the ``EXPORT_FIELDS`` of every product in ``queryset`` as tuples, by ID.
+
+    Rows are read through ``QuerySet.iterator()``, i.e. a server-side cursor on
+    PostgreSQL, ``chunk_size`` rows at a time, so memory use doesn't depend on
+    the size of the catalog.
+
+    Args:
+        queryset (QuerySet): Products to export.
+        chunk_size (int): Rows fetched per round trip. Defaults to
+            ``PRODUCTS_EXPORT_CHUNK_SIZE``.
+    """
+    tree = get_category_tree()
+    paths = {}
+    rows = (
+        queryset.order_by("id")
+        .values_list(
+            "id", "name", "slug", "category_id", "description", "price", "stock", "updated_at"
+        )
+        .iterator(chunk_size=chunk_size or settings.PRODUCTS_EXPORT_CHUNK_SIZE)
+    )
+    for id, name, slug, category_id, description, price, stock, updated_at in rows:
+        path = paths.get(category_id)
+        if path is None:
+            path = paths[category_id] = tree.path(category_id) if category_id in tree else ""
+        yield (id, name, slug, path, description, price, stock, updated_at.isoformat())
+
+
+def encode_ndjson(rows):
+    """Yield one JSON object per row, each on its own line."""
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+
+class _Echo:
+    """File-like object handing back what the CSV writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def encode_csv(rows):
+    """Yield a header line and then one CSV line per row."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+ENCODERS = {CSV: encode_csv, NDJSON: encode_ndjson}
+
+
+def _chunks(lines):
+    """
+    Join encoded lines into byte chunks of about ``CHUNK_BYTES``.
+
+    The first line goes out on its own so the client starts receiving at once.
+    """
+    lines = iter(lines)
+    for line in lines:
+        yield line.encode()
+        break
+
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for index, chunk in enumerate(chunks):
+        # Flush the first chunk so it isn't held back in the compressor's window.
+        data = compressor.compress(chunk)
+        if index == 0:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(rows, format, gzip=False):
+    """
+    Encode exported rows into a stream of byte chunks.
+
+    Args:
+        rows (iterable): Tuples as yielded by :func:`export_rows`.
+        format (str): ``csv`` or ``ndjson``.
+        gzip (bool): Whether to gzip the output.
+
+    Returns:
+        iterator: ``bytes`` chunks, produced lazily.
+    """
+    chunks = _chunks(ENCODERS[format](rows))
+    return _gzip(chunks) if gzip else chunks
+
+
+def export_filename(format, gzip=False):
+    """Return the download file name of an export."""
+    return f"products.{format}" + (".gz" if gzip else "")
+
+
+def export_content_type(format, gzip=False):
+    """Return the content type of an export."""
+    return GZIP_CONTENT_TYPE if gzip else CONTENT_TYPES[format]
@@ -0,0 +1,139 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .tree import get_category_tree
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """
+    Validates the product filter query parameters.
+    """
+
+    category_id = serializers.IntegerField(required=False)
+    include_subcategories = serializers.BooleanField(required=False, default=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    in_stock = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+
+def parse_product_filters(request):
+    """Return the validated filter parameters of a request, raising a 400 if they're invalid."""
+    # A plain dict: with a QueryDict, absent booleans would read as False.
+    serializer = ProductFilterSerializer(data=request.query_params.dict())
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def category_subtree_q(category_id, prefix="category__"):
+    """
+    Return a ``Q`` matching products anywhere in a category's subtree.
+
+    The subtree is a ``lft`` range within one ``tree_id``, taken from the
+    in-memory category tree, so no list of category IDs is sent to the database.
+    """
+    node = get_category_tree().get(category_id)
+    if node is None:
+        return Q(pk__in=[])
+    return Q(
+        **{
+            f"{prefix}tree_id": node["tree_id"],
+            f"{prefix}lft__gte": node["lft"],
+            f"{prefix}lft__lte": node["rght"],
+        }
+    )
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """
+    Filter products by category (optionally with its subcategories), price
+    range and stock availability.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filters = parse_product_filters(request)
+
+        category_id = filters.get("category_id")
+        if category_id is not None:
+            if filters["include_subcategories"]:
+                queryset = queryset.filter(category_subtree_q(category_id))
+            else:
+                queryset = queryset.filter(category_id=category_id)
+
+        if "min_price" in filters:
+            queryset = queryset.filter(price__gte=filters["min_price"])
+        if "max_price" in filters:
+            queryset = queryset.filter(price__lte=filters["max_price"])
+
+        if filters["in_stock"] is True:
+            queryset = queryset.filter(stock__gt=0)
+        elif filters["in_stock"] is False:
+            queryset = queryset.filter(stock=0)
+
+        return queryset
+
+
+def price_buckets():
+    """
+    Return the price facet buckets as ``(min, max)`` pairs.
+
+    Built from the ``PRODUCTS_PRICE_BUCKETS`` boundaries; the last bucket is
+    open-ended and has ``max`` ``None``.
+    """
+    cents = Decimal("0.01")
+    bounds = [Decimal(bound).quantize(cents) for bound in ["0", *settings.PRODUCTS_PRICE_BUCKETS]]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def product_facets(queryset, category_id=None):
+    """
+    Count the products of a filtered queryset per facet in a single query.
+
+    Every facet value becomes one ``COUNT(*) FILTER (WHERE ...)`` of the same
+    aggregate.
+
+    Args:
+        queryset (QuerySet): Filtered products.
+        category_id (int): Category whose children are the category facet.
+            Defaults to the top-level categories.
+
+    Returns:
+        dict: ``categories``, ``price`` and ``stock`` facet counts.
+    """
+    tree = get_category_tree()
+    if category_id is None:
+        category_ids = tree.root_ids()
+    elif category_id in tree:
+        category_ids = tree.children_ids(category_id)
+    else:
+        category_ids = []
+    buckets = price_buckets()
+
+    aggregates = {
+        f"category_{node_id}": Count("pk", filter=category_subtree_q(node_id))
+        for node_id in category_ids
+    }
+    for index, (low, high) in enumerate(buckets):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        aggregates[f"price_{index}"] = Count("pk", filter=condition)
+    aggregates["in_stock"] = Count("pk", filter=Q(stock__gt=0))
+    aggregates["out_of_stock"] = Count("pk", filter=Q(stock=0))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    return {
+        "categories": [
+            {"id": node_id, "name": tree.name(node_id), "count": counts[f"category_{node_id}"]}
+            for node_id in category_ids
+        ],
+        "price": [
+            {"min": low, "max": high, "count": counts[f"price_{index}"]}
+            for index, (low, high) in enumerate(buckets)
+        ],
+        "stock": {"in_stock": counts["in_stock"], "out_of_stock": counts["out_of_stock"]},
+    }
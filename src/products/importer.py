@@ -0,0 +1,327 @@
+import csv
+import io
+import json
+import time
+from pathlib import PurePath
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils.text import slugify
+
+from .models import Product
+from .services import catalog_bulk_changed
+from .tree import get_category_tree
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Rejected rows are all counted but only this many are kept for the report.
+MAX_REPORTED_ERRORS = 100
+
+# Columns of a row after cleaning, in staging table order (after ``line``).
+COLUMNS = ("name", "slug", "category_id", "description", "price", "stock")
+
+# File extensions the commands recognise, after any ``.gz``.
+EXTENSIONS = {".csv": CSV, ".ndjson": NDJSON, ".jsonl": NDJSON}
+
+STAGING_TABLE = "products_import_staging"
+
+CREATE_STAGING_SQL = f"""
+    CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} (
+        line bigint NOT NULL,
+        name varchar(200) NOT NULL,
+        slug varchar(220) NOT NULL,
+        category_id bigint NOT NULL,
+        description text NOT NULL,
+        price numeric(10, 2) NOT NULL,
+        stock integer NOT NULL,
+        generated boolean NOT NULL
+    )
+"""
+
+COPY_SQL = (
+    f"COPY {STAGING_TABLE} (line, {', '.join(COLUMNS)}, generated) FROM STDIN WITH (FORMAT csv)"
+)
+
+# Generated slugs that are taken, or could be taken by the -2, -3... suffixes.
+# Slugs never contain %, and _ is escaped so it doesn't match any character.
+TAKEN_SLUGS_SQL = f"""
+    SELECT slug FROM {Product._meta.db_table}, unnest(%s::varchar[]) AS base
+    WHERE slug = base OR slug LIKE replace(base, '_', '\\_') || '-%%'
+"""
+
+# Only rows with an explicit slug update existing products. A slug repeated
+# within a batch keeps its last row, since ON CONFLICT can't touch the same
+# row twice in one statement. Rows whose values didn't change are left alone
+# so their updated_at (and the catalog ETags) stay put.
+MERGE_SQL = f"""
+    INSERT INTO {Product._meta.db_table} AS product
+        ({', '.join(COLUMNS)}, created_at, updated_at)
+    SELECT DISTINCT ON (slug) {', '.join(COLUMNS)}, now(), now()
+    FROM {STAGING_TABLE}
+    WHERE NOT generated
+    ORDER BY slug, line DESC
+    ON CONFLICT (slug) DO UPDATE SET
+        name = EXCLUDED.name,
+        category_id = EXCLUDED.category_id,
+        description = EXCLUDED.description,
+        price = EXCLUDED.price,
+        stock = EXCLUDED.stock,
+        updated_at = EXCLUDED.updated_at
+    WHERE (product.name, product.category_id, product.description, product.price, product.stock)
+        IS DISTINCT FROM
+        (EXCLUDED.name, EXCLUDED.category_id, EXCLUDED.description, EXCLUDED.price, EXCLUDED.stock)
+    RETURNING xmax = 0
+"""
+
+# Rows without a slug always create a product, under a slug made unique first.
+INSERT_SQL = f"""
+    INSERT INTO {Product._meta.db_table} ({', '.join(COLUMNS)}, created_at, updated_at)
+    SELECT {', '.join(COLUMNS)}, now(), now()
+    FROM {STAGING_TABLE}
+    WHERE generated
+"""
+
+SLUG = COLUMNS.index("slug")
+
+
+class ImportReport:
+    """Outcome of an import."""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def skipped(self):
+        """Valid rows that changed nothing: unchanged, or superseded by a later row."""
+        return self.read - self.rejected - self.inserted - self.updated
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line, messages):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, messages))
+
+
+def read_rows(stream, format):
+    """
+    Yield ``(line, record)`` pairs from a CSV or NDJSON text stream.
+
+    Records are dicts of column name to value, read one at a time. An NDJSON
+    line that isn't valid JSON yields ``None`` so it's rejected like any other
+    invalid row instead of stopping the import.
+    """
+    if format == CSV:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except ValueError:
+            yield line, None
+
+
+def format_for_path(path):
+    """Return the format matching a file's extension, ignoring ``.gz``, or ``None``."""
+    suffixes = PurePath(path.removesuffix(".gz")).suffixes
+    return EXTENSIONS.get(suffixes[-1].lower()) if suffixes else None
+
+
+def category_lookup():
+    """
+    Map category references to IDs using the category tree snapshot.
+
+    A category is referenced by its slug or by its path of slugs from the
+    root, e.g. ``all-products/produce/fruits``.
+    """
+    tree = get_category_tree()
+    lookup = {}
+    for category_id in tree:
+        lookup[tree.get(category_id)["slug"].lower()] = category_id
+        lookup[tree.path(category_id).lower()] = category_id
+    return lookup
+
+
+class RowCleaner:
+    """
+    Turns import records into staging rows, validated by the model's own fields.
+
+    Missing slugs are derived from the name. Such a row can't tell which product
+    it means, so it's always created, under a slug made unique when its batch is
+    written; only rows with an explicit slug update existing products.
+    """
+
+    def __init__(self, categories):
+        self.categories = categories
+        self.fields = {
+            name: Product._meta.get_field(name) for name in COLUMNS if name != "category_id"
+        }
+
+    def clean(self, record):
+        """
+        Return the staging values of ``record`` in ``COLUMNS`` order.
+
+        Returns:
+            tuple: The values, and whether the slug was derived from the name.
+
+        Raises:
+            ValidationError: With one message per invalid column.
+        """
+        if not isinstance(record, dict):
+            raise ValidationError("Expected a JSON object.")
+
+        values, errors = {}, {}
+        generated = False
+        for name, field in self.fields.items():
+            value = self.raw_value(record, name, field)
+            if name == "slug" and not value:
+                value = slugify(record.get("name") or "")[: field.max_length]
+                generated = True
+            try:
+                values[name] = field.clean(value, None)
+            except ValidationError as exc:
+                errors[name] = exc.messages
+
+        reference = str(record.get("category") or "").strip().strip("/").lower()
+        values["category_id"] = self.categories.get(reference)
+        if values["category_id"] is None:
+            errors["category"] = [f"Unknown category '{reference}'."]
+
+        if errors:
+            raise ValidationError(errors)
+        return [values[name] for name in COLUMNS], generated
+
+    @staticmethod
+    def raw_value(record, name, field):
+        """Return the value of a column before validation, with blanks defaulted."""
+        value = record.get(name)
+        if value in (None, "") and field.has_default():
+            return field.get_default()
+        if value is None:
+            return ""
+        if isinstance(value, float):
+            # JSON numbers arrive as floats; their shortest repr is what was written.
+            return repr(value)
+        return value
+
+
+def import_products(rows, batch_size=DEFAULT_BATCH_SIZE, on_batch=None):
+    """
+    Upsert products from ``(line, record)`` pairs, keyed by slug.
+
+    Valid rows are written in batches of ``batch_size``: each batch is
+    ``COPY``-ed into a temporary staging table and merged into the product
+    table with ``INSERT ... ON CONFLICT (slug)`` in its own transaction, so
+    memory use doesn't grow with the input and a failure keeps the batches
+    already committed. Rows without a slug are inserted as new products, with
+    ``-2``, ``-3``... appended to the slug made from their name when it's taken.
+    Invalid rows are rejected with their line number.
+
+    Args:
+        rows (iterable): ``(line, record)`` pairs as yielded by :func:`read_rows`.
+        batch_size (int): Rows per ``COPY`` and merge.
+        on_batch (callable): Called with the report after every batch.
+
+    Returns:
+        ImportReport: Row counts, rejected rows and timing.
+    """
+    report = ImportReport()
+    cleaner = RowCleaner(category_lookup())
+    started = time.perf_counter()
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_SQL)
+            batch = []
+
+            for line, record in rows:
+                report.read += 1
+                try:
+                    values, generated = cleaner.clean(record)
+                except ValidationError as exc:
+                    report.reject(line, _messages(exc))
+                    continue
+                batch.append([line, values, generated])
+                if len(batch) >= batch_size:
+                    _merge_batch(cursor, batch, report)
+                    batch = []
+                    report.elapsed = time.perf_counter() - started
+                    if on_batch is not None:
+                        on_batch(report)
+
+            if batch:
+                _merge_batch(cursor, batch, report)
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+    finally:
+        # Batches already merged stay committed when a later one fails.
+        if report.inserted or report.updated:
+            catalog_bulk_changed()
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def _messages(exc):
+    if hasattr(exc, "error_dict"):
+        return [
+            f"{field}: {message}"
+            for field, messages in exc.message_dict.items()
+            for message in messages
+        ]
+    return exc.messages
+
+
+def _assign_slugs(cursor, batch):
+    """Make the generated slugs of a batch unique among existing and explicit slugs."""
+    generated = [values for _, values, generated in batch if generated]
+    if not generated:
+        return
+    taken = {values[SLUG] for _, values, generated in batch if not generated}
+    cursor.execute(TAKEN_SLUGS_SQL, [sorted({values[SLUG] for values in generated})])
+    taken.update(slug for (slug,) in cursor.fetchall())
+
+    max_length = Product._meta.get_field("slug").max_length
+    for values in generated:
+        base = slug = values[SLUG]
+        number = 1
+        while slug in taken:
+            number += 1
+            suffix = f"-{number}"
+            slug = base[: max_length - len(suffix)] + suffix
+        taken.add(slug)
+        values[SLUG] = slug
+
+
+def _merge_batch(cursor, batch, report):
+    buffer = io.StringIO()
+    # Quote everything: in COPY's CSV format an unquoted empty value is NULL.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    with transaction.atomic():
+        _assign_slugs(cursor, batch)
+        writer.writerows([line, *values, generated] for line, values, generated in batch)
+        buffer.seek(0)
+        cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+        cursor.copy_expert(COPY_SQL, buffer)
+        cursor.execute(MERGE_SQL)
+        for (inserted,) in cursor.fetchall():
+            if inserted:
+                report.inserted += 1
+            else:
+                report.updated += 1
+        cursor.execute(INSERT_SQL)
+        report.inserted += cursor.rowcount
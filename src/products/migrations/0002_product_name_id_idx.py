@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["name", "id"], name="product_name_id_idx"),
+        ),
+    ]
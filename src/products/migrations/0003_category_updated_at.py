@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0002_product_name_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["updated_at"], name="product_updated_at_idx"),
+        ),
+    ]
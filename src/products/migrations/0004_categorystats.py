@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:59
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+import django.db.models.deletion
+
+
+def populate_category_stats(apps, schema_editor):
+    Category = apps.get_model("products", "Category")
+    CategoryStats = apps.get_model("products", "CategoryStats")
+    Product = apps.get_model("products", "Product")
+
+    own = {
+        row.pop("category_id"): row
+        for row in Product.objects.order_by()
+        .values("category_id")
+        .annotate(
+            product_count=Count("id"),
+            price_total=Sum("price"),
+            stock_total=Sum("stock"),
+            min_price=Min("price"),
+            max_price=Max("price"),
+        )
+    }
+    categories = list(Category.objects.values("id", "tree_id", "lft", "rght"))
+
+    rows = []
+    for category in categories:
+        subtree = [
+            own[other["id"]]
+            for other in categories
+            if other["id"] in own
+            and other["tree_id"] == category["tree_id"]
+            and category["lft"] <= other["lft"] <= category["rght"]
+        ]
+        rows.append(
+            CategoryStats(
+                category_id=category["id"],
+                **own.get(category["id"], {}),
+                subtree_product_count=sum(row["product_count"] for row in subtree),
+                subtree_price_total=sum(row["price_total"] for row in subtree),
+                subtree_stock_total=sum(row["stock_total"] for row in subtree),
+                subtree_min_price=min((row["min_price"] for row in subtree), default=None),
+                subtree_max_price=max((row["max_price"] for row in subtree), default=None),
+            )
+        )
+    CategoryStats.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0003_category_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryStats",
+            fields=[
+                (
+                    "category",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="products.category",
+                    ),
+                ),
+                ("product_count", models.PositiveIntegerField(default=0)),
+                ("price_total", models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ("stock_total", models.PositiveBigIntegerField(default=0)),
+                (
+                    "min_price",
+                    models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+                ),
+                (
+                    "max_price",
+                    models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+                ),
+                ("subtree_product_count", models.PositiveIntegerField(default=0)),
+                (
+                    "subtree_price_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("subtree_stock_total", models.PositiveBigIntegerField(default=0)),
+                (
+                    "subtree_min_price",
+                    models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+                ),
+                (
+                    "subtree_max_price",
+                    models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+                ),
+            ],
+            options={
+                "verbose_name": "Category statistics",
+                "verbose_name_plural": "Category statistics",
+            },
+        ),
+        migrations.RunPython(populate_category_stats, migrations.RunPython.noop),
+    ]
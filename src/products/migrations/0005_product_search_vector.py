@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_categorystats"),
+    ]
+
+    operations = [
+        # Stored generated column: Postgres keeps it in sync on every write,
+        # including bulk inserts and raw SQL, so it is not a model field.
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE products_product ADD COLUMN search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A')
+                    || setweight(
+                        to_tsvector('english'::regconfig, coalesce(description, '')), 'B'
+                    )
+                ) STORED;
+            CREATE INDEX product_search_vector_idx
+                ON products_product USING GIN (search_vector);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS product_search_vector_idx;
+            ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector;
+            """,
+        ),
+        # The trigram fallback is optional: skip it where pg_trgm isn't
+        # shipped or the role may not create extensions.
+        migrations.RunSQL(
+            sql="""
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                    CREATE INDEX IF NOT EXISTS product_name_trgm_idx
+                        ON products_product USING GIN (name gin_trgm_ops);
+                END IF;
+            EXCEPTION WHEN insufficient_privilege THEN
+                RAISE NOTICE 'pg_trgm unavailable, typo-tolerant search disabled';
+            END
+            $$;
+            """,
+            reverse_sql="DROP INDEX IF EXISTS product_name_trgm_idx;",
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0005_product_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(fields=["tree_id", "lft"], name="category_tree_lft_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["category", "price"], name="product_category_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["category", "stock"], name="product_category_stock_idx"),
+        ),
+    ]
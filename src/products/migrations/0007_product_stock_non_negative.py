@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0006_facet_indexes"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="product",
+            constraint=models.CheckConstraint(
+                check=models.Q(("stock__gte", 0)), name="product_stock_non_negative"
+            ),
+        ),
+    ]
@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from mptt.models import MPTTModel, TreeForeignKey
 
+from core.models import LoadedValuesMixin
 
-class Category(MPTTModel):
+
+class Category(LoadedValuesMixin, MPTTModel):
     """
     Category model using MPTT to support a hierarchical structure of arbitrary depth.
     Examples:
@@ -21,6 +23,7 @@ class Category(MPTTModel):
     parent = TreeForeignKey(
         "self", on_delete=models.CASCADE, null=True, blank=True, related_name="children"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class MPTTMeta:
         order_insertion_by = ["name"]
@@ -28,6 +31,10 @@ class Category(MPTTModel):
     class Meta:
         verbose_name = "Category"
         verbose_name_plural = "Categories"
+        indexes = [
+            # Serves subtree filters, which are lft ranges within a tree.
+            models.Index(fields=["tree_id", "lft"], name="category_tree_lft_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -38,7 +45,7 @@ class Category(MPTTModel):
         super().save(*args, **kwargs)
 
 
-class Product(models.Model):
+class Product(LoadedValuesMixin, models.Model):
     """
     Simple product model with category relationship.
     """
@@ -54,6 +61,19 @@ class Product(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Serves keyset pagination over (name, id).
+            models.Index(fields=["name", "id"], name="product_name_id_idx"),
+            # Serves max(updated_at) for conditional GET validators.
+            models.Index(fields=["updated_at"], name="product_updated_at_idx"),
+            # Serve category plus price or stock filters and their facet counts.
+            models.Index(fields=["category", "price"], name="product_category_price_idx"),
+            models.Index(fields=["category", "stock"], name="product_category_stock_idx"),
+        ]
+        constraints = [
+            # Stock is decremented with set-based UPDATEs; never let one oversell.
+            models.CheckConstraint(check=models.Q(stock__gte=0), name="product_stock_non_negative"),
+        ]
 
     def __str__(self):
         return self.name
@@ -61,4 +81,39 @@ class Product(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        # The statistics handlers lock the stored row in pre_save and apply the
+        # change in post_save, so both must run in one transaction.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class CategoryStats(models.Model):
+    """
+    Precomputed price and stock statistics for a category.
+
+    The plain columns cover the products filed directly under the category and
+    the ``subtree_`` columns roll those up over all of its descendants. Rows are
+    kept current by the product signal handlers and can be rebuilt with the
+    ``rebuild_category_stats`` management command.
+    """
+
+    category = models.OneToOneField(
+        Category, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    product_count = models.PositiveIntegerField(default=0)
+    price_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    stock_total = models.PositiveBigIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    subtree_product_count = models.PositiveIntegerField(default=0)
+    subtree_price_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    subtree_stock_total = models.PositiveBigIntegerField(default=0)
+    subtree_min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    subtree_max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Category statistics"
+        verbose_name_plural = "Category statistics"
+
+    def __str__(self):
+        return f"Statistics for {self.category_id}"
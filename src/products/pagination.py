@@ -0,0 +1,202 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a unique, composite ordering.
+
+    Pages are addressed by an opaque cursor holding the ordering values of the
+    last row seen, so every page is a single indexed range scan no matter how
+    deep the client pages, and no ``COUNT(*)`` is ever issued.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    default_page_size = 50
+    max_page_size = 200
+
+    # Must be unique as a whole and backed by a composite index. A leading
+    # "-" sorts that field in descending order.
+    ordering = ("id",)
+
+    def get_page_size(self, request):
+        page_size = self.default_page_size
+
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                page_size = int(raw)
+            except ValueError:
+                pass
+
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor["reverse"]
+
+        if cursor is not None:
+            position = self._to_python(queryset, cursor["position"])
+            queryset = queryset.filter(self._seek_filter(position, reverse))
+
+        order_by = [
+            f"-{name}" if descending != reverse else name
+            for name, descending in self._ordering_fields()
+        ]
+        results = list(queryset.order_by(*order_by)[: self.page_size + 1])
+
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Moving forward there is a previous page iff we came from a cursor;
+        # moving backward there is always a next page (the one we came from).
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({"p": position, "r": int(reverse)}, separators=(",", ":"))
+        token = base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+            position = payload["p"]
+            reverse = bool(payload.get("r", 0))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {"position": position, "reverse": reverse}
+
+    def _ordering_fields(self):
+        return [(field.lstrip("-"), field.startswith("-")) for field in self.ordering]
+
+    def _position(self, row):
+        # Rows may be model instances or ``.values()`` dicts.
+        names = [name for name, _ in self._ordering_fields()]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def _to_python(self, queryset, position):
+        """
+        Convert the values of a decoded cursor with their fields, so a tampered
+        cursor is rejected instead of failing in the query.
+        """
+        values = []
+        for (name, _), value in zip(self._ordering_fields(), position):
+            annotation = queryset.query.annotations.get(name)
+            if annotation is not None:
+                field = annotation.output_field
+            else:
+                field = queryset.model._meta.get_field(name)
+            try:
+                value = field.to_python(value)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def _seek_filter(self, position, reverse):
+        """
+        Build the row-value comparison ``(a, b) > (x, y)`` as
+        ``a > x OR (a = x AND b > y)``, which Postgres serves from the index.
+        Descending fields compare the other way round.
+        """
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._ordering_fields(), position):
+            lookup = "lt" if descending != reverse else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+
+class ProductCursorPagination(KeysetPagination):
+    """
+    Cursor pagination for the product catalog, keyed on ``Product.Meta.ordering``
+    with the primary key as tie-breaker.
+    """
+
+    ordering = ("name", "id")
+
+    @property
+    def default_page_size(self):
+        return settings.PRODUCTS_PAGE_SIZE
+
+    @property
+    def max_page_size(self):
+        return settings.PRODUCTS_MAX_PAGE_SIZE
+
+
+class ProductSearchPagination(ProductCursorPagination):
+    """
+    Cursor pagination for product search results, best match first.
+
+    Expects the queryset to be annotated with a ``rank``.
+    """
+
+    ordering = ("-rank", "id")
@@ -82,16 +82,77 @@ def get_standard_responses(include=None, validation_type=None):
     return responses
 
 
+# Query parameters understood by products.filters.ProductFilterBackend
+product_filter_parameters = [
+    OpenApiParameter(
+        name="category_id",
+        description="Filter products by category ID",
+        required=False,
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+    ),
+    OpenApiParameter(
+        name="include_subcategories",
+        description="Also match products in subcategories of category_id (default: false)",
+        required=False,
+        type=OpenApiTypes.BOOL,
+        location=OpenApiParameter.QUERY,
+    ),
+    OpenApiParameter(
+        name="min_price",
+        description="Only products costing at least this much",
+        required=False,
+        type=OpenApiTypes.DECIMAL,
+        location=OpenApiParameter.QUERY,
+    ),
+    OpenApiParameter(
+        name="max_price",
+        description="Only products costing at most this much",
+        required=False,
+        type=OpenApiTypes.DECIMAL,
+        location=OpenApiParameter.QUERY,
+    ),
+    OpenApiParameter(
+        name="in_stock",
+        description="true for products in stock, false for products out of stock",
+        required=False,
+        type=OpenApiTypes.BOOL,
+        location=OpenApiParameter.QUERY,
+    ),
+]
+
+
 list_products_schema = {
     "summary": "List Products",
     "description": """
-    Retrieve a list of all products available in the store.
-    Optional filtering by category is available through query parameters.
+    Retrieve a page of products available in the store, ordered by name.
+    Products can be filtered by category (optionally including subcategories),
+    price range and stock availability.
+
+    The first page includes facet counts for all the filtered products: per
+    child category of the selected category (or per top-level category), per
+    price bucket and in stock versus out of stock. Pages reached through a
+    cursor leave them out, since they don't change from page to page.
+
+    Results are cursor-paginated: follow the `next` and `previous` links to move
+    between pages. Cursors are opaque and should not be built by clients.
+
+    Responses carry `ETag` and `Last-Modified` headers. Send them back as
+    `If-None-Match` or `If-Modified-Since` to get an empty `304 Not Modified`
+    while the catalog is unchanged.
     """,
     "parameters": [
+        *product_filter_parameters,
         OpenApiParameter(
-            name="category_id",
-            description="Filter products by category ID",
+            name="cursor",
+            description="Opaque pagination cursor taken from a `next` or `previous` link",
+            required=False,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+        OpenApiParameter(
+            name="page_size",
+            description="Number of products per page (default: 50, maximum: 200)",
             required=False,
             type=OpenApiTypes.INT,
             location=OpenApiParameter.QUERY,
@@ -100,44 +161,347 @@ list_products_schema = {
     "responses": {
         status.HTTP_200_OK: create_success_example(
             "Product List Success",
-            data=[
-                {
-                    "id": 1,
-                    "name": "Organic Bananas",
-                    "slug": "organic-bananas",
-                    "category": {
-                        "id": 3,
-                        "name": "Fruits",
-                        "slug": "fruits",
-                        "parent": 2,
+            data={
+                "next": "http://localhost:8000/api/products/?cursor=eyJwIjpbIldob2xlIl19",
+                "previous": None,
+                "results": [
+                    {
+                        "id": 1,
+                        "name": "Organic Bananas",
+                        "slug": "organic-bananas",
+                        "category": {
+                            "id": 3,
+                            "name": "Fruits",
+                            "slug": "fruits",
+                            "parent": 2,
+                        },
+                        "description": "Fresh organic bananas, locally sourced",
+                        "price": "2.99",
+                        "stock": 50,
                     },
-                    "description": "Fresh organic bananas, locally sourced",
-                    "price": "2.99",
-                    "stock": 50,
-                },
-                {
-                    "id": 2,
-                    "name": "Whole Wheat Bread",
-                    "slug": "whole-wheat-bread",
-                    "category": {
-                        "id": 5,
-                        "name": "Bread",
-                        "slug": "bread",
-                        "parent": 4,
+                    {
+                        "id": 2,
+                        "name": "Whole Wheat Bread",
+                        "slug": "whole-wheat-bread",
+                        "category": {
+                            "id": 5,
+                            "name": "Bread",
+                            "slug": "bread",
+                            "parent": 4,
+                        },
+                        "description": "Freshly baked whole wheat bread",
+                        "price": "3.49",
+                        "stock": 20,
                     },
-                    "description": "Freshly baked whole wheat bread",
-                    "price": "3.49",
-                    "stock": 20,
+                ],
+                "facets": {
+                    "categories": [
+                        {"id": 2, "name": "Produce", "count": 1},
+                        {"id": 4, "name": "Bakery", "count": 1},
+                    ],
+                    "price": [
+                        {"min": "0.00", "max": "5.00", "count": 2},
+                        {"min": "5.00", "max": "10.00", "count": 0},
+                        {"min": "10.00", "max": "20.00", "count": 0},
+                        {"min": "20.00", "max": "50.00", "count": 0},
+                        {"min": "50.00", "max": None, "count": 0},
+                    ],
+                    "stock": {"in_stock": 2, "out_of_stock": 0},
                 },
-            ],
+            },
             message="Products retrieved successfully",
             status_code=200,
         ),
-        **get_standard_responses(include=[401, 404]),
+        **get_standard_responses(include=[400, 401, 404]),
     },
 }
 
 
+search_products_schema = {
+    "summary": "Search Products",
+    "description": """
+    Full-text search over product names and descriptions, best match first.
+    Name matches rank above description matches. The query accepts web search
+    syntax: `"quoted phrases"`, `or` and `-excluded` words. When nothing matches,
+    names are matched by similarity so that small typos still find products.
+
+    Results are cursor-paginated like the product list and accept the same
+    category, price and stock filters.
+    """,
+    "parameters": [
+        OpenApiParameter(
+            name="q",
+            description="Search text",
+            required=True,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+        *product_filter_parameters,
+        OpenApiParameter(
+            name="cursor",
+            description="Opaque pagination cursor taken from a `next` or `previous` link",
+            required=False,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+        OpenApiParameter(
+            name="page_size",
+            description="Number of products per page (default: 50, maximum: 200)",
+            required=False,
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+        ),
+    ],
+    "responses": {
+        status.HTTP_200_OK: create_success_example(
+            "Product Search Success",
+            data={
+                "next": None,
+                "previous": None,
+                "results": [
+                    {
+                        "id": 1,
+                        "name": "Organic Bananas",
+                        "slug": "organic-bananas",
+                        "category": {
+                            "id": 3,
+                            "name": "Fruits",
+                            "slug": "fruits",
+                            "parent": 2,
+                        },
+                        "description": "Fresh organic bananas, locally sourced",
+                        "price": "2.99",
+                        "stock": 50,
+                    },
+                ],
+            },
+            message="Products retrieved successfully",
+            status_code=200,
+        ),
+        **get_standard_responses(include=[400, 404]),
+    },
+}
+
+
+suggest_products_schema = {
+    "summary": "Autocomplete Product and Category Names",
+    "description": """
+    Suggest product and category names starting with what the user has typed,
+    most popular first. Any word of a name can be the start of the match, so
+    `ban` suggests both "Banana Bread" and "Organic Bananas".
+
+    Served from an in-memory index, this endpoint is meant to be called on every
+    keystroke. Popularity is the number of units ordered.
+    """,
+    "parameters": [
+        OpenApiParameter(
+            name="prefix",
+            description="Beginning of a product or category name",
+            required=True,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+        ),
+        OpenApiParameter(
+            name="limit",
+            description="Maximum number of suggestions (default: 10, maximum: 20)",
+            required=False,
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+        ),
+    ],
+    "responses": {
+        status.HTTP_200_OK: {
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "suggestions": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "type": {"type": "string", "enum": ["product", "category"]},
+                                "id": {"type": "integer"},
+                                "name": {"type": "string"},
+                            },
+                        },
+                    },
+                },
+            },
+            "examples": [
+                {
+                    "name": "Suggestions for 'ban'",
+                    "value": {
+                        "suggestions": [
+                            {"type": "product", "id": 1, "name": "Organic Bananas"},
+                            {"type": "product", "id": 7, "name": "Banana Bread"},
+                        ]
+                    },
+                }
+            ],
+        },
+        **get_standard_responses(include=[400]),
+    },
+}
+
+
+bulk_create_products_schema = {
+    "summary": "Bulk Create Products",
+    "description": """
+    Create many products in one request (staff only), e.g. from a supplier upload.
+
+    The whole upload is validated before anything is written: if any product is
+    invalid, nothing is created and `products` in the error response lists the
+    errors of each product at its position in the upload (empty for valid ones).
+    """,
+    "responses": {
+        status.HTTP_201_CREATED: {
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "count": {"type": "integer", "example": 2},
+                    "ids": {"type": "array", "items": {"type": "integer"}, "example": [41, 42]},
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "products": {
+                        "type": "array",
+                        "items": {"type": "object"},
+                        "example": [
+                            {},
+                            {"slug": ["product with this slug already exists."]},
+                        ],
+                    },
+                },
+            },
+        },
+        **get_standard_responses(include=[401, 403]),
+    },
+    "examples": [
+        OpenApiExample(
+            "Supplier Upload",
+            value={
+                "products": [
+                    {
+                        "name": "Organic Bananas",
+                        "slug": "organic-bananas",
+                        "category": 3,
+                        "description": "Fresh organic bananas",
+                        "price": "2.99",
+                        "stock": 50,
+                    },
+                    {
+                        "name": "Whole Wheat Bread",
+                        "slug": "whole-wheat-bread",
+                        "category": 5,
+                        "price": "3.49",
+                        "stock": 20,
+                    },
+                ]
+            },
+            request_only=True,
+        ),
+    ],
+}
+
+
+bulk_update_stock_prices_schema = {
+    "summary": "Bulk Update Stock and Prices",
+    "description": """
+    Set the stock and/or price of many products in one request (staff only),
+    e.g. a stock sync from the warehouse system.
+
+    Each row names a product by `id` or `slug` and gives `stock`, `price` or
+    both. All rows are validated before anything is written; then they are
+    applied in a few set-based statements. The response lists the IDs of the
+    products that changed, counts the rows that already matched and lists the
+    IDs and slugs that matched no product.
+    """,
+    "responses": {
+        status.HTTP_200_OK: {
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "updated": {"type": "array", "items": {"type": "integer"}, "example": [41]},
+                    "unchanged": {"type": "integer", "example": 1},
+                    "unknown_ids": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "example": [999],
+                    },
+                    "unknown_slugs": {"type": "array", "items": {"type": "string"}, "example": []},
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "products": {
+                        "type": "array",
+                        "items": {"type": "object"},
+                        "example": [{}, {"non_field_errors": ["Provide either id or slug."]}],
+                    },
+                },
+            },
+        },
+        **get_standard_responses(include=[401, 403]),
+    },
+    "examples": [
+        OpenApiExample(
+            "Warehouse Sync",
+            value={
+                "products": [
+                    {"id": 41, "stock": 120},
+                    {"slug": "whole-wheat-bread", "stock": 0, "price": "3.29"},
+                    {"id": 999, "stock": 5},
+                ]
+            },
+            request_only=True,
+        ),
+    ],
+}
+
+export_products_schema = {
+    "summary": "Export Products",
+    "description": """
+    Download the whole catalog, or the products matching the filters, as a file
+    (authenticated users only).
+
+    Rows are streamed straight from a database cursor, ordered by ID, so the
+    download starts immediately whatever the size of the catalog. The `category`
+    column is the category's slug path (e.g. `all-products/produce/fruits`), the
+    format accepted by the `import_products` management command.
+    """,
+    "parameters": [
+        *product_filter_parameters,
+        OpenApiParameter(
+            name="export_format",
+            description="File format (default: ndjson)",
+            required=False,
+            type=OpenApiTypes.STR,
+            enum=["ndjson", "csv"],
+            location=OpenApiParameter.QUERY,
+        ),
+        OpenApiParameter(
+            name="gzip",
+            description="Compress the file with gzip (default: false)",
+            required=False,
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+        ),
+    ],
+    "responses": {
+        (status.HTTP_200_OK, "application/x-ndjson"): OpenApiTypes.STR,
+        (status.HTTP_200_OK, "text/csv"): OpenApiTypes.STR,
+        (status.HTTP_200_OK, "application/gzip"): OpenApiTypes.BINARY,
+        **get_standard_responses(include=[400, 401]),
+    },
+}
+
 retrieve_product_schema = {
     "summary": "Get Product Details",
     "description": "Retrieve detailed information about a specific product by ID.",
@@ -169,8 +533,12 @@ retrieve_product_schema = {
 category_average_price_schema = {
     "summary": "Calculate Average Price for Category",
     "description": """
-    Calculate the average price of all products in a specified category.
-    Optionally include products from all subcategories in the calculation.
+    Calculate the average, minimum and maximum price and the number of products
+    in a specified category. Optionally include products from all subcategories
+    in the calculation.
+
+    Figures are read from precomputed category statistics, so the cost does not
+    grow with the number of products.
     """,
     "parameters": [
         OpenApiParameter(
@@ -194,12 +562,30 @@ category_average_price_schema = {
                 "type": "object",
                 "properties": {
                     "average_price": {"type": "number", "format": "float", "example": 3.99},
+                    "min_price": {
+                        "type": "number",
+                        "format": "float",
+                        "nullable": True,
+                        "example": 0.99,
+                    },
+                    "max_price": {
+                        "type": "number",
+                        "format": "float",
+                        "nullable": True,
+                        "example": 8.49,
+                    },
+                    "product_count": {"type": "integer", "example": 12},
                 },
             },
             "examples": [
                 {
                     "name": "Produce Category Average",
-                    "value": {"average_price": 3.99},
+                    "value": {
+                        "average_price": 3.99,
+                        "min_price": 0.99,
+                        "max_price": 8.49,
+                        "product_count": 12,
+                    },
                 }
             ],
         },
@@ -0,0 +1,63 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+# Text search configuration of the generated ``search_vector`` column.
+SEARCH_CONFIG = "english"
+
+# The ``search_vector`` column is generated by Postgres (see migration 0005)
+# and deliberately not a model field, so Django never tries to write it.
+SEARCH_VECTOR = RawSQL('"products_product"."search_vector"', [], output_field=SearchVectorField())
+
+_trigram_available = None
+
+
+def trigram_available():
+    """Return whether the ``pg_trgm`` extension is installed in the database."""
+    global _trigram_available
+
+    if _trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available = cursor.fetchone() is not None
+    return _trigram_available
+
+
+def search_products(queryset, terms):
+    """
+    Filter a product queryset by full-text search and annotate each match with a ``rank``.
+
+    ``terms`` uses web search syntax (quoted phrases, ``or``, ``-exclusion``)
+    against the weighted name/description vector, ranked with ``ts_rank``. If
+    nothing matches and ``pg_trgm`` is installed, falls back to trigram word
+    similarity on the name, which tolerates typos.
+
+    Args:
+        queryset (QuerySet): Products to search.
+        terms (str): The user's search text.
+
+    Returns:
+        QuerySet: Matching products annotated with ``rank``.
+    """
+    query = SearchQuery(terms, search_type="websearch", config=SEARCH_CONFIG)
+    matches = queryset.alias(document=SEARCH_VECTOR).filter(document=query)
+
+    if not trigram_available() or matches.exists():
+        return matches.annotate(rank=_exact(SearchRank(SEARCH_VECTOR, query)))
+
+    return queryset.filter(name__trigram_word_similar=terms).annotate(
+        rank=_exact(TrigramWordSimilarity(terms, "name"))
+    )
+
+
+def _exact(score):
+    # Both scores are ``real``; as ``double precision`` they survive the round
+    # trip through a pagination cursor and compare equal to themselves.
+    return Cast(score, FloatField())
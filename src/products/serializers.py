@@ -1,9 +1,16 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 
+from core.eager_loading import EagerLoadingMixin
+
 from .models import Category, Product
+from .services import catalog_bulk_changed
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Simple serializer for Category model.
     """
@@ -14,7 +21,7 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "name", "slug", "parent"]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Read-only serializer for the Product model.
     """
@@ -38,36 +45,153 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
+class BulkProductRowSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk product upload without touching the database.
+
+    Category existence and slug uniqueness are checked for the whole batch at
+    once by ``BulkProductCreateSerializer``.
+    """
+
+    category = serializers.IntegerField()
+
+    class Meta:
+        model = Product
+        fields = ["name", "slug", "category", "description", "price", "stock"]
+        extra_kwargs = {"slug": {"validators": []}}
+
+
 class BulkProductCreateSerializer(serializers.Serializer):
     """
     Serializer for creating multiple products at once.
+
+    Errors are reported per row: ``errors["products"][i]`` holds the errors of
+    the i-th product, or is empty if that product is valid.
     """
 
     products = serializers.ListField(child=serializers.DictField())
 
+    default_error_messages = {
+        "does_not_exist": serializers.PrimaryKeyRelatedField.default_error_messages[
+            "does_not_exist"
+        ],
+        "slug_exists": "product with this slug already exists.",
+        "slug_repeated": "This slug is used by another product in the upload.",
+    }
+
     def validate_products(self, products):
-        """Validate each product individually using ProductCreateSerializer."""
+        """
+        Validate every product, resolving categories and checking slugs in bulk.
+
+        Each row's fields are validated by a single shared row serializer; then
+        one ``IN`` query loads the referenced categories and another finds slugs
+        that are already taken.
+        """
+        row_serializer = BulkProductRowSerializer()
         validated_products = []
         errors = []
 
-        for i, product_data in enumerate(products):
-            serializer = ProductCreateSerializer(data=product_data)
-            if serializer.is_valid():
-                validated_products.append(serializer.validated_data)
-            else:
-                errors.append(serializer.errors)
-
-        if errors:
+        for product_data in products:
+            try:
+                validated_products.append(row_serializer.run_validation(product_data))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                validated_products.append(None)
+                errors.append(exc.detail)
+
+        valid = [data for data in validated_products if data is not None]
+        categories = Category.objects.in_bulk({data["category"] for data in valid})
+        slugs = [data["slug"] for data in valid]
+        taken = set(Product.objects.filter(slug__in=slugs).values_list("slug", flat=True))
+        repeated = {slug for slug, count in Counter(slugs).items() if count > 1}
+
+        for data, row_errors in zip(validated_products, errors):
+            if data is None:
+                continue
+            category = categories.get(data["category"])
+            if category is None:
+                row_errors["category"] = [
+                    self.error_messages["does_not_exist"].format(pk_value=data["category"])
+                ]
+            data["category"] = category
+            if data["slug"] in taken:
+                row_errors["slug"] = [self.error_messages["slug_exists"]]
+            elif data["slug"] in repeated:
+                row_errors["slug"] = [self.error_messages["slug_repeated"]]
+
+        if any(errors):
             raise serializers.ValidationError(errors)
 
         return validated_products
 
     def create(self, validated_data):
-        products_data = validated_data.get("products")
-        products = []
+        """
+        Insert the products with ``bulk_create`` in ``PRODUCTS_BULK_CREATE_BATCH_SIZE`` batches.
+        """
+        products = [Product(**product_data) for product_data in validated_data["products"]]
 
-        for product_data in products_data:
-            product = Product.objects.create(**product_data)
-            products.append(product)
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                products, batch_size=settings.PRODUCTS_BULK_CREATE_BATCH_SIZE
+            )
+            catalog_bulk_changed({product.category_id for product in products})
 
         return {"products": products}
+
+
+class ProductStockPriceRowSerializer(serializers.ModelSerializer):
+    """
+    Validates one stock and price update, addressed by product ID or slug.
+
+    Whether the product exists is found out when the update is applied.
+    """
+
+    id = serializers.IntegerField(required=False, min_value=1)
+
+    default_error_messages = {
+        "key": "Provide either id or slug.",
+        "empty": "Provide stock, price or both.",
+    }
+
+    class Meta:
+        model = Product
+        fields = ["id", "slug", "stock", "price"]
+        extra_kwargs = {
+            "slug": {"required": False, "validators": []},
+            "stock": {"required": False},
+            "price": {"required": False},
+        }
+
+    def validate(self, attrs):
+        if ("id" in attrs) == ("slug" in attrs):
+            self.fail("key")
+        if "stock" not in attrs and "price" not in attrs:
+            self.fail("empty")
+        return attrs
+
+
+class BulkProductStockPriceSerializer(serializers.Serializer):
+    """
+    Serializer for updating the stock and price of many products at once.
+
+    Errors are reported per row like in ``BulkProductCreateSerializer``.
+    """
+
+    products = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_products(self, products):
+        row_serializer = ProductStockPriceRowSerializer()
+        validated_products = []
+        errors = []
+
+        for product_data in products:
+            try:
+                validated_products.append(row_serializer.run_validation(product_data))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return validated_products
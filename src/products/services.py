@@ -0,0 +1,193 @@
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import cache
+from .conditional import record_deletion
+from .models import Product
+from .stats import rebuild_category_stats, record_stock_changes
+from .suggest import invalidate_suggest_index
+
+
+def catalog_bulk_changed(category_ids=None, deleted=False, renamed=True):
+    """
+    Bring everything derived from the product table up to date after a bulk write.
+
+    Set-based writes (``bulk_create``, ``QuerySet.update``, ``COPY``, raw SQL)
+    don't send model signals, so they must call this once they are done instead
+    of relying on the per-row handlers in ``products.signals``.
+
+    Args:
+        category_ids (iterable): Categories whose products were written, before
+            and after the write, so only their statistics are recomputed.
+            ``None`` recomputes every category.
+        deleted (bool): Whether the write removed products, which the conditional
+            GET validators can't otherwise detect.
+        renamed (bool): Whether product names may have changed, or products
+            were added or removed, so the autocomplete index is out of date.
+    """
+    cache.invalidate(cache.PRODUCT_LIST, cache.PRODUCT_DETAIL, cache.CATEGORY_PRICES)
+    if deleted:
+        record_deletion(Product)
+    rebuild_category_stats(category_ids)
+    if renamed:
+        transaction.on_commit(invalidate_suggest_index)
+
+
+def decrement_stock(quantities):
+    """
+    Take ordered quantities out of stock, refusing to go below zero.
+
+    The products are locked in ID order, so concurrent orders sharing products
+    can't deadlock, and then decremented by a single conditional
+    ``UPDATE ... WHERE stock >= quantity`` covering all of them. A product
+    without enough stock is left untouched; the caller must then roll back
+    the surrounding transaction. Runs a fixed number of queries however many
+    products there are.
+
+    Args:
+        quantities (dict): Product ID to the quantity to take out of stock.
+
+    Returns:
+        dict: Product ID to current price for every product that was
+        decremented. Missing IDs had too little stock (or don't exist).
+    """
+    if not quantities:
+        return {}
+    table = Product._meta.db_table
+    values = ", ".join(["(%s::bigint, %s::integer)"] * len(quantities))
+    params = [timezone.now(), *(value for item in quantities.items() for value in item)]
+
+    # No savepoint: on a shortage the caller rolls back the whole transaction anyway.
+    with transaction.atomic(savepoint=False):
+        list(
+            Product.objects.select_for_update()
+            .filter(pk__in=list(quantities))
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS product SET
+                    stock = product.stock - line.quantity,
+                    updated_at = %s
+                FROM (VALUES {values}) AS line (id, quantity)
+                WHERE product.id = line.id AND product.stock >= line.quantity
+                RETURNING product.id, product.price, product.category_id
+                """,
+                params,
+            )
+            decremented = cursor.fetchall()
+
+        if len(decremented) < len(quantities):
+            return {product_id: price for product_id, price, _ in decremented}
+
+        changes = Counter()
+        for product_id, _, category_id in decremented:
+            changes[category_id] -= quantities[product_id]
+        record_stock_changes(changes)
+
+    cache.invalidate_products([product_id for product_id, _, _ in decremented])
+    return {product_id: price for product_id, price, _ in decremented}
+
+
+class StockPriceReport:
+    """Outcome of :func:`update_stock_and_prices`."""
+
+    def __init__(self):
+        self.updated = []
+        self.unchanged = 0
+        self.unknown_ids = []
+        self.unknown_slugs = []
+        # Categories of the updated products, whose statistics need refreshing.
+        self.category_ids = set()
+
+    def as_dict(self):
+        return {
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "unknown_ids": self.unknown_ids,
+            "unknown_slugs": self.unknown_slugs,
+        }
+
+
+def update_stock_and_prices(rows, batch_size=None):
+    """
+    Set the stock and/or price of many products with one statement per batch.
+
+    Each batch is a single ``UPDATE ... FROM (VALUES ...)`` that only touches
+    products whose values actually change, stamping their ``updated_at``.
+    The same statement reports which keys matched no product. When a key
+    appears more than once in a batch, its last row wins.
+
+    Args:
+        rows (iterable): Dicts with ``id`` or ``slug`` and ``stock``, ``price``
+            or both, e.g. as validated by ``ProductStockPriceRowSerializer``.
+            Consumed lazily, one batch at a time.
+        batch_size (int): Rows per statement. Defaults to
+            ``PRODUCTS_BULK_UPDATE_BATCH_SIZE``.
+
+    Returns:
+        StockPriceReport: Updated product IDs, the number of unchanged rows and
+        the unknown IDs and slugs.
+    """
+    batch_size = batch_size or settings.PRODUCTS_BULK_UPDATE_BATCH_SIZE
+    report = StockPriceReport()
+    rows = iter(rows)
+
+    try:
+        while batch := list(islice(rows, batch_size)):
+            with transaction.atomic(), connection.cursor() as cursor:
+                for key in ("id", "slug"):
+                    keyed = {row[key]: row for row in batch if key in row}
+                    if keyed:
+                        _update_stock_and_prices(cursor, key, keyed.values(), report)
+    finally:
+        # Batches already updated stay committed when a later one fails.
+        if report.updated:
+            catalog_bulk_changed(report.category_ids, renamed=False)
+    return report
+
+
+def _update_stock_and_prices(cursor, key, rows, report):
+    table = Product._meta.db_table
+    key_type = "bigint" if key == "id" else "varchar"
+    values = ", ".join([f"(%s::{key_type}, %s::integer, %s::numeric)"] * len(rows))
+    params = [value for row in rows for value in (row[key], row.get("stock"), row.get("price"))]
+    params.append(timezone.now())
+
+    cursor.execute(
+        f"""
+        WITH input (key, stock, price) AS (VALUES {values}),
+        changed AS (
+            UPDATE {table} AS product SET
+                stock = COALESCE(input.stock, product.stock),
+                price = COALESCE(input.price, product.price),
+                updated_at = %s
+            FROM input
+            WHERE product.{key} = input.key
+                AND (product.stock, product.price) IS DISTINCT FROM
+                    (COALESCE(input.stock, product.stock), COALESCE(input.price, product.price))
+            RETURNING product.id, product.category_id
+        )
+        SELECT input.key, product.id, changed.id IS NOT NULL, changed.category_id
+        FROM input
+        LEFT JOIN {table} AS product ON product.{key} = input.key
+        LEFT JOIN changed ON changed.id = product.id
+        """,
+        params,
+    )
+
+    unknown = report.unknown_ids if key == "id" else report.unknown_slugs
+    for value, product_id, changed, category_id in cursor.fetchall():
+        if product_id is None:
+            unknown.append(value)
+        elif changed:
+            report.updated.append(product_id)
+            report.category_ids.add(category_id)
+        else:
+            report.unchanged += 1
@@ -0,0 +1,220 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import cache
+from .conditional import record_deletion
+from .models import Category, CategoryStats, Product
+from .stats import (
+    TRACKED_FIELDS,
+    product_state,
+    rebuild_category_stats,
+    record_product_change,
+)
+from .suggest import apply_product_change, invalidate_suggest_index
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed_handler(sender, instance, **kwargs):
+    """
+    Signal handler invalidating the cached catalog responses built from a product.
+
+    Args:
+        sender: The model class (Product)
+        instance: The product that was saved or deleted
+        **kwargs: Additional keyword arguments
+    """
+    cache.invalidate(
+        cache.PRODUCT_LIST,
+        cache.CATEGORY_PRICES,
+        cache.product_namespace(instance.pk),
+    )
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def catalog_row_deleted_handler(sender, instance, **kwargs):
+    """
+    Signal handler recording deletions for the conditional GET validators.
+
+    Args:
+        sender: The model class (Product or Category)
+        instance: The deleted instance
+        **kwargs: Additional keyword arguments
+    """
+    record_deletion(sender)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed_handler(sender, instance, **kwargs):
+    """
+    Signal handler invalidating the cached catalog responses built from a category.
+
+    Products embed their category, so product lists and details are dropped too,
+    and every process reloads its category tree snapshot.
+
+    Args:
+        sender: The model class (Category)
+        instance: The category that was saved or deleted
+        **kwargs: Additional keyword arguments
+    """
+    cache.invalidate(
+        cache.CATEGORY_LIST,
+        cache.CATEGORY_PRICES,
+        cache.PRODUCT_LIST,
+        cache.PRODUCT_DETAIL,
+        cache.CATEGORY_TREE,
+    )
+
+
+@receiver(post_save, sender=Product)
+def product_suggest_save_handler(sender, instance, created, **kwargs):
+    """
+    Signal handler adding new and renamed products to the autocomplete index.
+
+    Args:
+        sender: The model class (Product)
+        instance: The product that was saved
+        created: Whether the product was just created
+        **kwargs: Additional keyword arguments
+    """
+    if created or instance.get_loaded_values("name") != (instance.name,):
+        product_id, name = instance.pk, instance.name
+        transaction.on_commit(lambda: apply_product_change(product_id, name))
+    instance.reset_loaded_values("name")
+
+
+@receiver(post_delete, sender=Product)
+def product_suggest_delete_handler(sender, instance, **kwargs):
+    """
+    Signal handler removing deleted products from the autocomplete index.
+
+    Args:
+        sender: The model class (Product)
+        instance: The product that was deleted
+        **kwargs: Additional keyword arguments
+    """
+    product_id = instance.pk
+    transaction.on_commit(lambda: apply_product_change(product_id, None))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_suggest_handler(sender, instance, **kwargs):
+    """
+    Signal handler rebuilding the autocomplete index after a category change.
+
+    Args:
+        sender: The model class (Category)
+        instance: The category that was saved or deleted
+        **kwargs: Additional keyword arguments
+    """
+    transaction.on_commit(invalidate_suggest_index)
+
+
+@receiver(pre_save, sender=Product)
+def product_lock_handler(sender, instance, raw=False, **kwargs):
+    """
+    Signal handler reading the stored state of a product about to be saved.
+
+    The row is locked inside the save's transaction, so the post_save handlers
+    compare the new values with what the database held rather than with the
+    values a possibly stale instance was loaded with.
+
+    Args:
+        sender: The model class (Product)
+        instance: The product about to be saved
+        raw: Whether the save comes from loading a fixture
+        **kwargs: Additional keyword arguments
+    """
+    if not raw and not instance._state.adding:
+        instance.lock_loaded_values(*TRACKED_FIELDS, "name")
+
+
+@receiver(pre_delete, sender=Product)
+def product_lock_delete_handler(sender, instance, origin=None, **kwargs):
+    """
+    Signal handler reading the stored state of a product about to be deleted.
+
+    Only direct deletes need it: products deleted through a queryset or a
+    cascade were just loaded by the deletion, in its transaction.
+
+    Args:
+        sender: The model class (Product)
+        instance: The product about to be deleted
+        origin: The instance or queryset the deletion started from
+        **kwargs: Additional keyword arguments
+    """
+    if origin is instance:
+        instance.lock_loaded_values(*TRACKED_FIELDS)
+
+
+@receiver(post_save, sender=Product)
+def product_stats_save_handler(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal handler applying a saved product to the category statistics.
+
+    The previous category, price and stock come from the row locked by
+    ``product_lock_handler``; if those are unknown the statistics are rebuilt
+    instead.
+
+    Args:
+        sender: The model class (Product)
+        instance: The product that was saved
+        created: Whether the product was just created
+        raw: Whether the save comes from loading a fixture
+        **kwargs: Additional keyword arguments
+    """
+    if raw:
+        return
+
+    new = product_state(instance)
+    old = None if created else instance.get_loaded_values(*TRACKED_FIELDS)
+    if old is None and not created:
+        rebuild_category_stats()
+    else:
+        record_product_change(old, new)
+    instance.reset_loaded_values(*TRACKED_FIELDS)
+
+
+@receiver(post_delete, sender=Product)
+def product_stats_delete_handler(sender, instance, **kwargs):
+    """
+    Signal handler removing a deleted product from the category statistics.
+
+    Args:
+        sender: The model class (Product)
+        instance: The product that was deleted
+        **kwargs: Additional keyword arguments
+    """
+    old = instance.get_loaded_values(*TRACKED_FIELDS)
+    if old is None:
+        old = product_state(instance)
+    record_product_change(old, None)
+
+
+@receiver(post_save, sender=Category)
+def category_stats_handler(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal handler keeping a statistics row per category.
+
+    Moving a category changes the subtree totals of both its old and new
+    ancestors, so the statistics are rebuilt when the parent changes.
+
+    Args:
+        sender: The model class (Category)
+        instance: The category that was saved
+        created: Whether the category was just created
+        raw: Whether the save comes from loading a fixture
+        **kwargs: Additional keyword arguments
+    """
+    if raw:
+        return
+
+    if created:
+        CategoryStats.objects.get_or_create(category=instance)
+    elif instance.get_loaded_values("parent_id") != (instance.parent_id,):
+        rebuild_category_stats()
+    instance.reset_loaded_values("parent_id")
@@ -0,0 +1,314 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+
+from .models import CategoryStats, Product
+from .tree import CategoryTree, get_category_tree
+
+# Column prefixes of the two scopes kept per category.
+OWN = ""
+SUBTREE = "subtree_"
+
+STAT_FIELDS = ("product_count", "price_total", "stock_total", "min_price", "max_price")
+ALL_STAT_FIELDS = STAT_FIELDS + tuple(SUBTREE + field for field in STAT_FIELDS)
+
+# Values of a scope without products.
+_EMPTY = {
+    "product_count": 0,
+    "price_total": 0,
+    "stock_total": 0,
+    "min_price": None,
+    "max_price": None,
+}
+
+# Product columns the statistics are computed from, in product_state() order.
+TRACKED_FIELDS = ("category_id", "price", "stock")
+
+
+def product_state(product):
+    """
+    Return ``(category_id, price, stock)`` of a product as stored in the database.
+
+    The price is normalised to a ``Decimal`` since unsaved instances may still
+    hold whatever number the caller assigned.
+    """
+    price = Product._meta.get_field("price").to_python(product.price)
+    return (product.category_id, price, product.stock)
+
+
+class _Change:
+    """Accumulated effect of a product change on one scope of one category."""
+
+    def __init__(self):
+        self.count = 0
+        self.price = 0
+        self.stock = 0
+        self.added = Counter()
+        self.removed = Counter()
+
+
+def record_product_change(old, new):
+    """
+    Apply a single product change to the statistics of its categories.
+
+    Counts and totals are adjusted in place for the product's category and all
+    of its ancestors. The minimum and maximum only need a query when the price
+    that leaves a scope was its current minimum or maximum.
+
+    Args:
+        old (tuple): ``(category_id, price, stock)`` before the change, or
+            ``None`` for a new product.
+        new (tuple): ``(category_id, price, stock)`` after the change, or
+            ``None`` for a deleted product.
+    """
+    if old == new:
+        return
+
+    tree = get_category_tree()
+    if any(state is not None and state[0] not in tree for state in (old, new)):
+        rebuild_category_stats()
+        return
+
+    changes = _collect_changes(tree, old, new)
+    with transaction.atomic():
+        rows = _lock_rows(sorted({category_id for category_id, _ in changes}))
+
+        stale = [
+            (category_id, prefix)
+            for (category_id, prefix), change in changes.items()
+            if not _apply_change(rows[category_id], prefix, change)
+        ]
+        for category_id, prefix in stale:
+            scope_ids = [category_id]
+            if prefix == SUBTREE:
+                scope_ids = tree.descendant_ids(category_id, include_self=True)
+            bounds = Product.objects.filter(category_id__in=scope_ids).aggregate(
+                low=Min("price"), high=Max("price")
+            )
+            setattr(rows[category_id], prefix + "min_price", bounds["low"])
+            setattr(rows[category_id], prefix + "max_price", bounds["high"])
+
+        CategoryStats.objects.bulk_update(rows.values(), ALL_STAT_FIELDS)
+
+
+def record_stock_changes(changes):
+    """
+    Apply stock-only changes of many products to the statistics at once.
+
+    Counts and prices don't move, so only the stock totals of the affected
+    categories and their ancestors are adjusted, with one locking read and one
+    bulk update however many products changed.
+
+    Args:
+        changes (dict): Category ID to the net change in stock of its products.
+    """
+    tree = get_category_tree()
+    if any(category_id not in tree for category_id in changes):
+        rebuild_category_stats()
+        return
+
+    own, subtree = Counter(), Counter()
+    for category_id, delta in changes.items():
+        own[category_id] += delta
+        for ancestor_id in tree.ancestor_ids(category_id, include_self=True):
+            subtree[ancestor_id] += delta
+
+    with transaction.atomic(savepoint=False):
+        rows = _lock_rows(sorted(subtree))
+        for category_id, row in rows.items():
+            _add(row, "stock_total", own[category_id])
+            _add(row, SUBTREE + "stock_total", subtree[category_id])
+        CategoryStats.objects.bulk_update(rows.values(), ["stock_total", SUBTREE + "stock_total"])
+
+
+def rebuild_category_stats(category_ids=None):
+    """
+    Recompute category statistics from the ``Product`` table.
+
+    The statistics rows are locked, in the order the per-product changes lock
+    them, before any product is read: a concurrent product change has then
+    either committed and is counted, or is still waiting for its rows and
+    applies its delta on top of the result.
+
+    Without ``category_ids`` every category is recomputed from one grouped
+    aggregate over all products, for repairs and writes that can't tell what
+    they touched. With them only those categories' products are aggregated,
+    and the subtree columns of their ancestors are rolled up from the stored
+    per-category columns.
+
+    Args:
+        category_ids (iterable): Categories whose products changed, or ``None``
+            for all of them.
+
+    Returns:
+        int: Number of categories written.
+    """
+    if category_ids is None:
+        tree = CategoryTree.load()
+        changed = set(tree)
+        products = Product.objects.all()
+    else:
+        tree = get_category_tree()
+        changed = set(category_ids)
+        if any(category_id not in tree for category_id in changed):
+            return rebuild_category_stats()
+        products = Product.objects.filter(category_id__in=changed)
+    scope = {
+        ancestor_id
+        for category_id in changed
+        for ancestor_id in tree.ancestor_ids(category_id, include_self=True)
+    }
+
+    with transaction.atomic():
+        if category_ids is None:
+            CategoryStats.objects.exclude(category_id__in=list(tree)).delete()
+        rows = _lock_rows(sorted(scope))
+
+        own = _aggregate(products)
+        for category_id in changed:
+            values = own.setdefault(category_id, {})
+            for field in STAT_FIELDS:
+                setattr(rows[category_id], field, values.get(field, _EMPTY[field]))
+
+        descendant_ids = {
+            descendant_id
+            for category_id in scope
+            for descendant_id in tree.descendant_ids(category_id, include_self=True)
+        }
+        unchanged = [
+            descendant_id for descendant_id in descendant_ids if descendant_id not in changed
+        ]
+        for row in CategoryStats.objects.filter(category_id__in=unchanged).values(
+            "category_id", *STAT_FIELDS
+        ):
+            own[row.pop("category_id")] = row
+
+        for category_id in scope:
+            subtree = tree.descendant_ids(category_id, include_self=True)
+            _roll_up(rows[category_id], [own.get(descendant_id) for descendant_id in subtree])
+
+        CategoryStats.objects.bulk_update(rows.values(), ALL_STAT_FIELDS)
+    return len(rows)
+
+
+def get_category_stats(category_id):
+    """
+    Return the statistics row of a category, rebuilding the table if it's missing.
+
+    Args:
+        category_id (int): An existing category.
+
+    Returns:
+        CategoryStats: The category's statistics.
+    """
+    stats = CategoryStats.objects.filter(category_id=category_id).first()
+    if stats is None:
+        rebuild_category_stats()
+        stats = CategoryStats.objects.get(category_id=category_id)
+    return stats
+
+
+def _aggregate(products):
+    """Return the per-category statistics of ``products``, by category ID."""
+    return {
+        row.pop("category_id"): row
+        for row in products.order_by()
+        .values("category_id")
+        .annotate(
+            product_count=Count("id"),
+            price_total=Sum("price"),
+            stock_total=Sum("stock"),
+            min_price=Min("price"),
+            max_price=Max("price"),
+        )
+    }
+
+
+def _roll_up(row, scopes):
+    """Set the subtree columns of ``row`` from the per-category values of its subtree."""
+    for field in STAT_FIELDS:
+        setattr(row, SUBTREE + field, _EMPTY[field])
+    for values in scopes:
+        if not values or not values["product_count"]:
+            continue
+        _add(row, SUBTREE + "product_count", values["product_count"])
+        _add(row, SUBTREE + "price_total", values["price_total"])
+        _add(row, SUBTREE + "stock_total", values["stock_total"])
+        row.subtree_min_price = _bound(min, row.subtree_min_price, values["min_price"])
+        row.subtree_max_price = _bound(max, row.subtree_max_price, values["max_price"])
+
+
+def _collect_changes(tree, old, new):
+    changes = defaultdict(_Change)
+    for sign, state in ((-1, old), (1, new)):
+        if state is None:
+            continue
+        category_id, price, stock = state
+        scopes = [(category_id, OWN)] + [
+            (ancestor_id, SUBTREE)
+            for ancestor_id in tree.ancestor_ids(category_id, include_self=True)
+        ]
+        for scope in scopes:
+            change = changes[scope]
+            change.count += sign
+            change.price += sign * price
+            change.stock += sign * stock
+            (change.added if sign > 0 else change.removed)[price] += 1
+
+    for change in changes.values():
+        # A price that leaves and re-enters a scope doesn't move its bounds.
+        common = change.added & change.removed
+        change.added -= common
+        change.removed -= common
+    return changes
+
+
+def _apply_change(row, prefix, change):
+    """Apply ``change`` to one scope of ``row``; return ``False`` if its bounds are stale."""
+    _add(row, prefix + "product_count", change.count)
+    _add(row, prefix + "price_total", change.price)
+    _add(row, prefix + "stock_total", change.stock)
+
+    min_field, max_field = prefix + "min_price", prefix + "max_price"
+    low, high = getattr(row, min_field), getattr(row, max_field)
+    if change.removed:
+        if low is None or min(change.removed) <= low or max(change.removed) >= high:
+            return False
+    if change.added:
+        setattr(row, min_field, _bound(min, low, min(change.added)))
+        setattr(row, max_field, _bound(max, high, max(change.added)))
+    return True
+
+
+def _lock_rows(category_ids):
+    rows = _select_for_update(category_ids)
+    missing = [category_id for category_id in category_ids if category_id not in rows]
+    if missing:
+        CategoryStats.objects.bulk_create(
+            [CategoryStats(category_id=category_id) for category_id in missing],
+            ignore_conflicts=True,
+        )
+        rows = _select_for_update(category_ids)
+    return rows
+
+
+def _select_for_update(category_ids):
+    # Lock in key order so concurrent changes on overlapping paths can't deadlock.
+    queryset = (
+        CategoryStats.objects.select_for_update()
+        .filter(category_id__in=category_ids)
+        .order_by("category_id")
+    )
+    return {row.category_id: row for row in queryset}
+
+
+def _add(row, field, delta):
+    if delta:
+        setattr(row, field, (getattr(row, field) or 0) + delta)
+
+
+def _bound(pick, current, candidate):
+    if current is None:
+        return candidate
+    return pick(current, candidate)
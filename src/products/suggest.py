@@ -0,0 +1,421 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from heapq import nsmallest
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from .cache import KEY_PREFIX
+from .models import Product
+from .tree import get_category_tree
+
+logger = logging.getLogger(__name__)
+
+PRODUCT = "product"
+CATEGORY = "category"
+
+# Prefixes up to this length match large slices of the index, so their best
+# MAX_SUGGESTIONS entries are computed up front.
+SHORT_PREFIX_LENGTH = 2
+MAX_SUGGESTIONS = 20
+
+# How often a process checks the shared state for changes made elsewhere.
+VERSION_CHECK_INTERVAL = 1.0
+
+# Published product changes are kept this long. A process further behind, or
+# with more than MAX_PENDING_CHANGES to apply, rebuilds its index instead.
+CHANGE_TIMEOUT = 60 * 10
+MAX_PENDING_CHANGES = 1000
+
+# How long a change whose number was taken may take to be written before it's
+# considered lost, and the index rebuilt.
+MISSING_CHANGE_GRACE = 5.0
+
+# Bumped when every index must be rebuilt, e.g. after a category change.
+VERSION_KEY = f"{KEY_PREFIX}:suggest-version"
+# Number of the last published product change.
+SEQUENCE_KEY = f"{KEY_PREFIX}:suggest-sequence"
+
+
+def normalize(text):
+    """Fold case and whitespace so lookups are case-insensitive."""
+    return " ".join(text.casefold().split())
+
+
+def index_keys(name):
+    """
+    Return the keys an entry is found under: its name from every word onwards.
+
+    "Organic Bananas" is found by both "org" and "ban".
+    """
+    words = normalize(name).split(" ")
+    return list(dict.fromkeys(" ".join(words[i:]) for i in range(len(words)) if words[i]))
+
+
+class Suggestion:
+    """An autocomplete entry. Ordered best first: most popular, then alphabetical."""
+
+    __slots__ = ("kind", "id", "name", "popularity", "sort_key")
+
+    def __init__(self, kind, id, name, popularity):
+        self.kind = kind
+        self.id = id
+        self.name = name
+        self.popularity = popularity
+        self.sort_key = (-popularity, normalize(name), kind, id)
+
+    def as_dict(self):
+        return {"type": self.kind, "id": self.id, "name": self.name}
+
+
+class SuggestIndex:
+    """
+    Sorted-array prefix index over product and category names.
+
+    ``keys`` is a sorted list with the matching :class:`Suggestion` at the same
+    position in ``entries``; the entries for a prefix are the contiguous run
+    found by bisecting for it. Short prefixes are answered from a precomputed
+    table instead of scanning their (long) runs.
+
+    ``version`` and ``sequence`` record the shared version and the last product
+    change the index reflects. An index being served is never modified: changes
+    are applied to a :meth:`copy` that then takes its place.
+    """
+
+    def __init__(self, suggestions, version=None, sequence=None):
+        self.version = version
+        self.sequence = sequence
+        self.checked_at = self.synced_at = time.monotonic()
+
+        pairs = sorted(
+            (
+                (key, suggestion)
+                for suggestion in suggestions
+                for key in index_keys(suggestion.name)
+            ),
+            key=lambda pair: (pair[0], pair[1].sort_key),
+        )
+        self.keys = [key for key, _ in pairs]
+        self.entries = [suggestion for _, suggestion in pairs]
+        self.products = {s.id: s for s in suggestions if s.kind == PRODUCT}
+
+        self.short = {}
+        for prefix in {key[:length] for key in self.keys for length in _short_lengths(key)}:
+            self._refresh_short(prefix)
+
+    @classmethod
+    def load(cls, version=None, sequence=None):
+        """
+        Build the index from the database.
+
+        Products are ranked by units ordered and categories by the units
+        ordered across their subtree, as of the time the index is built.
+        """
+        tree = get_category_tree()
+        products = list(
+            Product.objects.order_by()
+            .annotate(popularity=Coalesce(Sum("order_items__quantity"), 0))
+            .values_list("id", "name", "category_id", "popularity")
+        )
+
+        suggestions = []
+        category_popularity = dict.fromkeys(tree, 0)
+        for product_id, name, category_id, popularity in products:
+            suggestions.append(Suggestion(PRODUCT, product_id, name, popularity))
+            for ancestor_id in tree.ancestor_ids(category_id, include_self=True):
+                category_popularity[ancestor_id] += popularity
+
+        for category_id, popularity in category_popularity.items():
+            suggestions.append(
+                Suggestion(CATEGORY, category_id, tree.name(category_id), popularity)
+            )
+
+        return cls(suggestions, version=version, sequence=sequence)
+
+    def copy(self):
+        """Return an independent copy of the index, to be changed while this one is served."""
+        index = object.__new__(type(self))
+        index.__dict__.update(self.__dict__)
+        index.keys = list(self.keys)
+        index.entries = list(self.entries)
+        index.products = dict(self.products)
+        index.short = dict(self.short)
+        return index
+
+    def apply_changes(self, changes):
+        """
+        Apply product changes, keeping each product's popularity.
+
+        Args:
+            changes (iterable): ``(product_id, name)`` pairs, ``name`` being
+                ``None`` for a deleted product.
+        """
+        for product_id, name in changes:
+            popularity = self.remove_product(product_id)
+            if name is not None:
+                self.add_product(product_id, name, popularity)
+
+    def suggest(self, prefix, limit=10):
+        """
+        Return the best ``limit`` suggestions starting with ``prefix``.
+
+        Args:
+            prefix (str): What the user has typed so far.
+            limit (int): Maximum number of suggestions, at most ``MAX_SUGGESTIONS``.
+
+        Returns:
+            list: :class:`Suggestion` objects, best first.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            return self.short.get(prefix, [])[:limit]
+
+        start, end = self._run(prefix)
+        unique = {id(entry): entry for entry in self.entries[start:end]}
+        return nsmallest(limit, unique.values(), key=lambda entry: entry.sort_key)
+
+    def add_product(self, product_id, name, popularity=0):
+        """Insert a product into the index."""
+        suggestion = Suggestion(PRODUCT, product_id, name, popularity)
+        self.products[product_id] = suggestion
+        for key in index_keys(name):
+            position = self._position(key, suggestion)
+            self.keys.insert(position, key)
+            self.entries.insert(position, suggestion)
+        self._refresh_short_for(name)
+
+    def remove_product(self, product_id):
+        """Remove a product from the index, returning its popularity."""
+        suggestion = self.products.pop(product_id, None)
+        if suggestion is None:
+            return 0
+        for key in index_keys(suggestion.name):
+            position = self._position(key, suggestion)
+            if position < len(self.entries) and self.entries[position] is suggestion:
+                del self.keys[position]
+                del self.entries[position]
+        self._refresh_short_for(suggestion.name)
+        return suggestion.popularity
+
+    def _run(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        # Every key starting with the prefix sorts before prefix + U+10FFFF.
+        end = bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        return start, end
+
+    def _position(self, key, suggestion):
+        start = bisect_left(self.keys, key)
+        end = bisect_left(self.keys, key + "\0", lo=start)
+        sort_keys = [entry.sort_key for entry in self.entries[start:end]]
+        return start + bisect_left(sort_keys, suggestion.sort_key)
+
+    def _refresh_short_for(self, name):
+        for key in index_keys(name):
+            for length in _short_lengths(key):
+                self._refresh_short(key[:length])
+
+    def _refresh_short(self, prefix):
+        start, end = self._run(prefix)
+        unique = {id(entry): entry for entry in self.entries[start:end]}
+        best = nsmallest(MAX_SUGGESTIONS, unique.values(), key=lambda entry: entry.sort_key)
+        if best:
+            self.short[prefix] = best
+        else:
+            self.short.pop(prefix, None)
+
+
+def _short_lengths(key):
+    return range(1, min(len(key), SHORT_PREFIX_LENGTH) + 1)
+
+
+_index = None
+# Whether a thread is bringing the index up to date.
+_updating = False
+_lock = threading.RLock()
+
+
+def get_suggest_index():
+    """
+    Return this process's autocomplete index, bringing it up to date when due.
+
+    The shared state is checked at most every ``VERSION_CHECK_INTERVAL``
+    seconds, so a lookup normally costs no I/O at all. Only a process without
+    an index builds one while the caller waits; otherwise the current index is
+    served until its replacement is ready (see :func:`_update_later`).
+    """
+    global _index
+
+    index = _index
+    if index is not None and time.monotonic() - index.checked_at < VERSION_CHECK_INTERVAL:
+        return index
+
+    with _lock:
+        if _index is not None and time.monotonic() - _index.checked_at >= VERSION_CHECK_INTERVAL:
+            _catch_up()
+        if _index is None:
+            _index = SuggestIndex.load(*_shared_state())
+        return _index
+
+
+def apply_product_change(product_id, name):
+    """
+    Publish a committed product change and apply it to this process's index.
+
+    Other processes apply it to their own index on their next check. ``name``
+    is ``None`` for a deleted product.
+    """
+    try:
+        sequence = cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        _shared_state()
+        sequence = cache.incr(SEQUENCE_KEY)
+    cache.set(_change_key(sequence), (product_id, name), CHANGE_TIMEOUT)
+
+    with _lock:
+        if _index is not None:
+            _catch_up()
+
+
+def invalidate_suggest_index():
+    """Make every process rebuild its index, serving the current one meanwhile."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        _shared_state()
+
+    with _lock:
+        if _index is not None:
+            _catch_up()
+
+
+def _shared_state():
+    """Return the shared ``(version, sequence)``, creating the counters if needed."""
+    values = cache.get_many([VERSION_KEY, SEQUENCE_KEY])
+    if len(values) < 2:
+        # Counters recreated after an eviction start far from their old values,
+        # so no process mistakes them, or old change keys, for current ones.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        cache.add(SEQUENCE_KEY, time.time_ns(), timeout=None)
+        values = cache.get_many([VERSION_KEY, SEQUENCE_KEY])
+    return values.get(VERSION_KEY), values.get(SEQUENCE_KEY)
+
+
+def _change_key(sequence):
+    return f"{KEY_PREFIX}:suggest-change:{sequence}"
+
+
+def _catch_up():
+    """
+    Check whether this process's index is behind the shared state.
+
+    Called with ``_lock`` held, on the request path: it only reads the shared
+    counters. Bringing the index up to date, by applying the published
+    product changes or by a rebuild when the shared version moved or the
+    changes can't be applied, is left to :func:`_update_later`.
+    """
+    index = _index
+    version, sequence = _shared_state()
+    now = index.checked_at = time.monotonic()
+    if version != index.version or index.sequence is None or sequence is None:
+        _update_later(version, sequence, rebuild=True)
+        return
+    if sequence == index.sequence:
+        index.synced_at = now
+        return
+
+    pending = sequence - index.sequence
+    _update_later(version, sequence, rebuild=pending < 0 or pending > MAX_PENDING_CHANGES)
+
+
+def _update_later(version, sequence, rebuild):
+    """
+    Bring this process's index up to ``version`` and ``sequence``.
+
+    With ``PRODUCTS_SUGGEST_BACKGROUND_REBUILD`` the index is rebuilt, or the
+    published changes applied to a copy of it, in a thread while the current
+    one keeps answering lookups. Otherwise a rebuild drops the index, to be
+    built on next use, and the changes are applied right away.
+    """
+    global _index, _updating
+
+    if not settings.PRODUCTS_SUGGEST_BACKGROUND_REBUILD:
+        if rebuild:
+            _index = None
+        else:
+            _index = _updated(_index, version, sequence, rebuild=False) or _index
+        return
+    if _updating:
+        return
+    _updating = True
+    threading.Thread(
+        target=_update_in_thread,
+        args=(_index, version, sequence, rebuild),
+        name="suggest-update",
+        daemon=True,
+    ).start()
+
+
+def _update_in_thread(index, version, sequence, rebuild):
+    try:
+        _update(index, version, sequence, rebuild)
+    finally:
+        connections.close_all()
+
+
+def _update(index, version, sequence, rebuild):
+    """Bring ``index`` up to ``version`` and ``sequence`` and swap the result in."""
+    global _index, _updating
+
+    try:
+        updated = _updated(index, version, sequence, rebuild)
+    except Exception:
+        logger.exception("Updating the suggest index failed")
+        updated = None
+
+    with _lock:
+        _updating = False
+        if updated is not None:
+            _index = updated
+            # Apply what was published while this one was being made.
+            _catch_up()
+
+
+def _updated(index, version, sequence, rebuild):
+    """
+    Return ``index`` brought up to ``version`` and ``sequence``.
+
+    Published product changes are applied to a copy, so lookups running
+    meanwhile keep a consistent index. Returns ``None`` when the next change
+    isn't readable yet.
+    """
+    if rebuild:
+        return SuggestIndex.load(version, sequence)
+
+    keys = [_change_key(number) for number in range(index.sequence + 1, sequence + 1)]
+    published = cache.get_many(keys)
+    changes = []
+    for key in keys:
+        if key not in published:
+            break
+        changes.append(published[key])
+
+    now = time.monotonic()
+    if changes:
+        updated = index.copy()
+        updated.apply_changes(changes)
+        updated.sequence += len(changes)
+        updated.checked_at = now
+        if updated.sequence == sequence:
+            updated.synced_at = now
+        return updated
+    if now - index.synced_at > MISSING_CHANGE_GRACE:
+        # The next change expired, or its writer never got to write it.
+        return SuggestIndex.load(version, sequence)
+    return None
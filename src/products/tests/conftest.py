@@ -1,12 +1,19 @@
 from decimal import Decimal
 
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 from products.models import Category, Product
 from products.serializers import CategorySerializer, ProductSerializer
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache so cached responses don't leak between tests."""
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     """Return an API client for testing."""
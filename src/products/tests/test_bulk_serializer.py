@@ -1,8 +1,10 @@
 from decimal import Decimal
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from products.models import Category, Product
+from products.models import Category, CategoryStats, Product
 from products.serializers import BulkProductCreateSerializer
 
 
@@ -112,3 +114,76 @@ class TestBulkProductCreateSerializer:
         errors = serializer.errors
         assert "products" in errors
         assert "category" in errors["products"][0]
+
+    def test_errors_are_reported_per_row(self, db, category):
+        """Test that each row's errors sit at that row's position."""
+        Product.objects.create(name="Pear", slug="pear", category=category, price=1, stock=1)
+        data = {
+            "products": [
+                {"name": "Apple", "slug": "apple", "category": category.id, "price": "1.00"},
+                {"name": "Pear", "slug": "pear", "category": category.id, "price": "1.00"},
+                {"name": "Kiwi", "slug": "kiwi", "category": 9999, "price": "1.00"},
+                {"name": "Apple 2", "slug": "apple", "category": category.id, "price": "x"},
+            ]
+        }
+
+        serializer = BulkProductCreateSerializer(data=data)
+        assert not serializer.is_valid()
+
+        errors = serializer.errors["products"]
+        assert errors[0] == {}
+        assert errors[1]["slug"] == ["product with this slug already exists."]
+        assert "category" in errors[2]
+        assert set(errors[3]) == {"price"}
+        assert Product.objects.count() == 1
+
+    def test_repeated_slug_in_upload(self, db, category):
+        """Test that two rows with the same slug are both rejected."""
+        row = {"name": "Apple", "slug": "apple", "category": category.id, "price": "1.00"}
+
+        serializer = BulkProductCreateSerializer(data={"products": [row, dict(row)]})
+
+        assert not serializer.is_valid()
+        assert all("slug" in errors for errors in serializer.errors["products"])
+
+    def test_validation_query_count_is_constant(self, db, category, django_assert_num_queries):
+        """Test that categories and slugs are checked with one query each."""
+        rows = [
+            {"name": f"Item {i}", "slug": f"item-{i}", "category": category.id, "price": "1.00"}
+            for i in range(50)
+        ]
+
+        serializer = BulkProductCreateSerializer(data={"products": rows})
+        with django_assert_num_queries(2):
+            assert serializer.is_valid(), serializer.errors
+
+    def test_inserts_in_batches(self, db, category, settings):
+        """Test that rows are inserted PRODUCTS_BULK_CREATE_BATCH_SIZE at a time."""
+        settings.PRODUCTS_BULK_CREATE_BATCH_SIZE = 2
+        rows = [
+            {"name": f"Item {i}", "slug": f"item-{i}", "category": category.id, "price": "1.00"}
+            for i in range(5)
+        ]
+        serializer = BulkProductCreateSerializer(data={"products": rows})
+        assert serializer.is_valid(), serializer.errors
+
+        with CaptureQueriesContext(connection) as queries:
+            serializer.save()
+
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "products_product"')]
+        assert len(inserts) == 3
+        assert Product.objects.count() == 5
+
+    def test_updates_category_statistics(self, db, category):
+        """Test that bulk inserts, which send no signals, still reach the statistics."""
+        rows = [
+            {"name": f"Item {i}", "slug": f"item-{i}", "category": category.id, "price": "2.00"}
+            for i in range(3)
+        ]
+        serializer = BulkProductCreateSerializer(data={"products": rows})
+        assert serializer.is_valid(), serializer.errors
+        serializer.save()
+
+        stats = CategoryStats.objects.get(category=category)
+        assert stats.product_count == 3
+        assert stats.price_total == Decimal("6.00")
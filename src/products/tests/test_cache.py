@@ -0,0 +1,110 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+
+class TestCatalogResponseCache:
+    """Test cases for the cached catalog endpoints."""
+
+    def test_product_list_is_served_from_cache(
+        self, db, api_client, products, django_assert_num_queries
+    ):
+        """Test that a repeated product list request does not touch the database."""
+        url = reverse("product-list")
+        first = api_client.get(url)
+
+        with django_assert_num_queries(0):
+            second = api_client.get(url)
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data == first.data
+
+    def test_query_params_are_part_of_the_key(self, db, api_client, products, parent_category):
+        """Test that differently filtered lists are cached separately."""
+        url = reverse("product-list")
+        api_client.get(url)
+
+        response = api_client.get(f"{url}?category_id={parent_category.id}")
+
+        assert response.data["results"] == []
+
+    def test_product_save_invalidates_list_and_detail(self, db, api_client, products):
+        """Test that saving a product drops the cached list and its detail."""
+        product = products[0]
+        list_url = reverse("product-list")
+        detail_url = reverse("product-detail", args=[product.id])
+        api_client.get(list_url)
+        api_client.get(detail_url)
+
+        product.stock = 7
+        product.save()
+
+        assert api_client.get(detail_url).data["stock"] == 7
+        names = {p["name"]: p["stock"] for p in api_client.get(list_url).data["results"]}
+        assert names[product.name] == 7
+
+    def test_padded_pk_detail_is_invalidated(self, db, api_client, products):
+        """Test that a detail cached under a zero-padded pk is dropped by a save."""
+        product = products[0]
+        padded_url = reverse("product-detail", args=[f"0{product.id}"])
+        assert api_client.get(padded_url).data["stock"] == product.stock
+
+        product.stock = 7
+        product.save()
+
+        assert api_client.get(padded_url).data["stock"] == 7
+
+    def test_product_delete_invalidates_list(self, db, api_client, products):
+        """Test that deleting a product drops it from the cached list."""
+        url = reverse("product-list")
+        api_client.get(url)
+
+        products[0].delete()
+
+        assert len(api_client.get(url).data["results"]) == len(products) - 1
+
+    def test_category_rename_invalidates_product_detail(
+        self, db, api_client, products, child_category
+    ):
+        """Test that products embedding a renamed category are not served stale."""
+        url = reverse("product-detail", args=[products[0].id])
+        api_client.get(url)
+
+        child_category.name = "Fresh Fruits"
+        child_category.save()
+
+        assert api_client.get(url).data["category"]["name"] == "Fresh Fruits"
+
+    def test_category_list_invalidated_by_new_category(self, db, api_client, parent_category):
+        """Test that a new category shows up in the cached category list."""
+        url = reverse("category-list")
+        assert len(api_client.get(url).data) == 1
+
+        parent_category.children.create(name="Dairy", slug="dairy")
+
+        assert len(api_client.get(url).data) == 2
+
+    @pytest.mark.django_db
+    def test_average_price_invalidated_by_price_change(self, api_client, products, child_category):
+        """Test that the cached category average follows price changes."""
+        url = f"{reverse('product-category-average-price')}?category_id={child_category.id}"
+        api_client.get(url)
+
+        products[0].delete()
+
+        response = api_client.get(url)
+        expected = (Decimal("1.99") + Decimal("3.49")) / 2
+        assert float(response.data["average_price"]) == pytest.approx(float(expected))
+
+    def test_error_responses_are_not_cached(self, db, api_client):
+        """Test that a 404 is not cached."""
+        url = reverse("product-detail", args=[123456])
+
+        with patch("products.cache.cache.set") as mock_set:
+            response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        mock_set.assert_not_called()
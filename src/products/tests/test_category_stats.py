@@ -0,0 +1,224 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from products.models import Category, CategoryStats, Product
+from products.services import decrement_stock
+from products.stats import ALL_STAT_FIELDS, rebuild_category_stats
+from products.tree import get_category_tree
+
+
+@pytest.fixture
+def category_tree(db):
+    """Create Groceries > Produce > (Fruits, Vegetables) and a separate Household root."""
+    groceries = Category.objects.create(name="Groceries", slug="groceries")
+    produce = Category.objects.create(name="Produce", slug="produce", parent=groceries)
+    fruits = Category.objects.create(name="Fruits", slug="fruits", parent=produce)
+    vegetables = Category.objects.create(name="Vegetables", slug="vegetables", parent=produce)
+    household = Category.objects.create(name="Household", slug="household")
+    return {
+        category.slug: category for category in (groceries, produce, fruits, vegetables, household)
+    }
+
+
+def snapshot():
+    """Return every statistics row as a comparable dict."""
+    return {
+        row["category_id"]: row
+        for row in CategoryStats.objects.values("category_id", *ALL_STAT_FIELDS)
+    }
+
+
+def assert_matches_rebuild():
+    """Assert that the incrementally maintained rows equal a full rebuild."""
+    incremental = snapshot()
+    rebuild_category_stats()
+    assert incremental == snapshot()
+
+
+class TestCategoryStats:
+    """Test cases for the incrementally maintained category statistics."""
+
+    def test_new_category_gets_empty_row(self, category_tree):
+        """Test that every category starts with an empty statistics row."""
+        stats = CategoryStats.objects.get(category=category_tree["household"])
+
+        assert stats.product_count == 0
+        assert stats.min_price is None
+        assert stats.subtree_product_count == 0
+
+    def test_create_rolls_up_to_ancestors(self, category_tree):
+        """Test that a new product is counted in its category and every ancestor."""
+        Product.objects.create(name="Mango", category=category_tree["fruits"], price=4, stock=10)
+        Product.objects.create(name="Kale", category=category_tree["vegetables"], price=2, stock=5)
+
+        groceries = CategoryStats.objects.get(category=category_tree["groceries"])
+        fruits = CategoryStats.objects.get(category=category_tree["fruits"])
+
+        assert groceries.product_count == 0
+        assert groceries.subtree_product_count == 2
+        assert groceries.subtree_price_total == Decimal("6.00")
+        assert groceries.subtree_stock_total == 15
+        assert groceries.subtree_min_price == Decimal("2.00")
+        assert groceries.subtree_max_price == Decimal("4.00")
+        assert fruits.product_count == 1
+        assert fruits.max_price == Decimal("4.00")
+        assert_matches_rebuild()
+
+    def test_updates_and_moves_match_rebuild(self, category_tree):
+        """Test price, stock and category changes against a full rebuild."""
+        mango = Product.objects.create(
+            name="Mango", category=category_tree["fruits"], price=4, stock=10
+        )
+        Product.objects.create(name="Kiwi", category=category_tree["fruits"], price=1, stock=3)
+
+        mango.price = Decimal("0.50")
+        mango.save()
+        assert_matches_rebuild()
+
+        mango = Product.objects.get(pk=mango.pk)
+        mango.stock = 7
+        mango.save()
+        assert_matches_rebuild()
+
+        mango.category = category_tree["household"]
+        mango.save()
+        assert_matches_rebuild()
+
+        household = CategoryStats.objects.get(category=category_tree["household"])
+        assert household.subtree_min_price == Decimal("0.50")
+
+    def test_stale_instance_applies_stored_state(self, category_tree):
+        """Test that saving or deleting an outdated instance keeps the totals right."""
+        mango = Product.objects.create(
+            name="Mango", category=category_tree["fruits"], price=4, stock=10
+        )
+        stale = Product.objects.get(pk=mango.pk)
+        decrement_stock({mango.pk: 3})
+
+        stale.price = Decimal("5.00")
+        stale.save()
+
+        fruits = CategoryStats.objects.get(category=category_tree["fruits"])
+        assert fruits.stock_total == 10
+        assert_matches_rebuild()
+
+        decrement_stock({mango.pk: 8})
+        stale.delete()
+        assert_matches_rebuild()
+
+    def test_deleting_the_extreme_recomputes_bounds(self, category_tree):
+        """Test that removing the cheapest product moves the minimum up."""
+        kiwi = Product.objects.create(
+            name="Kiwi", category=category_tree["fruits"], price=1, stock=3
+        )
+        Product.objects.create(name="Mango", category=category_tree["fruits"], price=4, stock=10)
+
+        kiwi.delete()
+
+        produce = CategoryStats.objects.get(category=category_tree["produce"])
+        assert produce.subtree_min_price == Decimal("4.00")
+        assert produce.subtree_product_count == 1
+        assert_matches_rebuild()
+
+    def test_moving_a_category_rebuilds_rollups(self, category_tree):
+        """Test that reparenting a category moves its products between ancestors."""
+        Product.objects.create(name="Mango", category=category_tree["fruits"], price=4, stock=10)
+        fruits = Category.objects.get(pk=category_tree["fruits"].pk)
+
+        fruits.parent = category_tree["household"]
+        fruits.save()
+
+        household = CategoryStats.objects.get(category=category_tree["household"])
+        produce = CategoryStats.objects.get(category=category_tree["produce"])
+        assert household.subtree_product_count == 1
+        assert produce.subtree_product_count == 0
+        assert_matches_rebuild()
+
+    def test_rebuild_of_some_categories(self, category_tree):
+        """Test that recomputing the written categories rolls them up to their ancestors."""
+        Product.objects.create(name="Kale", category=category_tree["vegetables"], price=2, stock=5)
+        Product.objects.bulk_create(
+            [
+                Product(name="Mango", slug="mango", category=category_tree["fruits"], price=4),
+                Product(name="Soap", slug="soap", category=category_tree["household"], price=1),
+            ]
+        )
+
+        count = rebuild_category_stats([category_tree["fruits"].pk])
+
+        groceries = CategoryStats.objects.get(category=category_tree["groceries"])
+        household = CategoryStats.objects.get(category=category_tree["household"])
+        assert count == 3
+        assert groceries.subtree_product_count == 2
+        assert groceries.subtree_max_price == Decimal("4.00")
+        assert household.product_count == 0
+        rebuild_category_stats([category_tree["household"].pk])
+        assert_matches_rebuild()
+
+    def test_rebuild_command(self, category_tree):
+        """Test that the management command repairs drifted rows."""
+        Product.objects.create(name="Mango", category=category_tree["fruits"], price=4, stock=10)
+        CategoryStats.objects.update(product_count=99, subtree_product_count=99)
+
+        out = StringIO()
+        call_command("rebuild_category_stats", stdout=out)
+
+        stats = CategoryStats.objects.get(category=category_tree["groceries"])
+        assert "Rebuilt statistics for 5 categories" in out.getvalue()
+        assert stats.product_count == 0
+        assert stats.subtree_product_count == 1
+
+
+class TestCategoryPriceEndpoint:
+    """Test cases for category_average_price served from the statistics table."""
+
+    def test_reports_min_max_and_count(self, api_client, category_tree):
+        """Test the extended response for a category subtree."""
+        Product.objects.create(name="Mango", category=category_tree["fruits"], price=4, stock=10)
+        Product.objects.create(name="Kale", category=category_tree["vegetables"], price=2, stock=5)
+
+        url = reverse("product-category-average-price")
+        response = api_client.get(
+            f"{url}?category_id={category_tree['produce'].id}&include_subcategories=true"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["average_price"] == Decimal("3")
+        assert response.data["min_price"] == Decimal("2.00")
+        assert response.data["max_price"] == Decimal("4.00")
+        assert response.data["product_count"] == 2
+
+    def test_empty_category(self, api_client, category_tree):
+        """Test that a category without products reports zero and no bounds."""
+        url = reverse("product-category-average-price")
+        response = api_client.get(f"{url}?category_id={category_tree['produce'].id}")
+
+        assert response.data == {
+            "average_price": 0,
+            "min_price": None,
+            "max_price": None,
+            "product_count": 0,
+        }
+
+    def test_does_not_aggregate_products(
+        self, api_client, category_tree, django_assert_num_queries
+    ):
+        """Test that the endpoint reads one statistics row regardless of catalog size."""
+        for i in range(20):
+            Product.objects.create(
+                name=f"Fruit {i}", category=category_tree["fruits"], price=i + 1, stock=1
+            )
+        get_category_tree()
+
+        url = reverse("product-category-average-price")
+        with django_assert_num_queries(1):
+            response = api_client.get(
+                f"{url}?category_id={category_tree['groceries'].id}&include_subcategories=true"
+            )
+
+        assert response.data["product_count"] == 20
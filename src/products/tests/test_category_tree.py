@@ -0,0 +1,92 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from products.models import Category, Product
+from products.tree import get_category_tree
+
+
+@pytest.fixture
+def category_tree(db):
+    """Create a two-level category tree next to a separate root."""
+    groceries = Category.objects.create(name="Groceries", slug="groceries")
+    produce = Category.objects.create(name="Produce", slug="produce", parent=groceries)
+    fruits = Category.objects.create(name="Fruits", slug="fruits", parent=produce)
+    vegetables = Category.objects.create(name="Vegetables", slug="vegetables", parent=produce)
+    bakery = Category.objects.create(name="Bakery", slug="bakery", parent=groceries)
+    household = Category.objects.create(name="Household", slug="household")
+    return {
+        category.slug: category
+        for category in (groceries, produce, fruits, vegetables, bakery, household)
+    }
+
+
+class TestCategoryTree:
+    """Test cases for the in-memory category tree snapshot."""
+
+    def test_matches_mptt_queries(self, category_tree):
+        """Test that every tree walk agrees with the MPTT model methods."""
+        tree = get_category_tree()
+
+        for category in Category.objects.all():
+            assert tree.descendant_ids(category.id) == [
+                node.id for node in category.get_descendants()
+            ]
+            assert tree.descendant_ids(category.id, include_self=True) == [
+                node.id for node in category.get_descendants(include_self=True)
+            ]
+            assert tree.ancestor_ids(category.id) == [node.id for node in category.get_ancestors()]
+            assert tree.children_ids(category.id) == [node.id for node in category.get_children()]
+            assert tree.is_leaf(category.id) == category.is_leaf_node()
+            assert tree.root_id(category.id) == category.get_root().id
+
+    def test_leaf_ids(self, category_tree):
+        """Test that leaf_ids lists exactly the categories without children."""
+        leaves = {
+            category_tree[slug].id for slug in ("fruits", "vegetables", "bakery", "household")
+        }
+
+        assert set(get_category_tree().leaf_ids()) == leaves
+
+    def test_snapshot_is_reused(self, category_tree, django_assert_num_queries):
+        """Test that an unchanged tree is answered without querying the database."""
+        tree = get_category_tree()
+
+        with django_assert_num_queries(0):
+            assert get_category_tree() is tree
+
+    def test_snapshot_refreshes_after_category_change(self, category_tree):
+        """Test that saving a category invalidates the snapshot."""
+        tree = get_category_tree()
+        dairy = Category.objects.create(
+            name="Dairy", slug="dairy", parent=category_tree["groceries"]
+        )
+
+        refreshed = get_category_tree()
+
+        assert refreshed is not tree
+        assert dairy.id in refreshed
+        assert dairy.id in refreshed.descendant_ids(category_tree["groceries"].id)
+        assert not refreshed.is_leaf(category_tree["groceries"].id)
+
+    def test_average_price_includes_nested_subcategories(self, api_client, category_tree):
+        """Test that include_subcategories reaches grandchildren through the snapshot."""
+        Product.objects.create(name="Mango", category=category_tree["fruits"], price=4, stock=1)
+        Product.objects.create(name="Bread", category=category_tree["bakery"], price=2, stock=1)
+        Product.objects.create(name="Soap", category=category_tree["household"], price=9, stock=1)
+
+        url = reverse("product-category-average-price")
+        response = api_client.get(
+            f"{url}?category_id={category_tree['groceries'].id}&include_subcategories=true"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert float(response.data["average_price"]) == pytest.approx(3)
+
+    def test_average_price_rejects_malformed_category_id(self, api_client, db):
+        """Test that a non-numeric category_id is reported as a missing category."""
+        url = f"{reverse('product-category-average-price')}?category_id=abc"
+
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+
+from products.cache import PRODUCT_LIST
+from products.conditional import get_table_state
+from products.models import Product
+
+
+class TestConditionalGet:
+    """Test cases for ETag/Last-Modified handling on the catalog lists."""
+
+    def test_product_list_sets_validators(self, db, api_client, products):
+        """Test that the product list carries an ETag and Last-Modified header."""
+        response = api_client.get(reverse("product-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"].startswith('"')
+        assert "Last-Modified" in response
+
+    def test_if_none_match_returns_304(self, db, api_client, products):
+        """Test that a matching If-None-Match short-circuits with 304."""
+        url = reverse("product-list")
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        assert not response.content
+
+    def test_if_modified_since_returns_304(self, db, api_client, products):
+        """Test that If-Modified-Since with the current Last-Modified returns 304."""
+        url = reverse("product-list")
+        last_modified = api_client.get(url)["Last-Modified"]
+
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_etag_changes_when_a_product_changes(self, db, api_client, products):
+        """Test that editing a product produces a new ETag."""
+        url = reverse("product-list")
+        etag = api_client.get(url)["ETag"]
+
+        products[0].stock = 1
+        products[0].save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_etag_changes_when_a_product_is_deleted(self, db, api_client, products):
+        """Test that removing a row changes the ETag even though max(updated_at) doesn't."""
+        url = reverse("product-list")
+        etag = api_client.get(url)["ETag"]
+
+        products[1].delete()
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_etag_depends_on_query_params(self, db, api_client, products, child_category):
+        """Test that a filtered list does not validate against the unfiltered ETag."""
+        url = reverse("product-list")
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(f"{url}?category_id={child_category.id}", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_product_list_etag_follows_category_rename(
+        self, db, api_client, products, child_category
+    ):
+        """Test that renaming an embedded category changes the product list ETag."""
+        url = reverse("product-list")
+        etag = api_client.get(url)["ETag"]
+
+        child_category.name = "Fresh Fruits"
+        child_category.save()
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_category_list_conditional_get(self, db, api_client, parent_category):
+        """Test that the category list supports If-None-Match."""
+        url = reverse("category-list")
+        etag = api_client.get(url)["ETag"]
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        parent_category.children.create(name="Dairy", slug="dairy")
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_table_state_expires(self, db, settings, products):
+        """Test that the cached table state has a timeout, so old versions don't pile up."""
+        settings.CATALOG_CACHE_TIMEOUT = 42
+
+        with patch("products.conditional.cache.set", wraps=cache.set) as cache_set:
+            get_table_state(Product, PRODUCT_LIST)
+
+        cache_set.assert_called_once()
+        assert cache_set.call_args.args[2] == 42
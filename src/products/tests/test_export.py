@@ -0,0 +1,126 @@
+import csv
+import gzip
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client(db):
+    """Return an API client authenticated as a customer."""
+    client = APIClient()
+    user = User.objects.create_user(username="partner", email="p@example.com", password="x")
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def catalog(db):
+    """Create two categories with a product each."""
+    produce = Category.objects.create(name="Produce", slug="produce")
+    fruits = Category.objects.create(name="Fruits", slug="fruits", parent=produce)
+    bakery = Category.objects.create(name="Bakery", slug="bakery")
+    apple = Product.objects.create(
+        name="Apple", slug="apple", category=fruits, price=Decimal("2.99"), stock=10
+    )
+    bread = Product.objects.create(
+        name="Bread, sliced",
+        slug="bread-sliced",
+        category=bakery,
+        description='Say "cheese"',
+        price=Decimal("3.50"),
+    )
+    return {"apple": apple, "bread": bread}
+
+
+def download(client, **params):
+    """Request an export, returning the response and its body."""
+    response = client.get(reverse("product-export"), params)
+    body = b"".join(response.streaming_content) if response.streaming else response.content
+    return response, body
+
+
+class TestProductExport:
+    """Test cases for the product export endpoint."""
+
+    def test_exports_ndjson_by_default(self, api_client, catalog):
+        """Test that every product is streamed as one JSON object per line."""
+        response, body = download(api_client)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert 'filename="products.ndjson"' in response["Content-Disposition"]
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert [row["slug"] for row in rows] == ["apple", "bread-sliced"]
+        assert rows[0]["category"] == "produce/fruits"
+        assert rows[0]["price"] == "2.99"
+        assert rows[0]["stock"] == 10
+
+    def test_exports_csv(self, api_client, catalog):
+        """Test that CSV exports have a header and quote values where needed."""
+        response, body = download(api_client, export_format="csv")
+
+        assert response["Content-Type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        assert [row["name"] for row in rows] == ["Apple", "Bread, sliced"]
+        assert rows[1]["description"] == 'Say "cheese"'
+        assert rows[1]["category"] == "bakery"
+
+    def test_exports_gzip(self, api_client, catalog):
+        """Test that gzip=true compresses the file."""
+        response, body = download(api_client, gzip="true")
+
+        assert response["Content-Type"] == "application/gzip"
+        assert 'filename="products.ndjson.gz"' in response["Content-Disposition"]
+        assert len(gzip.decompress(body).decode().splitlines()) == 2
+
+    def test_applies_filters(self, api_client, catalog):
+        """Test that the product list filters narrow the export."""
+        produce = Category.objects.get(slug="produce")
+
+        _, body = download(api_client, category_id=produce.id, include_subcategories="true")
+
+        assert [json.loads(line)["slug"] for line in body.decode().splitlines()] == ["apple"]
+
+    def test_invalid_format(self, api_client, catalog):
+        """Test that an unknown export format is rejected."""
+        response, _ = download(api_client, export_format="xml")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_authentication(self, catalog):
+        """Test that anonymous users can't export the catalog."""
+        response, _ = download(APIClient())
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestExportProductsCommand:
+    """Test cases for the export_products management command."""
+
+    def test_round_trip_through_import(self, tmp_path, catalog):
+        """Test that an export can be imported back unchanged."""
+        path = tmp_path / "products.csv.gz"
+        stdout = io.StringIO()
+
+        call_command("export_products", str(path), stdout=stdout)
+        Product.objects.all().delete()
+        call_command("import_products", str(path), stdout=io.StringIO(), stderr=io.StringIO())
+
+        assert "Exported 2 products" in stdout.getvalue()
+        bread = Product.objects.get(slug="bread-sliced")
+        assert bread.category.slug == "bakery"
+        assert bread.description == 'Say "cheese"'
+        assert Product.objects.get(slug="apple").price == Decimal("2.99")
@@ -0,0 +1,145 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from products.filters import product_facets
+from products.models import Category, Product
+from products.tree import get_category_tree
+
+
+@pytest.fixture
+def catalog(db):
+    """Create Groceries > Produce > Fruits, Groceries > Bakery and a Household root."""
+    groceries = Category.objects.create(name="Groceries", slug="groceries")
+    produce = Category.objects.create(name="Produce", slug="produce", parent=groceries)
+    fruits = Category.objects.create(name="Fruits", slug="fruits", parent=produce)
+    bakery = Category.objects.create(name="Bakery", slug="bakery", parent=groceries)
+    household = Category.objects.create(name="Household", slug="household")
+
+    def product(name, category, price, stock):
+        return Product.objects.create(
+            name=name, category=category, price=Decimal(price), stock=stock
+        )
+
+    product("Mango", fruits, "1.50", 10)
+    product("Kale", produce, "3.00", 0)
+    product("Cake", bakery, "12.00", 4)
+    product("Soap", household, "75.00", 2)
+    return {category.slug: category for category in (groceries, produce, fruits, bakery, household)}
+
+
+def names(response):
+    return [product["name"] for product in response.data["results"]]
+
+
+class TestProductFilters:
+    """Test cases for filtering the product list."""
+
+    def test_exact_category_stays_the_default(self, api_client, catalog):
+        """Test that category_id alone still matches only that category."""
+        response = api_client.get(reverse("product-list"), {"category_id": catalog["produce"].id})
+
+        assert names(response) == ["Kale"]
+
+    def test_category_subtree(self, api_client, catalog):
+        """Test include_subcategories matches the whole subtree."""
+        response = api_client.get(
+            reverse("product-list"),
+            {"category_id": catalog["groceries"].id, "include_subcategories": "true"},
+        )
+
+        assert names(response) == ["Cake", "Kale", "Mango"]
+
+    def test_price_range(self, api_client, catalog):
+        """Test that min_price and max_price are inclusive bounds."""
+        response = api_client.get(reverse("product-list"), {"min_price": "3", "max_price": "12"})
+
+        assert names(response) == ["Cake", "Kale"]
+
+    def test_in_stock(self, api_client, catalog):
+        """Test filtering by stock availability both ways."""
+        url = reverse("product-list")
+
+        assert names(api_client.get(url, {"in_stock": "true"})) == ["Cake", "Mango", "Soap"]
+        assert names(api_client.get(url, {"in_stock": "false"})) == ["Kale"]
+        assert len(names(api_client.get(url))) == 4
+
+    def test_invalid_filter_is_rejected(self, api_client, catalog):
+        """Test that a malformed price is a validation error."""
+        response = api_client.get(reverse("product-list"), {"min_price": "cheap"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_search_accepts_filters(self, api_client, catalog):
+        """Test that the search endpoint shares the filters."""
+        response = api_client.get(reverse("product-search"), {"q": "cake", "in_stock": "false"})
+
+        assert names(response) == []
+
+
+class TestProductFacets:
+    """Test cases for the facet counts returned with the product list."""
+
+    def test_top_level_facets(self, api_client, catalog):
+        """Test the facets of the unfiltered catalog."""
+        facets = api_client.get(reverse("product-list")).data["facets"]
+
+        assert facets["categories"] == [
+            {"id": catalog["groceries"].id, "name": "Groceries", "count": 3},
+            {"id": catalog["household"].id, "name": "Household", "count": 1},
+        ]
+        assert [bucket["count"] for bucket in facets["price"]] == [2, 0, 1, 0, 1]
+        assert facets["price"][0]["min"] == Decimal("0.00")
+        assert facets["price"][-1]["max"] is None
+        assert facets["stock"] == {"in_stock": 3, "out_of_stock": 1}
+
+    def test_facets_follow_filters(self, api_client, catalog):
+        """Test that the facets describe the filtered products and drill into children."""
+        response = api_client.get(
+            reverse("product-list"),
+            {
+                "category_id": catalog["groceries"].id,
+                "include_subcategories": "true",
+                "in_stock": "true",
+            },
+        )
+        facets = response.data["facets"]
+
+        assert facets["categories"] == [
+            {"id": catalog["bakery"].id, "name": "Bakery", "count": 1},
+            {"id": catalog["produce"].id, "name": "Produce", "count": 1},
+        ]
+        assert facets["stock"] == {"in_stock": 2, "out_of_stock": 0}
+
+    def test_price_buckets_setting(self, catalog, settings):
+        """Test that PRODUCTS_PRICE_BUCKETS defines the buckets."""
+        settings.PRODUCTS_PRICE_BUCKETS = ["10"]
+
+        facets = product_facets(Product.objects.all())
+
+        assert [(b["min"], b["max"], b["count"]) for b in facets["price"]] == [
+            (Decimal("0.00"), Decimal("10.00"), 2),
+            (Decimal("10.00"), None, 2),
+        ]
+
+    def test_facets_take_one_query(self, catalog, django_assert_num_queries):
+        """Test that all facets come from a single aggregate."""
+        get_category_tree()
+
+        with django_assert_num_queries(1):
+            product_facets(Product.objects.all(), catalog["groceries"].id)
+
+    def test_facets_only_on_first_page(self, api_client, catalog):
+        """Test that pages reached through a cursor skip the facet aggregate."""
+        first = api_client.get(reverse("product-list"), {"page_size": 2}).data
+
+        with patch("products.views.product_facets") as facets:
+            second = api_client.get(first["next"]).data
+
+        assert "facets" in first
+        assert "facets" not in second
+        assert len(second["results"]) == 2
+        facets.assert_not_called()
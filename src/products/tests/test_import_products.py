@@ -0,0 +1,193 @@
+import gzip
+import json
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from products.importer import import_products
+from products.models import Category, CategoryStats, Product
+
+
+@pytest.fixture
+def categories(db):
+    """Create a small category tree."""
+    root = Category.objects.create(name="All Products", slug="all-products")
+    produce = Category.objects.create(name="Produce", slug="produce", parent=root)
+    fruits = Category.objects.create(name="Fruits", slug="fruits", parent=produce)
+    return {"root": root, "produce": produce, "fruits": fruits}
+
+
+def run_import(path, *args):
+    """Run the command, returning its stdout and stderr."""
+    stdout, stderr = StringIO(), StringIO()
+    call_command("import_products", str(path), *args, stdout=stdout, stderr=stderr)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+class TestImportProducts:
+    """Test cases for the import_products management command."""
+
+    def test_imports_csv(self, tmp_path, categories):
+        """Test that CSV rows are created, resolving categories by slug or path."""
+        path = tmp_path / "catalog.csv"
+        path.write_text(
+            "name,slug,category,description,price,stock\n"
+            "Apple,apple,fruits,Fresh red apples,2.99,100\n"
+            "Carrot,,all-products/produce,,0.50,\n"
+        )
+
+        stdout, _ = run_import(path)
+
+        apple = Product.objects.get(slug="apple")
+        assert apple.category == categories["fruits"]
+        assert apple.price == Decimal("2.99")
+        assert apple.stock == 100
+        carrot = Product.objects.get(slug="carrot")
+        assert carrot.category == categories["produce"]
+        assert carrot.description == ""
+        assert carrot.stock == 0
+        assert "2 created" in stdout
+        assert "rows/s" in stdout
+
+    def test_imports_gzipped_ndjson(self, tmp_path, categories):
+        """Test that gzipped NDJSON files are read."""
+        path = tmp_path / "catalog.ndjson.gz"
+        with gzip.open(path, "wt") as stream:
+            stream.write(json.dumps({"name": "Kiwi", "category": "fruits", "price": 0.8}) + "\n")
+            stream.write("\n")
+            stream.write(json.dumps({"name": "Lime", "category": "fruits", "price": "0.30"}) + "\n")
+
+        run_import(path)
+
+        assert set(Product.objects.values_list("slug", flat=True)) == {"kiwi", "lime"}
+
+    def test_upserts_by_slug(self, tmp_path, categories):
+        """Test that existing products are updated and unchanged ones left alone."""
+        unchanged = Product.objects.create(
+            name="Pear", slug="pear", category=categories["fruits"], price=Decimal("1.00")
+        )
+        Product.objects.create(
+            name="Apple", slug="apple", category=categories["fruits"], price=Decimal("1.00")
+        )
+        path = tmp_path / "catalog.csv"
+        path.write_text(
+            "name,slug,category,price,stock\n"
+            "Apple,apple,fruits,2.50,10\n"
+            "Pear,pear,fruits,1.00,0\n"
+        )
+
+        stdout, _ = run_import(path)
+
+        apple = Product.objects.get(slug="apple")
+        assert apple.price == Decimal("2.50")
+        assert apple.stock == 10
+        assert Product.objects.get(slug="pear").updated_at == unchanged.updated_at
+        assert "0 created, 1 updated, 1 unchanged" in stdout
+
+    def test_repeated_slug_keeps_last_row(self, tmp_path, categories):
+        """Test that the last row wins when a slug appears more than once."""
+        path = tmp_path / "catalog.csv"
+        path.write_text(
+            "name,slug,category,price\n"
+            "Apple,apple,fruits,1.00\n"
+            "Banana,banana,fruits,0.25\n"
+            "Apple,apple,fruits,3.00\n"
+        )
+
+        run_import(path, "--batch-size", "2")
+
+        assert Product.objects.count() == 2
+        assert Product.objects.get(slug="apple").price == Decimal("3.00")
+
+    def test_generated_slugs_never_overwrite(self, tmp_path, categories):
+        """Test that rows without a slug create products, with the slug made unique."""
+        admin = Product.objects.create(
+            name="Apple", slug="apple", category=categories["fruits"], price=Decimal("1.00")
+        )
+        Product.objects.create(
+            name="Apple", slug="apple-2", category=categories["fruits"], price=Decimal("1.00")
+        )
+        path = tmp_path / "catalog.csv"
+        path.write_text(
+            "name,slug,category,price\n"
+            "Apple,,fruits,2.00\n"
+            "Apple,apple-3,fruits,3.00\n"
+            "Apple,,fruits,4.00\n"
+        )
+
+        stdout, _ = run_import(path)
+
+        prices = dict(Product.objects.values_list("slug", "price"))
+        assert prices == {
+            "apple": Decimal("1.00"),
+            "apple-2": Decimal("1.00"),
+            "apple-3": Decimal("3.00"),
+            "apple-4": Decimal("2.00"),
+            "apple-5": Decimal("4.00"),
+        }
+        assert Product.objects.get(pk=admin.pk).updated_at == admin.updated_at
+        assert "3 created, 0 updated" in stdout
+
+    def test_rejects_invalid_rows(self, tmp_path, categories):
+        """Test that invalid rows are reported by line and the rest imported."""
+        path = tmp_path / "catalog.ndjson"
+        path.write_text(
+            "\n".join(
+                [
+                    json.dumps({"name": "Apple", "category": "fruits", "price": "1.00"}),
+                    json.dumps({"name": "Ghost", "category": "nowhere", "price": "1.00"}),
+                    json.dumps({"name": "Melon", "category": "fruits", "price": "1.999"}),
+                    "{not json",
+                    json.dumps({"name": "", "category": "fruits", "price": "1.00", "stock": -1}),
+                ]
+            )
+        )
+
+        stdout, stderr = run_import(path)
+
+        assert list(Product.objects.values_list("slug", flat=True)) == ["apple"]
+        assert "Line 2: category: Unknown category 'nowhere'." in stderr
+        assert "Line 3: price:" in stderr
+        assert "Line 4: Expected a JSON object." in stderr
+        assert "Line 5: name: This field cannot be blank." in stderr
+        assert "4 rejected" in stdout
+
+    def test_updates_category_stats(self, tmp_path, categories):
+        """Test that the derived category statistics are refreshed."""
+        path = tmp_path / "catalog.csv"
+        path.write_text("name,category,price,stock\n" "Apple,fruits,2.00,5\n" "Fig,fruits,4.00,1\n")
+
+        run_import(path)
+
+        stats = CategoryStats.objects.get(category=categories["produce"])
+        assert stats.subtree_product_count == 2
+        assert stats.subtree_stock_total == 6
+        assert stats.subtree_max_price == Decimal("4.00")
+
+    def test_failed_batch_keeps_stats_of_committed_ones(self, categories):
+        """Test that statistics are refreshed for the batches merged before a failure."""
+        rows = [(1, {"name": "Apple", "category": "fruits", "price": "2.00", "stock": "5"})]
+
+        def fail(report):
+            raise RuntimeError("Lost the connection")
+
+        with pytest.raises(RuntimeError):
+            import_products(rows, batch_size=1, on_batch=fail)
+
+        stats = CategoryStats.objects.get(category=categories["produce"])
+        assert stats.subtree_product_count == 1
+        assert stats.subtree_stock_total == 5
+
+    def test_unknown_format(self, tmp_path, categories):
+        """Test that a file with an unrecognised extension needs --format."""
+        path = tmp_path / "catalog.txt"
+        path.write_text("name,category,price\nApple,fruits,1.00\n")
+
+        with pytest.raises(CommandError):
+            run_import(path)
+
+        run_import(path, "--format", "csv")
+        assert Product.objects.filter(slug="apple").exists()
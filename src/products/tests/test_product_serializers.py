@@ -1,7 +1,11 @@
 from decimal import Decimal
 
 import pytest
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
 
+from core.compiled import CompiledSerializer
 from products.models import Category, Product
 from products.serializers import CategorySerializer, ProductSerializer
 
@@ -107,3 +111,53 @@ class TestProductSerializer:
         # Check that the category is serialized correctly
         assert data["category"]["name"] == "Fruits"
         assert data["category"]["slug"] == "fruits"
+
+    def test_product_serializer_eager_loading(self):
+        """Test that the nested category is joined rather than fetched per product."""
+        select_related, prefetch_related = ProductSerializer.get_eager_loading()
+        assert select_related == ["category"]
+        assert prefetch_related == []
+
+
+class TestCompiledSerializers:
+    """Test cases for the compiled read-only projections of the product serializers."""
+
+    def test_compiled_product_output_matches_serializer(self, db, product, parent_category):
+        """Test that the compiled projection renders byte-identical JSON."""
+        Product.objects.create(
+            name="Kiwi",
+            slug="kiwi",
+            category=Category.objects.create(name="Exotic", parent=parent_category),
+            price=Decimal("0.50"),
+            stock=0,
+        )
+        queryset = Product.objects.order_by("id")
+        compiled = CompiledSerializer(ProductSerializer)
+
+        expected = JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+        actual = JSONRenderer().render(compiled.to_representation(compiled.values(queryset)))
+
+        assert actual == expected
+
+    def test_compiled_category_output_matches_serializer(self, db, parent_category, child_category):
+        """Test that root and child categories project like the serializer."""
+        queryset = Category.objects.order_by("id")
+        compiled = CompiledSerializer(CategorySerializer)
+
+        expected = JSONRenderer().render(CategorySerializer(queryset, many=True).data)
+        actual = JSONRenderer().render(compiled.to_representation(compiled.values(queryset)))
+
+        assert actual == expected
+
+    def test_unsupported_field_is_rejected(self):
+        """Test that a computed field cannot be compiled."""
+
+        class ComputedSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Product
+                fields = ["id", "label"]
+
+        with pytest.raises(ImproperlyConfigured):
+            CompiledSerializer(ComputedSerializer)
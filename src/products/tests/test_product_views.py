@@ -1,10 +1,16 @@
+import base64
+import json
+
 import pytest
+from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from products.models import Category, Product
 
+User = get_user_model()
+
 
 @pytest.fixture
 def api_client():
@@ -93,10 +99,10 @@ class TestProductViewSet:
         response = api_client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == len(products)
+        assert len(response.data["results"]) == len(products)
 
         # Check that all products are in the response
-        product_names = [product["name"] for product in response.data]
+        product_names = [product["name"] for product in response.data["results"]]
         expected_names = [product.name for product in products]
         for name in expected_names:
             assert name in product_names
@@ -107,12 +113,101 @@ class TestProductViewSet:
         response = api_client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == len(products)
+        assert len(response.data["results"]) == len(products)
 
         # All products should be from the child_category
-        for product_data in response.data:
+        for product_data in response.data["results"]:
             assert product_data["category"]["id"] == child_category.id
 
+    def test_list_products_query_count_is_constant(
+        self, db, api_client, products, child_category, django_assert_num_queries
+    ):
+        """Test that listing products does not run a category query per row."""
+        for i in range(10):
+            Product.objects.create(
+                name=f"Pear {i}", slug=f"pear-{i}", category=child_category, price=1, stock=1
+            )
+
+        # One aggregate per table behind the ETag, the page and the facet counts.
+        with django_assert_num_queries(4):
+            response = api_client.get(reverse("product-list"))
+
+        assert len(response.data["results"]) == 13
+
+    def test_list_products_paginates_with_cursor(self, db, api_client, products):
+        """Test walking the product list forward and back with cursors."""
+        url = f"{reverse('product-list')}?page_size=2"
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [p["name"] for p in response.data["results"]] == ["Apple", "Banana"]
+        assert response.data["previous"] is None
+        assert response.data["next"] is not None
+
+        response = api_client.get(response.data["next"])
+
+        assert [p["name"] for p in response.data["results"]] == ["Orange"]
+        assert response.data["next"] is None
+        assert response.data["previous"] is not None
+
+        response = api_client.get(response.data["previous"])
+
+        assert [p["name"] for p in response.data["results"]] == ["Apple", "Banana"]
+        assert response.data["previous"] is None
+
+    def test_list_products_cursor_breaks_name_ties_by_id(self, db, api_client, child_category):
+        """Test that products sharing a name are neither skipped nor repeated."""
+        for i in range(5):
+            Product.objects.create(
+                name="Milk", slug=f"milk-{i}", category=child_category, price=1.50, stock=10
+            )
+
+        url = f"{reverse('product-list')}?page_size=2"
+        seen = []
+        while url:
+            response = api_client.get(url)
+            seen.extend(p["id"] for p in response.data["results"])
+            url = response.data["next"]
+
+        assert seen == sorted(Product.objects.values_list("id", flat=True))
+
+    def test_list_products_cursor_with_category_filter(
+        self, db, api_client, products, parent_category
+    ):
+        """Test that the category filter is kept while paging."""
+        other = Category.objects.create(name="Bakery", slug="bakery", parent=parent_category)
+        Product.objects.create(name="Bagel", slug="bagel", category=other, price=0.99, stock=5)
+
+        url = f"{reverse('product-list')}?category_id={other.id}&page_size=1"
+        response = api_client.get(url)
+
+        assert [p["name"] for p in response.data["results"]] == ["Bagel"]
+        assert response.data["next"] is None
+
+    def test_list_products_page_size_is_capped(self, db, api_client, products, settings):
+        """Test that page_size cannot exceed the configured maximum."""
+        settings.PRODUCTS_MAX_PAGE_SIZE = 2
+
+        url = f"{reverse('product-list')}?page_size=1000"
+        response = api_client.get(url)
+
+        assert len(response.data["results"]) == 2
+
+    def test_list_products_invalid_cursor(self, db, api_client, products):
+        """Test that a tampered cursor is rejected."""
+        url = f"{reverse('product-list')}?cursor=not-a-cursor"
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize("position", [["x", "abc"], ["x", None], ["x", [1]]])
+    def test_list_products_cursor_with_bad_values(self, db, api_client, products, position):
+        """Test that a well-formed cursor with values of the wrong type is rejected."""
+        token = base64.urlsafe_b64encode(json.dumps({"p": position}).encode()).decode()
+        response = api_client.get(f"{reverse('product-list')}?cursor={token}")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     @pytest.mark.django_db
     def test_retrieve_product(self, api_client, products):
         """Test retrieving a single product."""
@@ -179,3 +274,132 @@ class TestProductViewSet:
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert "error" in response.data
         assert "Category with ID 999 does not exist" in response.data["error"]
+
+
+class TestProductBulkCreate:
+    """Test cases for the staff bulk product upload endpoint."""
+
+    @pytest.fixture
+    def rows(self, child_category):
+        """Return a valid two-product upload."""
+        return [
+            {"name": "Mango", "slug": "mango", "category": child_category.id, "price": "1.50"},
+            {"name": "Kiwi", "slug": "kiwi", "category": child_category.id, "price": "0.80"},
+        ]
+
+    def test_requires_staff(self, db, api_client, rows):
+        """Test that customers can't upload products."""
+        user = User.objects.create_user(username="customer", email="c@example.com", password="x")
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(
+            reverse("product-bulk-create"), {"products": rows}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert Product.objects.count() == 0
+
+    def test_creates_products(self, db, api_client, rows):
+        """Test that staff can create products in bulk."""
+        staff = User.objects.create_user(
+            username="staff", email="s@example.com", password="x", is_staff=True
+        )
+        api_client.force_authenticate(user=staff)
+        url = reverse("product-list")
+        assert api_client.get(url).data["results"] == []
+
+        response = api_client.post(
+            reverse("product-bulk-create"), {"products": rows}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["count"] == 2
+        assert set(response.data["ids"]) == set(Product.objects.values_list("id", flat=True))
+        # The cached empty list was invalidated.
+        assert [p["name"] for p in api_client.get(url).data["results"]] == ["Kiwi", "Mango"]
+
+    def test_rejects_invalid_upload(self, db, api_client, rows):
+        """Test that one bad row rejects the upload with per-row errors."""
+        staff = User.objects.create_user(
+            username="staff", email="s@example.com", password="x", is_staff=True
+        )
+        api_client.force_authenticate(user=staff)
+        rows[1]["price"] = "free"
+
+        response = api_client.post(
+            reverse("product-bulk-create"), {"products": rows}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["products"][0] == {}
+        assert "price" in response.data["products"][1]
+        assert Product.objects.count() == 0
+
+
+class TestProductBulkUpdate:
+    """Test cases for the staff bulk stock and price update endpoint."""
+
+    @pytest.fixture
+    def staff_client(self, db, api_client):
+        """Return the API client authenticated as staff."""
+        staff = User.objects.create_user(
+            username="staff", email="s@example.com", password="x", is_staff=True
+        )
+        api_client.force_authenticate(user=staff)
+        return api_client
+
+    def test_requires_staff(self, db, api_client, products):
+        """Test that customers can't update stock."""
+        user = User.objects.create_user(username="customer", email="c@example.com", password="x")
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(
+            reverse("product-bulk-update"),
+            {"products": [{"id": products[0].id, "stock": 0}]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_updates_products(self, staff_client, products):
+        """Test that stock and prices are set by ID or slug and unknown keys reported."""
+        first, second = products[0], products[1]
+        url = reverse("product-detail", args=[first.id])
+        assert staff_client.get(url).data["stock"] == first.stock
+
+        response = staff_client.post(
+            reverse("product-bulk-update"),
+            {
+                "products": [
+                    {"id": first.id, "stock": 7},
+                    {"slug": second.slug, "price": str(second.price)},
+                    {"id": 999, "stock": 1},
+                    {"slug": "nope", "price": "1.00"},
+                ]
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            "updated": [first.id],
+            "unchanged": 1,
+            "unknown_ids": [999],
+            "unknown_slugs": ["nope"],
+        }
+        # The cached detail response was invalidated.
+        assert staff_client.get(url).data["stock"] == 7
+
+    def test_rejects_invalid_rows(self, staff_client, products):
+        """Test that rows without a key or a value are rejected with per-row errors."""
+        response = staff_client.post(
+            reverse("product-bulk-update"),
+            {"products": [{"id": products[0].id, "stock": 3}, {"stock": 1}, {"id": 1}]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["products"][0] == {}
+        assert response.data["products"][1]["non_field_errors"] == ["Provide either id or slug."]
+        assert response.data["products"][2]["non_field_errors"] == ["Provide stock, price or both."]
+        assert Product.objects.get(pk=products[0].id).stock != 3
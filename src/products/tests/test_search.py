@@ -0,0 +1,132 @@
+import base64
+import json
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from products.models import Category, Product
+from products.search import trigram_available
+
+
+@pytest.fixture
+def catalog(db, child_category):
+    """Create products whose names and descriptions overlap in different ways."""
+    bakery = Category.objects.create(name="Bakery", slug="bakery")
+    return {
+        "bananas": Product.objects.create(
+            name="Organic Bananas",
+            category=child_category,
+            description="Sweet ripe fruit",
+            price=Decimal("1.99"),
+            stock=10,
+        ),
+        "smoothie": Product.objects.create(
+            name="Berry Smoothie",
+            category=child_category,
+            description="Blended with banana and strawberries",
+            price=Decimal("3.99"),
+            stock=10,
+        ),
+        "bread": Product.objects.create(
+            name="Banana Bread",
+            category=bakery,
+            description="Moist loaf",
+            price=Decimal("4.50"),
+            stock=10,
+        ),
+        "apples": Product.objects.create(
+            name="Apples",
+            category=child_category,
+            description="Crisp and red",
+            price=Decimal("2.49"),
+            stock=10,
+        ),
+    }
+
+
+def names(response):
+    return [product["name"] for product in response.data["results"]]
+
+
+class TestProductSearch:
+    """Test cases for the product full-text search endpoint."""
+
+    def test_requires_query(self, api_client, db):
+        """Test that an empty search is rejected."""
+        response = api_client.get(reverse("product-search"))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "q parameter is required" in response.data["error"]
+
+    def test_name_matches_rank_above_description_matches(self, api_client, catalog):
+        """Test that the weighted vector ranks name hits first and stems words."""
+        response = api_client.get(reverse("product-search"), {"q": "bananas"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(names(response)[:2]) == {"Organic Bananas", "Banana Bread"}
+        assert names(response)[2] == "Berry Smoothie"
+        assert "Apples" not in names(response)
+
+    def test_serializes_like_the_product_list(self, api_client, catalog):
+        """Test that results use the product list representation."""
+        response = api_client.get(reverse("product-search"), {"q": "apples"})
+
+        result = response.data["results"][0]
+        assert result["id"] == catalog["apples"].id
+        assert result["price"] == "2.49"
+        assert result["category"]["slug"] == "fruits"
+        assert "rank" not in result
+
+    def test_cursor_with_bad_rank(self, api_client, catalog):
+        """Test that a cursor whose rank isn't a number is rejected."""
+        token = base64.urlsafe_b64encode(json.dumps({"p": ["high", 1]}).encode()).decode()
+        response = api_client.get(reverse("product-search"), {"q": "bananas", "cursor": token})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_combines_with_category_filter(self, api_client, catalog, child_category):
+        """Test that category_id narrows the matches."""
+        response = api_client.get(
+            reverse("product-search"), {"q": "banana", "category_id": child_category.id}
+        )
+
+        assert "Banana Bread" not in names(response)
+        assert "Organic Bananas" in names(response)
+
+    def test_paginates_by_rank(self, api_client, catalog):
+        """Test walking the ranked results one page at a time."""
+        url = reverse("product-search")
+        seen = []
+
+        response = api_client.get(url, {"q": "banana", "page_size": 1})
+        for _ in range(5):
+            seen.extend(names(response))
+            if not response.data["next"]:
+                break
+            response = api_client.get(response.data["next"])
+
+        assert len(seen) == 3
+        assert seen[-1] == "Berry Smoothie"
+
+        response = api_client.get(response.data["previous"])
+        assert names(response) == [seen[1]]
+
+    def test_sees_new_products(self, api_client, catalog, child_category):
+        """Test that the generated column indexes products as they are written."""
+        url = reverse("product-search")
+        assert names(api_client.get(url, {"q": "mango"})) == []
+
+        Product.objects.create(name="Mango", category=child_category, price=1, stock=1)
+
+        assert names(api_client.get(url, {"q": "mango"})) == ["Mango"]
+
+    def test_typo_falls_back_to_trigram_similarity(self, api_client, catalog):
+        """Test that a misspelt name still finds the product when pg_trgm is installed."""
+        if not trigram_available():
+            pytest.skip("pg_trgm is not installed in the test database")
+
+        response = api_client.get(reverse("product-search"), {"q": "bananna"})
+
+        assert "Organic Bananas" in names(response)
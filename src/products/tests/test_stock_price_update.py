@@ -0,0 +1,142 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from products.models import Category, CategoryStats, Product
+from products.services import update_stock_and_prices
+
+
+@pytest.fixture
+def category(db):
+    """Create a test category."""
+    return Category.objects.create(name="Fruits", slug="fruits")
+
+
+@pytest.fixture
+def products(category):
+    """Create products named p0 to p9 with stock 10 and price 1.00."""
+    return [
+        Product.objects.create(
+            name=f"p{i}", slug=f"p{i}", category=category, price=Decimal("1.00"), stock=10
+        )
+        for i in range(10)
+    ]
+
+
+class TestUpdateStockAndPrices:
+    """Test cases for the set-based stock and price update."""
+
+    def test_one_statement_per_batch(self, products):
+        """Test that a batch of ID updates is a single UPDATE statement."""
+        rows = [{"id": product.id, "stock": 20} for product in products]
+
+        with CaptureQueriesContext(connection) as queries:
+            report = update_stock_and_prices(rows, batch_size=5)
+
+        updates = [
+            q["sql"] for q in queries.captured_queries if "UPDATE products_product" in q["sql"]
+        ]
+        assert len(updates) == 2
+        assert sorted(report.updated) == sorted(product.id for product in products)
+        assert set(Product.objects.values_list("stock", flat=True)) == {20}
+
+    def test_touches_only_changed_rows(self, products):
+        """Test that updated_at moves only for products whose values changed."""
+        first, second = products[0], products[1]
+        loaded_at = first.updated_at
+
+        report = update_stock_and_prices(
+            [
+                {"id": first.id, "price": Decimal("2.50")},
+                {"slug": second.slug, "stock": 10, "price": Decimal("1.00")},
+            ]
+        )
+
+        assert report.updated == [first.id]
+        assert report.unchanged == 1
+        first.refresh_from_db()
+        second_after = Product.objects.get(pk=second.id)
+        assert first.price == Decimal("2.50")
+        assert first.stock == 10
+        assert first.updated_at > loaded_at
+        assert second_after.updated_at == second.updated_at
+
+    def test_last_row_wins(self, products):
+        """Test that a repeated key takes the values of its last row."""
+        product = products[0]
+
+        update_stock_and_prices([{"id": product.id, "stock": 1}, {"id": product.id, "stock": 2}])
+
+        product.refresh_from_db()
+        assert product.stock == 2
+
+    def test_reports_unknown_keys(self, products):
+        """Test that IDs and slugs that match no product are reported."""
+        report = update_stock_and_prices([{"id": 0, "stock": 1}, {"slug": "missing", "stock": 1}])
+
+        assert report.as_dict() == {
+            "updated": [],
+            "unchanged": 0,
+            "unknown_ids": [0],
+            "unknown_slugs": ["missing"],
+        }
+
+    def test_updates_category_stats(self, category, products):
+        """Test that the category statistics reflect the new values."""
+        update_stock_and_prices([{"id": products[0].id, "stock": 0, "price": Decimal("9.00")}])
+
+        stats = CategoryStats.objects.get(category=category)
+        assert stats.stock_total == 90
+        assert stats.max_price == Decimal("9.00")
+
+    @patch("products.services.invalidate_suggest_index")
+    def test_refreshes_only_written_categories(
+        self, invalidate, category, products, django_capture_on_commit_callbacks
+    ):
+        """Test that other categories aren't recomputed and the suggest index is kept."""
+        other = Category.objects.create(name="Bakery", slug="bakery")
+        CategoryStats.objects.filter(category=other).update(product_count=99)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            update_stock_and_prices([{"id": products[0].id, "stock": 5}])
+
+        assert CategoryStats.objects.get(category=category).stock_total == 95
+        assert CategoryStats.objects.get(category=other).product_count == 99
+        invalidate.assert_not_called()
+
+    def test_failed_batch_keeps_stats_of_committed_ones(self, category, products):
+        """Test that statistics are refreshed for the batches updated before a failure."""
+
+        def rows():
+            yield {"id": products[0].id, "stock": 0}
+            raise ValueError("Malformed row")
+
+        with pytest.raises(ValueError):
+            update_stock_and_prices(rows(), batch_size=1)
+
+        assert CategoryStats.objects.get(category=category).stock_total == 90
+
+
+class TestUpdateStockPricesCommand:
+    """Test cases for the update_stock_prices management command."""
+
+    def test_updates_from_csv(self, tmp_path, products):
+        """Test that a CSV file is applied and bad rows reported by line."""
+        path = tmp_path / "stock.csv"
+        path.write_text(
+            "id,slug,stock,price\n" f"{products[0].id},,3,\n" ",p1,,4.20\n" ",,5,\n" "99999,,5,\n"
+        )
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command("update_stock_prices", str(path), stdout=stdout, stderr=stderr)
+
+        assert Product.objects.get(pk=products[0].id).stock == 3
+        assert Product.objects.get(slug="p1").price == Decimal("4.20")
+        assert "Line 4: Provide either id or slug." in stderr.getvalue()
+        assert "Unknown IDs: 99999" in stderr.getvalue()
+        assert "2 updated, 0 unchanged, 1 unknown, 1 rejected" in stdout.getvalue()
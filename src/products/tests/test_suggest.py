@@ -0,0 +1,232 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+
+from orders.models import Order, OrderItem
+from products import suggest as suggest_module
+from products.models import Category, Product
+from products.suggest import (
+    SuggestIndex,
+    Suggestion,
+    apply_product_change,
+    get_suggest_index,
+    invalidate_suggest_index,
+)
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    """Drop the process-wide index so every test builds it from its own data."""
+    suggest_module._index = None
+    yield
+    suggest_module._index = None
+    suggest_module._updating = False
+
+
+def published_elsewhere(product_id, name):
+    """Publish a product change as another process would, leaving this index alone."""
+    index, suggest_module._index = suggest_module._index, None
+    apply_product_change(product_id, name)
+    suggest_module._index = index
+    index.checked_at = 0
+
+
+@pytest.fixture
+def catalog(db, child_category):
+    """Create products with different sales volumes."""
+    bakery = Category.objects.create(name="Bakery", slug="bakery")
+    products = {
+        "bananas": Product.objects.create(
+            name="Organic Bananas", category=child_category, price=Decimal("1.99"), stock=10
+        ),
+        "bread": Product.objects.create(
+            name="Banana Bread", category=bakery, price=Decimal("4.50"), stock=10
+        ),
+        "bagels": Product.objects.create(
+            name="Bagels", category=bakery, price=Decimal("3.00"), stock=10
+        ),
+    }
+
+    user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+    order = Order.objects.create(
+        user=user, order_number="ORD-1", total_amount=0, shipping_address="Nairobi"
+    )
+    OrderItem.objects.create(order=order, product=products["bread"], quantity=5, price=1)
+    OrderItem.objects.create(order=order, product=products["bananas"], quantity=2, price=1)
+    return products
+
+
+def suggest(api_client, prefix, **params):
+    response = api_client.get(reverse("product-suggest"), {"prefix": prefix, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return [item["name"] for item in response.data["suggestions"]]
+
+
+class TestSuggestIndex:
+    """Test cases for the in-memory prefix index."""
+
+    def test_matches_any_word_case_insensitively(self):
+        """Test that every word of a name starts a match."""
+        index = SuggestIndex(
+            [
+                Suggestion("product", 1, "Organic Bananas", 0),
+                Suggestion("product", 2, "Apples", 0),
+            ]
+        )
+
+        assert [s.name for s in index.suggest("BAN")] == ["Organic Bananas"]
+        assert [s.name for s in index.suggest("organic b")] == ["Organic Bananas"]
+        assert index.suggest("x") == []
+
+    def test_short_prefixes_use_precomputed_table(self):
+        """Test that one- and two-letter prefixes agree with a scan of the index."""
+        index = SuggestIndex(
+            [Suggestion("product", i, f"Item {chr(97 + i % 26)}{i}", i % 7) for i in range(200)]
+        )
+
+        for prefix in ("i", "it", "a", "b1"):
+            start, end = index._run(prefix)
+            expected = sorted(
+                {id(e): e for e in index.entries[start:end]}.values(), key=lambda e: e.sort_key
+            )[:5]
+            assert index.suggest(prefix, limit=5) == expected
+
+    def test_add_and_remove_keep_the_index_sorted(self):
+        """Test incremental maintenance of the sorted arrays and the short table."""
+        index = SuggestIndex([Suggestion("product", 1, "Bagels", 3)])
+
+        index.add_product(2, "Banana Bread", popularity=5)
+        assert [s.name for s in index.suggest("ba")] == ["Banana Bread", "Bagels"]
+        assert index.keys == sorted(index.keys)
+
+        assert index.remove_product(2) == 5
+        assert [s.name for s in index.suggest("b")] == ["Bagels"]
+        assert "bread" not in index.keys
+
+    def test_copy_leaves_the_original_alone(self):
+        """Test that changing a copy doesn't touch the index it was made from."""
+        index = SuggestIndex([Suggestion("product", 1, "Bagels", 3)])
+
+        updated = index.copy()
+        updated.apply_changes([(1, "Bread Rolls"), (2, "Baguette")])
+
+        assert [s.name for s in index.suggest("b")] == ["Bagels"]
+        assert [s.name for s in updated.suggest("b")] == ["Bread Rolls", "Baguette"]
+
+
+class TestSuggestEndpoint:
+    """Test cases for the product suggest endpoint."""
+
+    def test_requires_prefix(self, api_client, db):
+        """Test that an empty prefix is rejected."""
+        response = api_client.get(reverse("product-suggest"))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "prefix parameter is required" in response.data["error"]
+
+    def test_ranks_by_popularity(self, api_client, catalog):
+        """Test that better sellers come first, with categories ranked by their subtree."""
+        # Bakery ties with Banana Bread on 5 units and wins alphabetically.
+        assert suggest(api_client, "ba") == ["Bakery", "Banana Bread", "Organic Bananas", "Bagels"]
+
+    def test_includes_categories(self, api_client, catalog):
+        """Test that category names are suggested with their type."""
+        response = api_client.get(reverse("product-suggest"), {"prefix": "fru"})
+
+        assert response.data["suggestions"] == [
+            {"type": "category", "id": Category.objects.get(slug="fruits").id, "name": "Fruits"}
+        ]
+
+    def test_limit(self, api_client, catalog):
+        """Test that limit caps the number of suggestions."""
+        assert len(suggest(api_client, "ba", limit=2)) == 2
+
+    def test_lookup_runs_no_queries(self, api_client, catalog, django_assert_num_queries):
+        """Test that a warm index answers from memory."""
+        get_suggest_index()
+
+        with django_assert_num_queries(0):
+            suggest(api_client, "bagel")
+
+    def test_product_changes_are_applied_on_commit(
+        self, api_client, catalog, child_category, django_capture_on_commit_callbacks
+    ):
+        """Test that creating, renaming and deleting products patches the index."""
+        get_suggest_index()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            mango = Product.objects.create(name="Mango", category=child_category, price=1, stock=1)
+        assert suggest(api_client, "man") == ["Mango"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            mango.name = "Ripe Mango"
+            mango.save()
+        assert suggest(api_client, "rip") == ["Ripe Mango"]
+        assert suggest(api_client, "mango") == ["Ripe Mango"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            mango.delete()
+        assert suggest(api_client, "m") == []
+
+    def test_applies_changes_published_elsewhere(
+        self, api_client, catalog, django_assert_num_queries
+    ):
+        """Test that another process's changes are applied without reloading the index."""
+        index = get_suggest_index()
+
+        published_elsewhere(catalog["bagels"].pk, "Sesame Bagels")
+        with django_assert_num_queries(0):
+            assert suggest(api_client, "ses") == ["Sesame Bagels"]
+
+        assert get_suggest_index() is not index
+        assert index.suggest("ses") == []
+
+    def test_rebuilds_in_background(
+        self, api_client, catalog, child_category, settings, django_assert_num_queries
+    ):
+        """Test that the old index is served while its replacement is built, then swapped in."""
+        settings.PRODUCTS_SUGGEST_BACKGROUND_REBUILD = True
+        index = get_suggest_index()
+        Product.objects.create(name="Mango", category=child_category, price=1, stock=1)
+
+        with patch("products.suggest.threading.Thread") as thread:
+            invalidate_suggest_index()
+            with django_assert_num_queries(0):
+                assert suggest(api_client, "man") == []
+            invalidate_suggest_index()
+
+        thread.assert_called_once()
+        assert get_suggest_index() is index
+        suggest_module._update(*thread.call_args.kwargs["args"])
+        assert suggest(api_client, "man") == ["Mango"]
+
+    def test_applies_changes_in_background(self, api_client, catalog, settings):
+        """Test that published changes are applied off the request path, then swapped in."""
+        settings.PRODUCTS_SUGGEST_BACKGROUND_REBUILD = True
+        index = get_suggest_index()
+
+        published_elsewhere(catalog["bagels"].pk, "Sesame Bagels")
+        with patch("products.suggest.threading.Thread") as thread:
+            with patch.object(SuggestIndex, "copy") as copy:
+                assert suggest(api_client, "ses") == []
+            copy.assert_not_called()
+
+        thread.assert_called_once()
+        assert get_suggest_index() is index
+        suggest_module._update(*thread.call_args.kwargs["args"])
+        assert suggest(api_client, "ses") == ["Sesame Bagels"]
+        assert index.suggest("ses") == []
+
+    def test_index_is_not_patched_before_commit(self, api_client, catalog, child_category):
+        """Test that an uncommitted product doesn't show up."""
+        get_suggest_index()
+
+        Product.objects.create(name="Mango", category=child_category, price=1, stock=1)
+
+        assert suggest(api_client, "man") == []
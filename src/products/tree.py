@@ -0,0 +1,164 @@
+import threading
+from bisect import bisect_right
+
+from .cache import CATEGORY_TREE, get_versions, invalidate
+from .models import Category
+
+
+class CategoryTree:
+    """
+    Immutable in-memory snapshot of the whole ``Category`` MPTT tree.
+
+    Built from a single query over the MPTT columns, it answers the structural
+    questions the catalog asks (descendants, ancestors, children, leaves)
+    without touching the database. Descendants are the nodes of the same
+    ``tree_id`` whose ``lft`` falls inside ``(lft, rght)``, found by bisecting
+    each tree's nodes sorted by ``lft``.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self._nodes = {}
+        self._children = {}
+        by_tree = {}
+
+        for row in rows:
+            self._nodes[row["id"]] = row
+            self._children.setdefault(row["id"], [])
+            by_tree.setdefault(row["tree_id"], []).append(row)
+
+        for row in self._nodes.values():
+            if row["parent_id"] is not None:
+                self._children[row["parent_id"]].append(row["id"])
+        for children in self._children.values():
+            children.sort(key=lambda node_id: self._nodes[node_id]["lft"])
+
+        self._trees = {}
+        for tree_id, nodes in by_tree.items():
+            nodes.sort(key=lambda row: row["lft"])
+            self._trees[tree_id] = ([row["lft"] for row in nodes], [row["id"] for row in nodes])
+
+    @classmethod
+    def load(cls, version=None):
+        """Build a snapshot from the database."""
+        rows = Category.objects.order_by().values(
+            "id", "name", "slug", "parent_id", "tree_id", "lft", "rght", "level"
+        )
+        return cls(rows, version=version)
+
+    def __contains__(self, category_id):
+        return category_id in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def get(self, category_id):
+        """Return the node dict for ``category_id`` or ``None``."""
+        return self._nodes.get(category_id)
+
+    def name(self, category_id):
+        """Return the name of a category."""
+        return self._nodes[category_id]["name"]
+
+    def root_ids(self):
+        """Return the IDs of the top-level categories, in tree order."""
+        return [ids[0] for _, (_, ids) in sorted(self._trees.items())]
+
+    def children_ids(self, category_id):
+        """Return the IDs of a category's direct children, in tree order."""
+        return list(self._children[category_id])
+
+    def is_leaf(self, category_id):
+        """Return whether a category has no children."""
+        return not self._children[category_id]
+
+    def leaf_ids(self):
+        """Return the IDs of every category without children."""
+        return [node_id for node_id, children in self._children.items() if not children]
+
+    def descendant_ids(self, category_id, include_self=False):
+        """
+        Return the IDs of a category's subtree in tree order.
+
+        Args:
+            category_id (int): Root of the subtree.
+            include_self (bool): Whether to include ``category_id`` itself.
+
+        Returns:
+            list: Category IDs.
+        """
+        node = self._nodes[category_id]
+        lfts, ids = self._trees[node["tree_id"]]
+        start = bisect_right(lfts, node["lft"])
+        end = bisect_right(lfts, node["rght"], lo=start)
+
+        descendants = ids[start:end]
+        if include_self:
+            return [category_id, *descendants]
+        return descendants
+
+    def ancestor_ids(self, category_id, include_self=False):
+        """
+        Return the IDs of a category's ancestors, root first.
+
+        Args:
+            category_id (int): Category to start from.
+            include_self (bool): Whether to end the path with ``category_id``.
+
+        Returns:
+            list: Category IDs.
+        """
+        path = [category_id] if include_self else []
+        parent_id = self._nodes[category_id]["parent_id"]
+        while parent_id is not None:
+            path.append(parent_id)
+            parent_id = self._nodes[parent_id]["parent_id"]
+        path.reverse()
+        return path
+
+    def path(self, category_id):
+        """Return the slugs from the root down to a category, joined by ``/``."""
+        return "/".join(
+            self._nodes[node_id]["slug"]
+            for node_id in self.ancestor_ids(category_id, include_self=True)
+        )
+
+    def root_id(self, category_id):
+        """Return the ID of the top-level category above ``category_id``."""
+        _, ids = self._trees[self._nodes[category_id]["tree_id"]]
+        return ids[0]
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_category_tree():
+    """
+    Return the category tree snapshot for the current tree version.
+
+    The version lives in the shared cache and is bumped by the category signal
+    handlers, so every process drops its snapshot after any category change and
+    rebuilds it once on next use. Code that rewrites the tree without saving
+    categories (e.g. ``Category.objects.rebuild()``) must call
+    :func:`invalidate_category_tree`.
+    """
+    global _snapshot
+
+    (version,) = get_versions([CATEGORY_TREE])
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = CategoryTree.load(version=version)
+        return _snapshot
+
+
+def invalidate_category_tree():
+    """Drop the snapshot in every process."""
+    invalidate(CATEGORY_TREE)
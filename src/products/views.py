@@ -1,21 +1,77 @@
-from django.db.models import Avg
+from django.http import StreamingHttpResponse
 from drf_spectacular.utils import extend_schema
 from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from core.compiled import CompiledListModelMixin
+from core.eager_loading import EagerLoadingViewSetMixin
+
+from .cache import (
+    CATEGORY_LIST,
+    CATEGORY_PRICES,
+    PRODUCT_DETAIL,
+    PRODUCT_LIST,
+    cache_response,
+    product_namespace,
+)
+from .conditional import conditional_response
+from .exporter import (
+    export_chunks,
+    export_content_type,
+    export_filename,
+    export_rows,
+    parse_export_params,
+)
+from .filters import ProductFilterBackend, parse_product_filters, product_facets
 from .models import Category, Product
+from .pagination import ProductCursorPagination, ProductSearchPagination
 from .schemas import (
+    bulk_create_products_schema,
+    bulk_update_stock_prices_schema,
     category_average_price_schema,
+    export_products_schema,
     list_categories_schema,
     list_products_schema,
     retrieve_category_schema,
     retrieve_product_schema,
+    search_products_schema,
+    suggest_products_schema,
 )
-from .serializers import CategorySerializer, ProductSerializer
+from .search import search_products
+from .serializers import (
+    BulkProductCreateSerializer,
+    BulkProductStockPriceSerializer,
+    CategorySerializer,
+    ProductSerializer,
+)
+from .services import update_stock_and_prices
+from .stats import OWN, SUBTREE, get_category_stats
+from .suggest import MAX_SUGGESTIONS, get_suggest_index
+from .tree import get_category_tree
+
 
+def _detail_namespace(view, request, kwargs):
+    """
+    Return the namespace of the product a detail URL is for.
 
-class CategoryViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    The lookup parses the pk as an integer, so ``/05/`` and ``/5/`` are the
+    same product and must share the namespace its changes bump. A pk that
+    isn't a number can't match a product; it falls back to the shared
+    detail namespace.
+    """
+    try:
+        return product_namespace(int(kwargs["pk"]))
+    except ValueError:
+        return PRODUCT_DETAIL
+
+
+class CategoryViewSet(
+    EagerLoadingViewSetMixin,
+    CompiledListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
     """
     Read-only ViewSet for categories.
     Admin interface should be used for category management.
@@ -26,6 +82,8 @@ class CategoryViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets
     permission_classes = [permissions.AllowAny]
 
     @extend_schema(**list_categories_schema)
+    @conditional_response([Category], CATEGORY_LIST)
+    @cache_response(CATEGORY_LIST)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -34,40 +92,152 @@ class CategoryViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets
         return super().retrieve(request, *args, **kwargs)
 
 
-class ProductViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class ProductViewSet(
+    EagerLoadingViewSetMixin,
+    CompiledListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
     """
     Read-only ViewSet for products:
     - List products
+    - Search products
+    - Autocomplete product and category names
     - Get product details
+    - Create products in bulk (staff only)
+    - Update stock and prices in bulk (staff only)
+    - Export the catalog as a file (authenticated users)
     - Calculate average price for a category
 
-    Admin interface should be used for product management.
+    Admin interface should be used for managing individual products.
     """
 
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ProductCursorPagination
+    filter_backends = [ProductFilterBackend]
 
     @extend_schema(**list_products_schema)
+    @conditional_response([Product, Category], PRODUCT_LIST)
+    @cache_response(PRODUCT_LIST)
     def list(self, request, *args, **kwargs):
-        category_id = self.request.query_params.get("category_id")
-        queryset = self.get_queryset()
+        queryset = self.filter_queryset(self.get_queryset())
+
+        response = self.compiled_list_response(queryset)
+        # The facets describe the whole filtered set, not the page, so they are
+        # only aggregated for the first page instead of again for every cursor.
+        if self.paginator.cursor_query_param not in request.query_params:
+            response.data["facets"] = product_facets(
+                queryset, parse_product_filters(request).get("category_id")
+            )
+        return response
 
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
+    @extend_schema(**search_products_schema)
+    @action(detail=False, methods=["get"], pagination_class=ProductSearchPagination)
+    @conditional_response([Product, Category], PRODUCT_LIST)
+    @cache_response(PRODUCT_LIST)
+    def search(self, request):
+        """
+        Search products by name and description, best match first.
+        """
+        terms = request.query_params.get("q", "").strip()
+        if not terms:
+            return Response(
+                {"error": "q parameter is required"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.compiled_list_response(search_products(queryset, terms), "rank")
+
+    @extend_schema(**suggest_products_schema)
+    @action(detail=False, methods=["get"])
+    def suggest(self, request):
+        """
+        Suggest product and category names for a prefix, most popular first.
+        """
+        prefix = request.query_params.get("prefix", "")
+        if not prefix.strip():
+            return Response(
+                {"error": "prefix parameter is required"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+
+        suggestions = get_suggest_index().suggest(prefix, limit)
+        return Response({"suggestions": [suggestion.as_dict() for suggestion in suggestions]})
+
+    @extend_schema(request=BulkProductCreateSerializer, **bulk_create_products_schema)
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        permission_classes=[permissions.IsAdminUser],
+        serializer_class=BulkProductCreateSerializer,
+    )
+    def bulk_create(self, request):
+        """
+        Create many products at once (staff only).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        products = serializer.save()["products"]
+
+        return Response(
+            {"count": len(products), "ids": [product.id for product in products]},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(request=BulkProductStockPriceSerializer, **bulk_update_stock_prices_schema)
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-update",
+        permission_classes=[permissions.IsAdminUser],
+        serializer_class=BulkProductStockPriceSerializer,
+    )
+    def bulk_update(self, request):
+        """
+        Set the stock and/or price of many products at once (staff only).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = update_stock_and_prices(serializer.validated_data["products"])
+
+        return Response(report.as_dict())
+
+    @extend_schema(**export_products_schema)
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
+    def export(self, request):
+        """
+        Stream every matching product as NDJSON or CSV, optionally gzipped.
+        """
+        params = parse_export_params(request)
+        format, gzip = params["export_format"], params["gzip"]
+        queryset = self.filter_queryset(Product.objects.all())
+
+        response = StreamingHttpResponse(
+            export_chunks(export_rows(queryset), format, gzip),
+            content_type=export_content_type(format, gzip),
+        )
+        response["Content-Disposition"] = f'attachment; filename="{export_filename(format, gzip)}"'
+        return response
 
     @extend_schema(**retrieve_product_schema)
+    @cache_response(PRODUCT_DETAIL, _detail_namespace)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
     @extend_schema(**category_average_price_schema)
     @action(detail=False, methods=["get"])
+    @cache_response(CATEGORY_PRICES)
     def category_average_price(self, request):
         """
-        Get the average product price for a given category.
+        Get the average, minimum and maximum product price for a given category.
         """
         category_id = request.query_params.get("category_id")
         include_subcategories = (
@@ -79,20 +249,28 @@ class ProductViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.
                 {"error": "category_id parameter is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        tree = get_category_tree()
         try:
-            category = Category.objects.get(pk=category_id)
-        except Category.DoesNotExist:
+            category_pk = int(category_id)
+        except ValueError:
+            category_pk = None
+        if category_pk not in tree:
             return Response(
                 {"error": f"Category with ID {category_id} does not exist"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if include_subcategories:
-            categories = category.get_descendants(include_self=True)
-            queryset = self.get_queryset().filter(category__in=categories)
-        else:
-            queryset = self.get_queryset().filter(category=category)
+        stats = get_category_stats(category_pk)
+        prefix = SUBTREE if include_subcategories else OWN
 
-        avg_price = queryset.aggregate(avg_price=Avg("price"))["avg_price"] or 0
+        count = getattr(stats, f"{prefix}product_count")
+        total = getattr(stats, f"{prefix}price_total")
 
-        return Response({"average_price": avg_price})
+        return Response(
+            {
+                "average_price": total / count if count else 0,
+                "min_price": getattr(stats, f"{prefix}min_price"),
+                "max_price": getattr(stats, f"{prefix}max_price"),
+                "product_count": count,
+            }
+        )